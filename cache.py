@@ -0,0 +1,231 @@
+"""contains MatchCache class"""
+
+import json
+import os
+import sqlite3
+from typing import Optional
+from logger import LoggingManager
+from constants import Constants, FileSearchResults, Messages
+from state import list_hash
+
+
+# pylint: disable=too-many-instance-attributes
+class MatchCache:
+    """used to persist search results by file content (git blob) and by commit
+
+    blob results record the words they were searched for, so after words are
+    added only those are searched for, and after words are removed results
+    are filtered
+    """
+
+    def __init__(
+        self,
+        logger: LoggingManager,
+        pattern: str,
+        words: list[str],
+        excludes: list[str],
+    ) -> None:
+        self.__logger = logger
+        self.__pattern = pattern
+        self.__words = words
+        self.__key = (pattern, list_hash(words))
+        # stored word lists keyed by id
+        self.__word_lists: dict[int, frozenset[str]] = {}
+        # stored matches and word list id of blobs searched for some words
+        self.__partial: dict[str, tuple[dict, int]] = {}
+        # files implied to have no matches depend on what was excluded
+        self.__excludes_hash = list_hash(excludes)
+        self.__conn: Optional[sqlite3.Connection] = None
+        try:
+            os.makedirs(Constants.STATE_FOLDER, exist_ok=True)
+            self.__conn = sqlite3.connect(
+                os.path.join(Constants.STATE_FOLDER, Constants.MATCH_CACHE_FILE)
+            )
+            with self.__conn:
+                # replaced by per word list blob results
+                self.__conn.execute("DROP TABLE IF EXISTS blobs")
+                # replaced since binary contents stopped being searched
+                self.__conn.execute("DROP TABLE IF EXISTS blob_matches")
+                # replaced since matches are stored as line numbers and previews
+                self.__conn.execute("DROP TABLE IF EXISTS content_matches")
+                self.__conn.execute("DROP TABLE IF EXISTS commits")
+                self.__conn.execute(
+                    "CREATE TABLE IF NOT EXISTS word_lists (id INTEGER PRIMARY KEY, "
+                    "hash TEXT UNIQUE, words TEXT)"
+                )
+                self.__conn.execute(
+                    "CREATE TABLE IF NOT EXISTS line_matches (pattern TEXT, "
+                    "blob TEXT, word_list INTEGER, matches TEXT, "
+                    "PRIMARY KEY (pattern, blob))"
+                )
+                self.__conn.execute(
+                    "CREATE TABLE IF NOT EXISTS commit_matches (pattern TEXT, words TEXT, "
+                    "excludes TEXT, commit_id TEXT, files TEXT, "
+                    "PRIMARY KEY (pattern, words, excludes, commit_id))"
+                )
+        except (OSError, sqlite3.Error) as err:
+            self.__logger.error(Messages.MATCH_CACHE_FAILED.format(err=err))
+            self.__conn = None
+
+    def load(
+        self, commit: str, blobs: dict[str, str]
+    ) -> tuple[dict[str, dict], dict[str, tuple[str, ...]]]:
+        """stored matches keyed by blob SHA, blobs keyed by path relative to branch,
+        and search words missing from stored results of other blobs
+        """
+        self.__partial = {}
+        if self.__conn is None or not blobs:
+            return ({}, {})
+        try:
+            row = self.__conn.execute(
+                "SELECT files FROM commit_matches WHERE pattern = ? AND words = ? "
+                "AND excludes = ? AND commit_id = ?",
+                (*self.__key, self.__excludes_hash, commit),
+            ).fetchone()
+            if row is not None:
+                # whole commit searched before, files without matches implied
+                files = json.loads(row[0])
+                return ({blob: files.get(path, {}) for path, blob in blobs.items()}, {})
+
+            return self.__load_blobs(list(set(blobs.values())))
+        except (sqlite3.Error, json.decoder.JSONDecodeError) as err:
+            self.__logger.error(Messages.MATCH_CACHE_FAILED.format(err=err))
+            self.__partial = {}
+            return ({}, {})
+
+    def __load_blobs(
+        self, unique: list[str]
+    ) -> tuple[dict[str, dict], dict[str, tuple[str, ...]]]:
+        assert self.__conn is not None
+        found = {}
+        missing = {}
+        for start in range(0, len(unique), Constants.SQL_BATCH_SIZE):
+            chunk = unique[start : start + Constants.SQL_BATCH_SIZE]
+            rows = self.__conn.execute(
+                "SELECT blob, word_list, matches FROM line_matches "
+                f"WHERE pattern = ? AND blob IN ({', '.join('?' * len(chunk))})",
+                (self.__pattern, *chunk),
+            )
+            for blob, word_list, matches in rows:
+                searched = self.__word_list(word_list)
+                stored = json.loads(matches)
+                new_words = tuple(word for word in self.__words if word not in searched)
+                if new_words:
+                    missing[blob] = new_words
+                    self.__partial[blob] = (stored, word_list)
+                else:
+                    # search word order, without words removed since
+                    found[blob] = {
+                        word: stored[word] for word in self.__words if word in stored
+                    }
+        return (found, missing)
+
+    def merge(self, blob: str, matches: dict) -> dict:
+        """matches of blob for all search words, from matches of its missing words"""
+        stored = self.__partial[blob][0]
+        return {
+            word: stored[word] if word in stored else matches[word]
+            for word in self.__words
+            if word in stored or word in matches
+        }
+
+    def save(
+        self,
+        commit: str,
+        blobs: dict[str, str],
+        files: dict[str, FileSearchResults],
+        scanned: dict[str, dict],
+    ) -> None:
+        """stores matches of newly scanned blobs, and of commit if fully known
+
+        commit is empty if the checkout had local changes, files hold results
+        with matches or errors keyed by path relative to branch, scanned holds
+        matches for all search words keyed by blob SHA
+        """
+        if self.__conn is None:
+            return
+        try:
+            with self.__conn:
+                rows = []
+                # ids of search words joined with earlier word lists
+                list_ids: dict[Optional[int], int] = {
+                    None: self.__word_list_id(frozenset(self.__words))
+                }
+                for blob, matches in scanned.items():
+                    stored_list = None
+                    if blob in self.__partial:
+                        # keep results of words searched for before
+                        stored, stored_list = self.__partial[blob]
+                        matches = {**stored, **matches}
+                    if stored_list not in list_ids:
+                        list_ids[stored_list] = self.__word_list_id(
+                            self.__word_list(stored_list).union(self.__words)
+                        )
+                    word_list = list_ids[stored_list]
+                    rows.append((self.__pattern, blob, word_list, json.dumps(matches)))
+                self.__conn.executemany(
+                    "INSERT OR REPLACE INTO line_matches VALUES (?, ?, ?, ?)", rows
+                )
+                # errors depend on the checkout path, not the content, and
+                # rejected files weren't searched
+                if commit and not any(
+                    file_results.error or file_results.rejected
+                    for path, file_results in files.items()
+                    if path in blobs
+                ):
+                    self.__conn.execute(
+                        "INSERT OR REPLACE INTO commit_matches VALUES (?, ?, ?, ?, ?)",
+                        (
+                            *self.__key,
+                            self.__excludes_hash,
+                            commit,
+                            json.dumps(
+                                {
+                                    path: file_results.matches
+                                    for path, file_results in files.items()
+                                    if path in blobs
+                                }
+                            ),
+                        ),
+                    )
+        except sqlite3.Error as err:
+            self.__logger.error(Messages.MATCH_CACHE_FAILED.format(err=err))
+
+    def __word_list(self, word_list: int) -> frozenset[str]:
+        assert self.__conn is not None
+        if word_list not in self.__word_lists:
+            (words,) = self.__conn.execute(
+                "SELECT words FROM word_lists WHERE id = ?", (word_list,)
+            ).fetchone()
+            self.__word_lists[word_list] = frozenset(json.loads(words))
+        return self.__word_lists[word_list]
+
+    def __word_list_id(self, words: frozenset[str]) -> int:
+        """id of stored word list, stored first if new"""
+        assert self.__conn is not None
+        ordered = sorted(words)
+        words_hash = list_hash(ordered)
+        self.__conn.execute(
+            "INSERT OR IGNORE INTO word_lists (hash, words) VALUES (?, ?)",
+            (words_hash, json.dumps(ordered)),
+        )
+        (word_list,) = self.__conn.execute(
+            "SELECT id FROM word_lists WHERE hash = ?", (words_hash,)
+        ).fetchone()
+        self.__word_lists[word_list] = words
+        return word_list
+
+    def close(self) -> None:
+        """closes database connection"""
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+
+    @staticmethod
+    def cached_results(matches: dict, path: str) -> FileSearchResults:
+        """stored results of file with previously searched content"""
+        file_results = FileSearchResults(path)
+        # only results without errors are stored
+        file_results.decoded = True
+        file_results.matches = matches
+        return file_results
@@ -0,0 +1,117 @@
+"""contains ContentClassifier class"""
+
+import os
+import sqlite3
+from typing import Callable, Optional
+from logger import LoggingManager
+from constants import Constants, Messages
+
+
+class ContentClassifier:
+    """used to skip files not worth scanning (binary, other encodings, too
+    large) by sniffing their first bytes before they're read
+
+    size and kind are stored by content key (blob SHA, or path with size and
+    modification time), so contents are sniffed once across runs
+    """
+
+    def __init__(self, logger: LoggingManager, max_size: int) -> None:
+        self.__logger = logger
+        # no limit if 0
+        self.__max_size = max_size
+        # size and kind of contents sniffed in this run, to be stored
+        self.__new: dict[str, tuple[int, str]] = {}
+        self.__conn: Optional[sqlite3.Connection] = None
+        try:
+            os.makedirs(Constants.STATE_FOLDER, exist_ok=True)
+            self.__conn = sqlite3.connect(
+                os.path.join(Constants.STATE_FOLDER, Constants.CLASSES_FILE)
+            )
+            with self.__conn:
+                self.__conn.execute(
+                    "CREATE TABLE IF NOT EXISTS contents (key TEXT PRIMARY KEY, "
+                    "size INTEGER, kind TEXT)"
+                )
+        except (OSError, sqlite3.Error) as err:
+            self.__logger.error(Messages.CLASSIFIER_FAILED.format(err=err))
+            self.__conn = None
+
+    def skip_reason(
+        self,
+        key: str,
+        read_size: Callable[[], Optional[int]],
+        read_head: Callable[[], Optional[bytes]],
+    ) -> str:
+        """reason contents with key aren't searched, empty if they are
+
+        read_size and read_head return size and first bytes of contents, None
+        if unreadable, contents too large aren't sniffed
+        """
+        stored = self.__new.get(key) or self.__stored(key)
+        if stored is None:
+            size = read_size()
+            if size is None:
+                # left to the scan to report
+                return ""
+            # kind unknown until sniffed
+            stored = self.__new[key] = (size, "")
+
+        size, kind = stored
+        too_large = bool(self.__max_size) and size > self.__max_size
+        if not kind and not too_large:
+            head = read_head()
+            if head is None:
+                return ""
+            kind = content_kind(head)
+            self.__new[key] = (size, kind)
+
+        if kind == Constants.BINARY_CONTENT:
+            return Messages.BINARY_CONTENT
+        if kind == Constants.ENCODED_CONTENT:
+            return Messages.ENCODED_CONTENT
+        if too_large:
+            return Messages.CONTENT_TOO_LARGE.format(size=size)
+        return ""
+
+    def save(self) -> None:
+        """stores contents sniffed since last saved"""
+        if self.__conn is None or not self.__new:
+            return
+        try:
+            with self.__conn:
+                self.__conn.executemany(
+                    "INSERT OR REPLACE INTO contents VALUES (?, ?, ?)",
+                    ((key, size, kind) for key, (size, kind) in self.__new.items()),
+                )
+        except sqlite3.Error as err:
+            self.__logger.error(Messages.CLASSIFIER_FAILED.format(err=err))
+        self.__new = {}
+
+    def close(self) -> None:
+        """stores sniffed contents, closes database connection"""
+        self.save()
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+
+    def __stored(self, key: str) -> Optional[tuple[int, str]]:
+        if self.__conn is None:
+            return None
+        try:
+            return self.__conn.execute(
+                "SELECT size, kind FROM contents WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as err:
+            self.__logger.error(Messages.CLASSIFIER_FAILED.format(err=err))
+            return None
+
+
+def content_kind(head: bytes) -> str:
+    """kind of contents from their first bytes, text unless a UTF-16/32 byte
+    order mark or a NUL byte shows the scanner can't decode them
+    """
+    if head.startswith(Constants.WIDE_BOMS):
+        return Constants.ENCODED_CONTENT
+    if b"\0" in head:
+        return Constants.BINARY_CONTENT
+    return Constants.TEXT_CONTENT
@@ -0,0 +1,85 @@
+"""contains ADOClient class"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from logger import LoggingManager
+from constants import Constants, Messages
+
+
+class ADOClient:
+    """used for ADO REST requests over a shared, pooled session"""
+
+    def __init__(self, logger: LoggingManager, auth: tuple, workers: int) -> None:
+        self.__logger = logger
+        self.__workers = workers
+        self.__session = requests.Session()
+        self.__session.auth = auth
+        # one keep-alive connection per worker
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+
+    def get(self, url: str) -> Optional[requests.models.Response]:
+        """GET with retries, None if all attempts fail
+
+        raises requests.HTTPError for statuses retrying won't fix
+        """
+        for attempt in range(Constants.RETRIES):
+            delay = min(Constants.BACKOFF_MAX, Constants.BACKOFF_BASE * 2**attempt)
+            delay = random.uniform(0, delay)
+            try:
+                resp = self.__session.get(url, timeout=Constants.TIMEOUT)
+                if resp.status_code == Constants.SUCCESS_CODE:
+                    return resp
+                if not self.__retryable(resp.status_code):
+                    resp.raise_for_status()
+                self.__logger.error(
+                    Messages.REQUEST_STATUS.format(code=resp.status_code)
+                )
+                if resp.status_code in Constants.THROTTLED_CODES:
+                    delay = self.__retry_after(resp, delay)
+
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ReadTimeout,
+            ) as e:
+                self.__logger.error(f"{Messages.REQUEST_FAILED} - {e}")
+
+            if attempt < Constants.RETRIES - 1:
+                time.sleep(delay)
+        return None
+
+    def get_all(self, urls: list[str]) -> list[Optional[requests.models.Response]]:
+        """concurrent GETs, responses in url order"""
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            return list(executor.map(self.get, urls))
+
+    def close(self) -> None:
+        """closes pooled connections"""
+        self.__session.close()
+
+    @staticmethod
+    def __retryable(code: int) -> bool:
+        """throttling and server errors can pass, anything else won't"""
+        return code in Constants.THROTTLED_CODES or code >= Constants.SERVER_ERROR
+
+    @staticmethod
+    def __retry_after(resp: requests.models.Response, default: float) -> float:
+        """seconds to wait from Retry-After header (seconds or http date)"""
+        header = resp.headers.get(Constants.RETRY_AFTER_HEADER)
+        if not header:
+            return default
+        try:
+            return min(Constants.RETRY_AFTER_MAX, max(0.0, float(header)))
+        except ValueError:
+            pass
+        try:
+            wait = parsedate_to_datetime(header).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+        return min(Constants.RETRY_AFTER_MAX, max(0.0, wait))
@@ -1,5 +1,6 @@
 """contains ConfigurationManager, ConfigurationHandler classes"""
 
+import argparse
 import os
 import re
 import time
@@ -8,9 +9,10 @@ import json
 from typing import Optional, Union
 import toml
 import requests
+from client import ADOClient
 from logger import LoggingManager
 from constants import Messages, Constants, ConfigurationFile
-from repository import ADORepository
+from repository import ADORepository, sparse_patterns
 
 
 class ConfigurationManager:
@@ -20,23 +22,23 @@ class ConfigurationManager:
         self.__logger: LoggingManager = logger
         self.__config: dict[type, dict] = {}
 
-    def set_config(self, key: str, val: Union[str, bool, list, dict]):
+    def set_config(self, key: str, val: Union[str, bool, int, list, dict]):
         """set key, value pair"""
-        if not isinstance(val, (str, bool, list, dict)):
+        if not isinstance(val, (str, bool, int, list, dict)):
             self.__logger.critical(
                 Messages.UNHANDLED_TYPE.format(type=type(key).__name__)
             )
         self.__set_config_helper(type(val), key, val)
 
     def __set_config_helper(
-        self, _type: type, key: str, val: Union[str, bool, list, dict]
+        self, _type: type, key: str, val: Union[str, bool, int, list, dict]
     ) -> None:
         if _type not in self.__config:
             self.__config[_type] = {}
         self.__config[_type][key] = val
 
     def __get_helper(self, key: str, _type: type) -> tuple:
-        if key in self.__config[_type]:
+        if key in self.__config.get(_type, {}):
             return True, self.__config[_type][key]
         self.__logger.error(
             Messages.CONFIG_ITEM_NOT_FOUND.format(key=key, type=_type.__name__)
@@ -57,6 +59,13 @@ class ConfigurationManager:
             return val
         return default
 
+    def get_int(self, key: str, default: int = 0) -> int:
+        """get integer with specified key"""
+        found, val = self.__get_helper(key, int)
+        if found:
+            return val
+        return default
+
     def get_list(self, key: str, default: Optional[list] = None) -> list:
         """get list with specified key"""
         found, val = self.__get_helper(key, list)
@@ -95,8 +104,12 @@ class ConfigurationHandler:
 
     def populate_config(self) -> None:
         """populate config manager with files, user input, and other logic"""
+        self.__load_arguments()
         self.__load_template()
         self.__load_search_pattern()
+        # repo data is only refreshed for repos the search targets
+        self.__load_included_repos()
+        self.__load_excluded_repos()
         offline = self.__get_connection_status()
         if offline:
             self.__logger.info(Messages.ADO_CONFIG_SKIP)
@@ -108,8 +121,7 @@ class ConfigurationHandler:
         self.__load_branch_timestamps()
         self.__load_excluded_files()
         self.__load_excluded_folders()
-        self.__load_included_repos()
-        self.__load_excluded_repos()
+        self.__load_included_files()
         self.__load_repo_data()
         self.__create_target_repos()
         self.__create_repos(offline)
@@ -127,6 +139,167 @@ class ConfigurationHandler:
         ) as file:
             json.dump(branch_updates, file, indent=Constants.JSON_INDENT)
 
+    # pylint: disable=too-many-statements
+    def __load_arguments(self) -> None:
+        """command line options"""
+        parser = argparse.ArgumentParser(description=Messages.DESCRIPTION)
+        parser.add_argument(
+            "--workers", type=int, default=1, help=Messages.WORKERS_HELP
+        )
+        parser.add_argument(
+            "--git-workers", type=int, default=1, help=Messages.GIT_WORKERS_HELP
+        )
+        parser.add_argument(
+            "--host-limit", type=int, default=4, help=Messages.HOST_LIMIT_HELP
+        )
+        parser.add_argument(
+            "--prefetch", type=int, default=0, help=Messages.PREFETCH_HELP
+        )
+        parser.add_argument(
+            "--api-workers", type=int, default=8, help=Messages.API_WORKERS_HELP
+        )
+        parser.add_argument(
+            "--base-url", default=Constants.BASE_URL, help=Messages.BASE_URL_HELP
+        )
+        parser.add_argument(
+            "--full-search", action="store_true", help=Messages.FULL_SEARCH_HELP
+        )
+        parser.add_argument("--depth", type=int, default=0, help=Messages.DEPTH_HELP)
+        parser.add_argument("--filter", default="", help=Messages.FILTER_HELP)
+        parser.add_argument("--sparse", action="store_true", help=Messages.SPARSE_HELP)
+        parser.add_argument("--index", action="store_true", help=Messages.INDEX_HELP)
+        parser.add_argument("--pack", action="store_true", help=Messages.PACK_HELP)
+        parser.add_argument(
+            "--writer-thread", action="store_true", help=Messages.WRITER_THREAD_HELP
+        )
+        parser.add_argument(
+            "--sink",
+            action="append",
+            default=[],
+            choices=[
+                Constants.JSONL_SINK,
+                Constants.JSONL_GZIP_SINK,
+                Constants.SQLITE_SINK,
+            ],
+            help=Messages.SINK_HELP,
+        )
+        parser.add_argument(
+            "--counts-only", action="store_true", help=Messages.COUNTS_ONLY_HELP
+        )
+        parser.add_argument(
+            "--file-log-level",
+            choices=list(Constants.FILE_LOG_LEVELS),
+            default="debug",
+            help=Messages.FILE_LOG_LEVEL_HELP,
+        )
+        parser.add_argument(
+            "--max-file-size",
+            type=int,
+            default=Constants.DEFAULT_MAX_FILE_SIZE,
+            help=Messages.MAX_FILE_SIZE_HELP,
+        )
+        parser.add_argument(
+            "--enumerate",
+            choices=[Constants.WALK_ENUMERATION, Constants.TRACKED_ENUMERATION],
+            default=Constants.WALK_ENUMERATION,
+            help=Messages.ENUMERATE_HELP,
+        )
+        parser.add_argument(
+            "--inode-order", action="store_true", help=Messages.INODE_ORDER_HELP
+        )
+        parser.add_argument(
+            "--backend",
+            choices=[Constants.CHECKOUT_BACKEND, Constants.OBJECT_BACKEND],
+            default=Constants.CHECKOUT_BACKEND,
+            help=Messages.BACKEND_HELP,
+        )
+        args = parser.parse_args()
+
+        if args.workers < 1:
+            self.__logger.critical(Messages.INVALID_WORKERS)
+        self.__config_manager.set_config(Constants.WORKERS_KEY, args.workers)
+        self.__logger.info(Messages.WORKERS.format(workers=args.workers))
+
+        if args.git_workers < 1 or args.host_limit < 1:
+            self.__logger.critical(Messages.INVALID_GIT_WORKERS)
+        self.__config_manager.set_config(Constants.GIT_WORKERS_KEY, args.git_workers)
+        self.__config_manager.set_config(Constants.HOST_LIMIT_KEY, args.host_limit)
+        self.__logger.info(
+            Messages.GIT_WORKERS.format(
+                workers=args.git_workers, host_limit=args.host_limit
+            )
+        )
+
+        if args.prefetch < 0:
+            self.__logger.critical(Messages.INVALID_PREFETCH)
+        self.__config_manager.set_config(Constants.PREFETCH_KEY, args.prefetch)
+        self.__logger.info(Messages.PREFETCH.format(prefetch=args.prefetch))
+
+        if args.api_workers < 1:
+            self.__logger.critical(Messages.INVALID_API_WORKERS)
+        self.__config_manager.set_config(Constants.API_WORKERS_KEY, args.api_workers)
+        base_url = args.base_url.rstrip("/") + "/"
+        self.__config_manager.set_config(Constants.BASE_URL_KEY, base_url)
+        self.__logger.info(
+            Messages.API.format(workers=args.api_workers, base_url=base_url)
+        )
+
+        self.__config_manager.set_config(Constants.FULL_SEARCH_KEY, args.full_search)
+        self.__logger.info(
+            Messages.FULL_SEARCH_OPTION.format(full_search=args.full_search)
+        )
+
+        self.__config_manager.set_config(Constants.INDEX_KEY, args.index)
+        self.__config_manager.set_config(Constants.PACK_KEY, args.pack)
+        self.__logger.info(Messages.INDEX_PACK.format(index=args.index, pack=args.pack))
+
+        self.__config_manager.set_config(
+            Constants.WRITER_THREAD_KEY, args.writer_thread
+        )
+        self.__logger.info(
+            Messages.WRITER_THREAD.format(writer_thread=args.writer_thread)
+        )
+        self.__config_manager.set_config(Constants.SINKS_KEY, args.sink)
+        self.__logger.info(Messages.SINKS.format(sinks=args.sink))
+        self.__config_manager.set_config(Constants.COUNTS_ONLY_KEY, args.counts_only)
+        self.__logger.info(Messages.COUNTS_ONLY.format(counts_only=args.counts_only))
+        self.__config_manager.set_config(
+            Constants.FILE_LOG_LEVEL_KEY, args.file_log_level
+        )
+        self.__logger.set_file_level(Constants.FILE_LOG_LEVELS[args.file_log_level])
+        self.__logger.info(Messages.FILE_LOG_LEVEL.format(level=args.file_log_level))
+
+        if args.max_file_size < 0:
+            self.__logger.critical(Messages.INVALID_MAX_FILE_SIZE)
+        self.__config_manager.set_config(
+            Constants.MAX_FILE_SIZE_KEY, args.max_file_size
+        )
+        self.__logger.info(Messages.MAX_FILE_SIZE.format(size=args.max_file_size))
+
+        self.__config_manager.set_config(Constants.ENUMERATE_KEY, args.enumerate)
+        self.__config_manager.set_config(Constants.INODE_ORDER_KEY, args.inode_order)
+        self.__logger.info(
+            Messages.ENUMERATE.format(
+                enumerate=args.enumerate, inode_order=args.inode_order
+            )
+        )
+
+        self.__config_manager.set_config(Constants.BACKEND_KEY, args.backend)
+        self.__logger.info(Messages.BACKEND.format(backend=args.backend))
+
+        if args.depth < 0:
+            self.__logger.critical(Messages.INVALID_DEPTH)
+        if args.filter and not Constants.BLOB_FILTER.fullmatch(args.filter):
+            self.__logger.critical(Messages.INVALID_FILTER)
+        self.__config_manager.set_config(Constants.DEPTH_KEY, args.depth)
+        self.__config_manager.set_config(Constants.FILTER_KEY, args.filter)
+        self.__config_manager.set_config(Constants.SPARSE_KEY, args.sparse)
+        self.__logger.info(
+            Messages.CLONE_MODE.format(
+                depth=args.depth, filter=args.filter, sparse=args.sparse
+            )
+        )
+
     def __load_template(
         self,
     ) -> None:
@@ -156,6 +329,8 @@ class ConfigurationHandler:
             Messages.CUSTOM_PATTERN,
         ]
         choice = self.__get_choice_index(options)
+        # built-in patterns are literal matches, no regex needed
+        engine = Constants.LITERAL_ENGINE
         match choice:
             case 0:
                 pattern = Constants.NO_PATTERN.pattern
@@ -163,8 +338,11 @@ class ConfigurationHandler:
                 pattern = Constants.DB_TABLE_PATTERN.pattern
             case _:
                 pattern = self.__get_custom_regex_pattern()
+                engine = Constants.REGEX_ENGINE
         self.__config_manager.set_config(Constants.PATTERN_KEY, pattern)
+        self.__config_manager.set_config(Constants.ENGINE_KEY, engine)
         self.__logger.info(Messages.PATTERN.format(pattern=pattern))
+        self.__logger.info(Messages.ENGINE.format(engine=engine))
 
     def __get_choice_index(self, options: list) -> int:
         """gets user choice index from options"""
@@ -202,7 +380,10 @@ class ConfigurationHandler:
     def __get_connection_status(self) -> bool:
         """status of connection request to ADO"""
         try:
-            response = requests.get(Constants.BASE_URL, timeout=Constants.TIMEOUT)
+            response = requests.get(
+                self.__config_manager.get_str(Constants.BASE_URL_KEY),
+                timeout=Constants.TIMEOUT,
+            )
             offline = response.status_code != 200
         except requests.ConnectionError:
             offline = True
@@ -262,10 +443,11 @@ class ConfigurationHandler:
         if not lines:
             return {}
 
-        data = json.loads("".join(lines))
-        if Constants.LAST_UPDATE_KEY not in data:
+        try:
+            data = json.loads("".join(lines))
+        except json.decoder.JSONDecodeError:
             return {}
-        if time.time() - data[Constants.LAST_UPDATE_KEY] > Constants.SECONDS_IN_DAY:
+        if Constants.LAST_UPDATE_KEY not in data:
             return {}
 
         return data
@@ -282,63 +464,82 @@ class ConfigurationHandler:
             self.__logger.critical(Messages.PARSING_FAILED)
 
     def __create_repo_data(self) -> None:
-        """create json with repository and branch info from ADO"""
+        """create json with repository and branch info from ADO
+
+        no requests if the repo list and the branches of targeted repos were
+        fetched within the last day, otherwise one request for the repo list
+        and one per targeted repo whose branches weren't
+        """
         json_filename = Constants.REPO_DATA_FILE.filename()
-        data = self.__read_repo_data(json_filename)
-        if data:
+        cached = self.__read_repo_data(json_filename)
+        targeted = self.__targeted(cached) if cached else set()
+        if (
+            cached
+            and time.time() - cached[Constants.LAST_UPDATE_KEY]
+            <= Constants.SECONDS_IN_DAY
+            and all(
+                self.__branches_fresh(repo)
+                for repo in cached.get(Constants.VALUE_KEY, [])
+                # repos without a default branch have no branches to fetch
+                if repo.get(Constants.NAME_KEY) in targeted
+                and Constants.DEFAULT_BRANCH_KEY in repo
+            )
+        ):
             self.__logger.info(Messages.REPO_DATA_OK)
             return
         self.__logger.info(Messages.REPO_DATA_ISSUE)
         self.__logger.info(Messages.GETTING_REPO_DATA)
 
+        base = self.__config_manager.get_str(Constants.BASE_URL_KEY)
         org = self.__config_manager.get_str(Constants.ORG_KEY)
         project = self.__config_manager.get_str(Constants.PROJECT_KEY)
         auth = (
             "user",
             self.__config_manager.get_str(Constants.TOKEN_KEY),
         )
-        resp = self.__make_request(
-            Constants.REPOS_URL.format(org=org, project=project),
+        client = ADOClient(
+            self.__logger,
             auth,
-            Messages.REPOS_MAX_RETRIES,
+            self.__config_manager.get_int(Constants.API_WORKERS_KEY),
         )
-        assert resp is not None
-        data = resp.json()
-        if Constants.VALUE_KEY not in data:
-            self.__logger.critical(Messages.BAD_JSON)
-
-        self.__add_branch_info(data, auth, org, project)
+        try:
+            resp = client.get(
+                Constants.REPOS_URL.format(base=base, org=org, project=project)
+            )
+            if resp is None:
+                self.__logger.critical(Messages.REPOS_MAX_RETRIES)
+            assert resp is not None
+            data = resp.json()
+            if Constants.VALUE_KEY not in data:
+                self.__logger.critical(Messages.BAD_JSON)
+
+            self.__add_branch_info(data, cached, client, (base, org, project))
+        except requests.exceptions.HTTPError as e:
+            self.__logger.critical(f"{Messages.REQUEST_REJECTED} - {e}")
+        finally:
+            client.close()
 
         data[Constants.LAST_UPDATE_KEY] = time.time()
         self.__write_repo_data(data, json_filename)
 
-    def __make_request(
-        self, url, auth, error_msg
-    ) -> Optional[requests.models.Response]:
-        attempts = 0
-        resp = None
-
-        while attempts < Constants.RETRIES:
-            try:
-                resp = requests.get(url, auth=auth, timeout=Constants.TIMEOUT)
-                if resp.status_code == Constants.SUCCESS_CODE:
-                    return resp
-                attempts += 1
-                self.__logger.error(Messages.REQUEST_FAILED)
-
-            except (
-                requests.exceptions.ConnectionError,
-                requests.exceptions.ReadTimeout,
-            ) as e:
-                attempts += 1
-                self.__logger.error(f"{Messages.REQUEST_FAILED} - {e}")
-
-        self.__logger.critical(error_msg)
-        return resp
-
     def __add_branch_info(
-        self, data: dict, auth: tuple, org: str, project: str
+        self, data: dict, cached: dict, client: ADOClient, location: tuple
     ) -> None:
+        """branch info for repos, only refetched for targeted repos that changed
+        or were added, or whose branches were fetched over a day ago
+        """
+        cached_repos = {
+            repo[Constants.ID_KEY]: repo for repo in cached.get(Constants.VALUE_KEY, [])
+        }
+        deleted = len(
+            cached_repos.keys()
+            - {repo[Constants.ID_KEY] for repo in data[Constants.VALUE_KEY]}
+        )
+        if deleted:
+            self.__logger.info(Messages.REPOS_DELETED.format(count=deleted))
+
+        targeted = self.__targeted(data)
+        repos = []
         for pos, repo in enumerate(data[Constants.VALUE_KEY]):
             if Constants.DEFAULT_BRANCH_KEY not in repo:
                 self.__logger.error(
@@ -351,6 +552,21 @@ class ConfigurationHandler:
                 Constants.DEFAULT_BRANCH_KEY
             ].replace(Constants.BRANCH_PREFIX, "", 1)
 
+            old = cached_repos.get(repo[Constants.ID_KEY])
+            is_targeted = repo[Constants.NAME_KEY] in targeted
+            if old is not None and self.__branches_reusable(repo, old, is_targeted):
+                for key in (
+                    Constants.BRANCHES_KEY,
+                    Constants.BRANCH_OBJECTS_KEY,
+                    Constants.REPO_UPDATE_KEY,
+                ):
+                    repo[key] = old[key]
+                continue
+            if not is_targeted:
+                # fetched once a search targets the repo
+                repo[Constants.BRANCHES_KEY] = []
+                continue
+
             self.__logger.info(
                 Messages.GETTING_BRANCH_DATA.format(
                     repo=repo[Constants.NAME_KEY],
@@ -358,21 +574,92 @@ class ConfigurationHandler:
                     total=data[Constants.COUNT_KEY],
                 )
             )
+            repos.append(repo)
+
+        self.__logger.info(
+            Messages.REPOS_CHANGED.format(
+                changed=len(repos), total=len(data[Constants.VALUE_KEY])
+            )
+        )
+        self.__fetch_branch_info(repos, client, location)
+
+    def __targeted(self, data: dict) -> set[str]:
+        """names of listed repos the template and include and exclude files
+        target, whichever of their branches are searched
+        """
+        names = {
+            repo.get(Constants.NAME_KEY) for repo in data.get(Constants.VALUE_KEY, [])
+        }
+        targeted = set(
+            self.__config_manager.get_dict(Constants.INCLUDE_REPOS_FILE.config_key())
+        )
+        if self.__config_manager.get_str(Constants.TEMPLATE_KEY) in (
+            Messages.TEMPLATE_DEFAULT,
+            Messages.TEMPLATE_ALL,
+        ):
+            targeted = names
+        excluded = self.__config_manager.get_dict(
+            Constants.EXCLUDE_REPOS_FILE.config_key()
+        )
+        return {
+            name
+            for name in targeted & names
+            if not (
+                name in excluded
+                and (len(excluded[name]) == 0 or Constants.WILDCARD in excluded[name])
+            )
+        }
 
-            url = Constants.BRANCHES_URL.format(
-                org=org, project=project, id=repo[Constants.ID_KEY]
+    def __fetch_branch_info(
+        self, repos: list[dict], client: ADOClient, location: tuple
+    ) -> None:
+        base, org, project = location
+        # branch refs of all repos are requested concurrently
+        urls = [
+            Constants.BRANCHES_URL.format(
+                base=base, org=org, project=project, id=repo[Constants.ID_KEY]
             )
-            resp = self.__make_request(url, auth, Messages.BRANCH_MAX_RETRIES)
-            if not resp:
-                sys.exit()
+            for repo in repos
+        ]
+        for repo, resp in zip(repos, client.get_all(urls)):
+            if resp is None:
+                self.__logger.critical(Messages.BRANCH_MAX_RETRIES)
+            assert resp is not None
 
             branches_data = resp.json()
-            branches = [
-                branch[Constants.NAME_KEY].replace(Constants.BRANCH_PREFIX, "", 1)
+            object_ids = {
+                branch[Constants.NAME_KEY].replace(
+                    Constants.BRANCH_PREFIX, "", 1
+                ): branch.get(Constants.OBJECT_ID_KEY, "")
                 for branch in branches_data[Constants.VALUE_KEY]
-            ]
+            }
+            branches = list(object_ids)
             assert repo[Constants.DEFAULT_BRANCH_KEY] in branches
-            data[Constants.VALUE_KEY][pos][Constants.BRANCHES_KEY] = branches
+            repo[Constants.BRANCHES_KEY] = branches
+            repo[Constants.BRANCH_OBJECTS_KEY] = object_ids
+            repo[Constants.REPO_UPDATE_KEY] = time.time()
+
+    @staticmethod
+    def __branches_fresh(repo: dict) -> bool:
+        """whether branches of repo were fetched within the last day"""
+        return (
+            time.time() - repo.get(Constants.REPO_UPDATE_KEY, Constants.DEFAULT_TIME)
+            <= Constants.SECONDS_IN_DAY
+        )
+
+    @staticmethod
+    def __branches_reusable(repo: dict, old: dict, targeted: bool) -> bool:
+        """whether branches fetched before can be kept, refetched within a day
+        for targeted repos, only once targeted for others
+        """
+        if Constants.REPO_UPDATE_KEY not in old:
+            return False
+        if targeted and not ConfigurationHandler.__branches_fresh(old):
+            return False
+        return all(
+            key in repo and repo[key] == old.get(key)
+            for key in (Constants.NAME_KEY, Constants.DEFAULT_BRANCH_KEY)
+        )
 
     def __load_search_words(self) -> None:
         """words to be used in repo search"""
@@ -383,7 +670,7 @@ class ConfigurationHandler:
         self.__config_manager.set_config(words_file.config_key(), words)
 
     def __load_branch_timestamps(self) -> None:
-        """last updated timestamps for branches"""
+        """last updated timestamps and synced commits for branches"""
         branch_updates_file = Constants.BRANCH_UPDATES_FILE
         lines = self.__read_file(branch_updates_file.filename())
         data = {}
@@ -392,6 +679,12 @@ class ConfigurationHandler:
                 data = json.loads("".join(lines))
             except json.decoder.JSONDecodeError:
                 self.__logger.error(Messages.PARSING_FAILED.format())
+
+        # older files only store timestamps
+        for branches in data.values():
+            for branch, branch_update in branches.items():
+                if not isinstance(branch_update, dict):
+                    branches[branch] = {Constants.LAST_UPDATE_KEY: branch_update}
         self.__config_manager.set_config(branch_updates_file.config_key(), data)
 
     def __load_excluded_files(self) -> None:
@@ -406,6 +699,12 @@ class ConfigurationHandler:
         files = self.__read_file(exclude_folders_file.filename(), lowercase=True)
         self.__config_manager.set_config(exclude_folders_file.config_key(), files)
 
+    def __load_included_files(self) -> None:
+        """only files searched if any, gitignore style patterns"""
+        include_files_file = Constants.INCLUDE_FILES_FILE
+        files = self.__read_file(include_files_file.filename(), lowercase=True)
+        self.__config_manager.set_config(include_files_file.config_key(), files)
+
     def __load_repos(self, repos_file: ConfigurationFile) -> None:
         lines = self.__read_file(repos_file.filename())
         repos = {}
@@ -552,6 +851,24 @@ class ConfigurationHandler:
             Constants.TARGET_REPOS_KEY
         )
 
+        backend = self.__config_manager.get_str(Constants.BACKEND_KEY)
+        depth = self.__config_manager.get_int(Constants.DEPTH_KEY)
+        blob_filter = self.__config_manager.get_str(Constants.FILTER_KEY)
+        sparse = None
+        if self.__config_manager.get_bool(Constants.SPARSE_KEY):
+            # only content the search reads is checked out
+            sparse = sparse_patterns(
+                self.__config_manager.get_list(
+                    Constants.EXCLUDE_FOLDERS_FILE.config_key()
+                ),
+                self.__config_manager.get_list(
+                    Constants.EXCLUDE_FILES_FILE.config_key()
+                ),
+                self.__config_manager.get_list(
+                    Constants.INCLUDE_FILES_FILE.config_key()
+                ),
+            )
+
         repos: list[ADORepository] = []
         for repo, branches in target_repos.items():
             if offline:
@@ -561,6 +878,7 @@ class ConfigurationHandler:
                         repo,
                         branches,
                         os.path.join(Constants.REPOS_FOLDER, repo),
+                        backend=backend,
                     )
                 )
                 continue
@@ -580,6 +898,10 @@ class ConfigurationHandler:
                     branches,
                     os.path.join(Constants.REPOS_FOLDER, repo),
                     url,
+                    backend,
+                    depth,
+                    blob_filter,
+                    sparse,
                 )
             )
 
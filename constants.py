@@ -1,5 +1,12 @@
 """contains ConfigurationFile, BranchSearchResults, Constants, Messages classes"""
 
+import logging
+import os
+import re
+import sys
+from array import array
+from typing import Iterable, Iterator, Optional
+
 
 # pylint: disable=too-few-public-methods
 class ConfigurationFile:
@@ -28,17 +35,134 @@ class RegexSearchPattern:
         return f"{self.name} - {self.pattern}"
 
 
+class PathList:
+    """represents list of paths, kept as parent folder index and interned name
+    or only counted
+    """
+
+    __slots__ = ("__parents", "__parent_paths", "__parent_idxs", "__names", "__count")
+
+    def __init__(self, counts_only: bool = False) -> None:
+        self.__parents: dict[str, int] = {}
+        self.__parent_paths: list[str] = []
+        self.__parent_idxs = array("I")
+        self.__names: Optional[list[str]] = None if counts_only else []
+        self.__count = 0
+
+    def append(self, path: str) -> None:
+        """adds path, joined back together when iterated"""
+        self.__count += 1
+        if self.__names is None:
+            return
+        # paths ending in a separator keep it as an empty name
+        parent, name = os.path.split(path)
+        idx = self.__parents.get(parent)
+        if idx is None:
+            idx = self.__parents[parent] = len(self.__parent_paths)
+            self.__parent_paths.append(parent)
+        self.__parent_idxs.append(idx)
+        self.__names.append(sys.intern(name))
+
+    def extend(self, paths: Iterable[str]) -> None:
+        """adds paths"""
+        for path in paths:
+            self.append(path)
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self) -> Iterator[str]:
+        """paths in order added, none if only counted"""
+        for idx, name in zip(self.__parent_idxs, self.__names or []):
+            yield os.path.join(self.__parent_paths[idx], name)
+
+
+class MatchTable:
+    """represents matches of branch files, line numbers per word with the
+    preview of each line stored once per file
+    """
+
+    __slots__ = ("__files", "count")
+
+    def __init__(self) -> None:
+        self.__files: dict[str, tuple[dict[str, array], dict[int, str]]] = {}
+        self.count = 0
+
+    def add(self, path: str, matches: dict[str, list[tuple[int, str]]]) -> None:
+        """adds line numbers and previews of file matches"""
+        words = {}
+        previews: dict[int, str] = {}
+        for word, lines in matches.items():
+            numbers = array("I")
+            for number, preview in lines:
+                numbers.append(number)
+                previews.setdefault(number, preview)
+            words[sys.intern(word)] = numbers
+            self.count += len(numbers)
+        self.__files[path] = (words, previews)
+
+    def records(self) -> Iterator[tuple[str, str, int, str]]:
+        """path, word, line number and preview of each match"""
+        for path, (words, previews) in self.__files.items():
+            for word, numbers in words.items():
+                for number in numbers:
+                    yield (path, word, number, previews[number])
+
+    def items(self) -> Iterator[tuple[str, dict[str, list[tuple[int, str]]]]]:
+        """paths with line numbers and previews of matches, as added"""
+        for path, (words, previews) in self.__files.items():
+            yield (
+                path,
+                {
+                    word: [(number, previews[number]) for number in numbers]
+                    for word, numbers in words.items()
+                },
+            )
+
+    def __len__(self) -> int:
+        return len(self.__files)
+
+
 # pylint: disable=too-few-public-methods
 class BranchSearchResults:
-    """represents results of branch search"""
+    """represents results of branch search, searched and skipped folders and
+    files only counted if chosen
+    """
 
-    def __init__(self) -> None:
-        self.matches = {}
-        self.errors = []
-        self.skipped_folders = []
-        self.skipped_files = []
-        self.folders = []
-        self.files = []
+    __slots__ = (
+        "matches",
+        "errors",
+        "skipped_folders",
+        "skipped_files",
+        "rejected_files",
+        "folders",
+        "files",
+    )
+
+    def __init__(self, counts_only: bool = False) -> None:
+        self.matches = MatchTable()
+        self.errors = PathList()
+        self.skipped_folders = PathList(counts_only)
+        self.skipped_files = PathList(counts_only)
+        self.rejected_files = PathList(counts_only)
+        self.folders = PathList(counts_only)
+        self.files = PathList(counts_only)
+
+
+# pylint: disable=too-few-public-methods
+class FileSearchResults:
+    """represents results of file search"""
+
+    __slots__ = ("path", "decoded", "error", "rejected", "matches")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.decoded = False
+        self.error = ""
+        # reason contents weren't searched
+        self.rejected = ""
+        # line number and preview of each match
+        self.matches: dict[str, list[tuple[int, str]]] = {}
 
 
 # pylint: disable=missing-class-docstring
@@ -50,6 +174,7 @@ class Constants:
     CONFIG_COMMENT_PREFIX = "#"
     COMMENT_PREFIXES = ("#", "//")
     WILDCARD = "*"
+    REGEX_METACHARACTERS = ".^$*+?{}[]\\|()"
     # ENCODED_SPACE = "%20"
 
     # search patterns
@@ -57,28 +182,87 @@ class Constants:
     DB_TABLE_PATTERN = RegexSearchPattern(
         "database table pattern", "(?<![a-z0-9_]){word}(?![a-z0-9_])"
     )
+    WORD_SENTINEL = "\0"
+    WORD_CHARACTERS = "abcdefghijklmnopqrstuvwxyz0123456789_"
+    NOT_BUFFER_SAFE = re.compile(rb"[\x80-\xff]|\r(?!\n)")
+
+    # search engines
+    LITERAL_ENGINE = "literal"
+    REGEX_ENGINE = "regex"
+    WORD_GROUP_PREFIX = "_word"
+
+    # result sinks
+    JSONL_SINK = "jsonl"
+    JSONL_GZIP_SINK = "jsonl.gz"
+    SQLITE_SINK = "sqlite"
+    RESULTS_DB_INDEXES = (
+        ("matches", "repo"),
+        ("matches", "branch"),
+        ("matches", "word"),
+        ("matches", "path"),
+        ("files", "repo"),
+        ("files", "branch"),
+        ("files", "path"),
+    )
+
+    # repo backends
+    CHECKOUT_BACKEND = "checkout"
+    OBJECT_BACKEND = "object"
 
     # numbers
     DEFAULT_TIME = -1
     SECONDS_IN_DAY = 86400
     TIMEOUT = 5
     RETRIES = 5
+    BACKOFF_BASE = 1
+    BACKOFF_MAX = 30
     SUCCESS_CODE = 200
+    THROTTLED_CODES = (429, 503)
+    SERVER_ERROR = 500
+    RETRY_AFTER_MAX = 300
     JSON_INDENT = 4
     MAX_PREVIEW_LENGTH = 5000
+    MMAP_THRESHOLD = 1 << 20
+    READ_CHUNK_SIZE = 1 << 20
+    SNIFF_SIZE = 8000
+    # longer lines are searched in overlapping segments
+    LINE_SEGMENT_SIZE = 1 << 20
+    LINE_SEGMENT_OVERLAP = 1 << 16
+    BYTES_IN_MB = 1 << 20
+    DEFAULT_MAX_FILE_SIZE = 64
+    WRITE_BUFFER_SIZE = 1 << 16
+    WRITER_QUEUE_SIZE = 256
+    BATCH_SIZE = 64
+    BATCHES_PER_WORKER = 2
+    BLOB_BATCH_SIZE = 1000
 
     # folders
     CONFIG_FOLDER = "config"
     REPOS_FOLDER = "repos"
+    STATE_FOLDER = "state"
+    OBJECT_STORE = ".bare"
+    SHARED_STORE = ".shared"
+    GIT_FOLDER = ".git"
     RESULTS_FOLDER = "results"
 
     # files
     ADO_CONFIG_FILE = "ado.toml"
     LOG_FILE = "program.log"
+    FILE_LOGGER = "files"
+    # files, decoding at debug, matches at info, errors at error
+    FILE_LOG_LEVELS = {
+        "debug": logging.DEBUG,
+        "info": logging.INFO,
+        "error": logging.ERROR,
+        "none": logging.CRITICAL + 1,
+    }
     CONFIG_FILE = "config.txt"
     DETAILS_FILE = "details.txt"
     MATCHES_FILE = "matches.txt"
     FOUND_FILE = "found.txt"
+    JSONL_FILE = "results.jsonl"
+    GZIP_EXTENSION = ".gz"
+    RESULTS_DB_FILE = "results.db"
 
     # ConfigFile objects
     REPO_DATA_FILE = ConfigurationFile("repo_data.json")
@@ -86,12 +270,36 @@ class Constants:
     BRANCH_UPDATES_FILE = ConfigurationFile("branch_updates.json")
     EXCLUDE_FILES_FILE = ConfigurationFile("exclude_files.txt")
     EXCLUDE_FOLDERS_FILE = ConfigurationFile("exclude_folders.txt")
+    INCLUDE_FILES_FILE = ConfigurationFile("include_files.txt")
     INCLUDE_REPOS_FILE = ConfigurationFile("include_repos.txt")
     EXCLUDE_REPOS_FILE = ConfigurationFile("exclude_repos.txt")
 
     # config keys
     TEMPLATE_KEY = "template"
     PATTERN_KEY = "pattern"
+    ENGINE_KEY = "engine"
+    WORKERS_KEY = "workers"
+    GIT_WORKERS_KEY = "git_workers"
+    HOST_LIMIT_KEY = "host_limit"
+    PREFETCH_KEY = "prefetch"
+    API_WORKERS_KEY = "api_workers"
+    FULL_SEARCH_KEY = "full_search"
+    BACKEND_KEY = "backend"
+    DEPTH_KEY = "depth"
+    FILTER_KEY = "filter"
+    SPARSE_KEY = "sparse"
+    INDEX_KEY = "index"
+    PACK_KEY = "pack"
+    WRITER_THREAD_KEY = "writer_thread"
+    SINKS_KEY = "sinks"
+    COUNTS_ONLY_KEY = "counts_only"
+    FILE_LOG_LEVEL_KEY = "file_log_level"
+    MAX_FILE_SIZE_KEY = "max_file_size"
+    ENUMERATE_KEY = "enumerate"
+    INODE_ORDER_KEY = "inode_order"
+    WALK_ENUMERATION = "walk"
+    TRACKED_ENUMERATION = "tracked"
+    BASE_URL_KEY = "base_url"
     OFFLINE_KEY = "offline"
     TOKEN_KEY = "token"
     ORG_KEY = "organization"
@@ -108,14 +316,87 @@ class Constants:
     COUNT_KEY = "count"
     ID_KEY = "id"
     REMOTE_URL_KEY = "remoteUrl"
+    SIZE_KEY = "size"
+    OBJECT_ID_KEY = "objectId"
+    BRANCH_OBJECTS_KEY = "branchObjectIds"
+    REPO_UPDATE_KEY = "lastRefUpdate"
+
+    # branch updates keys
+    COMMIT_KEY = "commit"
+
+    # search state keys
+    STATE_VERSION = 4
+    STATE_VERSION_KEY = "version"
+    WORDS_HASH_KEY = "wordsHash"
+    EXCLUDES_HASH_KEY = "excludesHash"
+    DECODED_KEY = "decoded"
+    MATCH_CACHE_FILE = "matches.db"
+    CLASSES_FILE = "classes.db"
+    TEXT_CONTENT = "text"
+    BINARY_CONTENT = "binary"
+    ENCODED_CONTENT = "encoded"
+    # UTF-32 little endian starts like UTF-16 little endian
+    WIDE_BOMS = (b"\xff\xfe", b"\xfe\xff", b"\x00\x00\xfe\xff")
+    REGULAR_FILE_MODES = ("100644", "100755")
+    SYMLINK_MODE = "120000"
+    SUBMODULE_MODE = "160000"
+    BLOB_TYPE = "blob"
+    SQL_BATCH_SIZE = 500
+    INDEX_FOLDER = "index"
+    INDEX_EXTENSION = ".db"
+    INDEX_BATCH_SIZE = 1000
+    INDEX_MAX_CHUNKS = 8
+    CONTENT_STAT_KEY = "stat:{path}:{size}:{mtime}:{ctime}"
+    CONTENT_BLOB_KEY = "blob:{sha}"
+    PACK_FOLDER = "packs"
+    PACK_EXTENSION = ".pack"
+    PACK_INDEX_EXTENSION = ".json"
+    TEMP_EXTENSION = ".tmp"
+    PACK_VERSION = 1
+    PACK_MAX_GARBAGE = 2
+    BLOBS_KEY = "blobs"
+    FOLDERS_KEY = "folders"
+    SKIPPED_FOLDERS_KEY = "skippedFolders"
+    SKIPPED_FILES_KEY = "skippedFiles"
+    FILES_KEY = "files"
+    ERROR_KEY = "error"
+    REJECTED_KEY = "rejected"
+    MATCHES_KEY = "matches"
+
+    # result record keys
+    TYPE_KEY = "type"
+    REPO_KEY = "repo"
+    BRANCH_KEY = "branch"
+    PATH_KEY = "path"
+    WORD_KEY = "word"
+    LINE_KEY = "line"
+    TEXT_KEY = "text"
+    STATUS_KEY = "status"
+    REASON_KEY = "reason"
+    MATCH_RECORD = "match"
+    FILE_RECORD = "file"
+    SKIP_RECORD = "skip"
+    ERROR_STATUS = "error"
+    SKIPPED_FOLDER_STATUS = "skipped folder"
+    SKIPPED_FILE_STATUS = "skipped file"
+    REJECTED_FILE_STATUS = "rejected file"
+    FOLDER_STATUS = "folder"
+    SEARCHED_STATUS = "searched"
 
     # ADO - learn.microsoft.com/en-us/rest/api/azure/devops/git/?view=azure-devops-rest-7.0
     BASE_URL = "https://dev.azure.com/"
     __API_PREFIX = "{org}/{project}/_apis/git/repositories"
     __API_POSTFIX = "api-version=7.0"
-    REPOS_URL = BASE_URL + __API_PREFIX + "?" + __API_POSTFIX
-    BRANCHES_URL = BASE_URL + __API_PREFIX + "/{id}/refs?filter=heads/&" + __API_POSTFIX
+    REPOS_URL = "{base}" + __API_PREFIX + "?" + __API_POSTFIX
+    BRANCHES_URL = "{base}" + __API_PREFIX + "/{id}/refs?filter=heads/&" + __API_POSTFIX
     BRANCH_PREFIX = "refs/heads/"
+    REMOTE = "origin"
+    REMOTE_PREFIX = "refs/remotes/origin/"
+    GLOB_SPECIAL = "*?[]\\!# "
+    GLOB_CHARACTERS = "*?[\\"
+    NOOP_NEGOTIATION = "fetch.negotiationAlgorithm=noop"
+    BLOB_FILTER = re.compile(r"blob:none|blob:limit=\d+[kmg]?")
+    RETRY_AFTER_HEADER = "Retry-After"
     REPO_URL = "https://{token}@dev.azure.com/{org}/{project}/_git/{name}"
 
 
@@ -126,6 +407,58 @@ class Messages:
     CONFIG_ITEM_NOT_FOUND = "config item doesn't exist (key-{key}, type-{type})"
 
     ## config handler
+    # load arguments
+    DESCRIPTION = "search Azure DevOps repositories for words"
+    WORKERS_HELP = "number of processes used to search files (default: 1)"
+    INVALID_WORKERS = "workers must be at least 1"
+    WORKERS = "search workers - {workers}"
+    GIT_WORKERS_HELP = "number of branches updated at once (default: 1)"
+    HOST_LIMIT_HELP = "max branches updated at once per host (default: 4)"
+    INVALID_GIT_WORKERS = "git workers and host limit must be at least 1"
+    GIT_WORKERS = "git workers - {workers}, per host - {host_limit}"
+    PREFETCH_HELP = "branches updated ahead of the search (default: git workers)"
+    INVALID_PREFETCH = "prefetch must not be negative"
+    PREFETCH = "prefetch - {prefetch}"
+    API_WORKERS_HELP = "max concurrent ADO REST requests (default: 8)"
+    BASE_URL_HELP = "ADO REST base url (default: https://dev.azure.com/)"
+    INVALID_API_WORKERS = "api workers must be at least 1"
+    API = "api workers - {workers}, base url - {base_url}"
+    FULL_SEARCH_HELP = "search every file, ignoring results of previous runs"
+    FULL_SEARCH_OPTION = "full search - {full_search}"
+    BACKEND_HELP = (
+        "checkout - working tree per branch, "
+        "object - one bare clone per repo, files read from git objects"
+    )
+    BACKEND = "repo backend - {backend}"
+    DEPTH_HELP = "commits of history fetched per branch, 0 for all (default: 0)"
+    FILTER_HELP = "partial clone filter, blob:none or blob:limit=<size> (default: none)"
+    SPARSE_HELP = "leave excluded folders and files out of branch checkouts"
+    INVALID_DEPTH = "depth must not be negative"
+    INVALID_FILTER = "filter must be blob:none or blob:limit=<size>"
+    CLONE_MODE = "depth - {depth}, filter - {filter}, sparse - {sparse}"
+    INDEX_HELP = "keep a trigram index of file contents to skip files without words"
+    PACK_HELP = "read checkout files from one packed content file per branch"
+    INDEX_PACK = "trigram index - {index}, packed checkouts - {pack}"
+    WRITER_THREAD_HELP = "write results files on a background thread"
+    WRITER_THREAD = "background writer - {writer_thread}"
+    SINK_HELP = "also write results as JSON lines (optionally gzipped) or SQLite"
+    SINKS = "results sinks - {sinks}"
+    COUNTS_ONLY_HELP = "only count searched and skipped folders and files"
+    COUNTS_ONLY = "counts only - {counts_only}"
+    FILE_LOG_LEVEL_HELP = (
+        "level of per file log records - debug (files), info (matches), "
+        "error (file errors) or none"
+    )
+    FILE_LOG_LEVEL = "per file log level - {level}"
+    MAX_FILE_SIZE_HELP = "size in MB above which files aren't searched, 0 for none"
+    MAX_FILE_SIZE = "max file size - {size} MB"
+    INVALID_MAX_FILE_SIZE = "max file size must be at least 0"
+    ENUMERATE_HELP = (
+        "how checkout files are listed - walk (all files) or tracked (files in "
+        "the git index, walking folders that aren't checkouts)"
+    )
+    INODE_ORDER_HELP = "search checkout files in inode order, for cold disk caches"
+    ENUMERATE = "file enumeration - {enumerate}, inode order - {inode_order}"
     # load template
     SELECT_REPO_TEMPLATE = "select a repo search template for initialization"
     SELECT_BRANCH_TEMPLATE = "select a branch search template for initialization"
@@ -148,6 +481,7 @@ class Messages:
     ENTER_REGEX_PATTERN = "enter a regex pattern containing {word}"
     ENTER_VALID_PATTERN = "enter a valid pattern: "
     PATTERN = "regex pattern - {pattern}"
+    ENGINE = "search engine - {engine}"
     # get connection status
     CONNECTION_FAILED = "connection failed"
     CONNECTION_STATUS = "offline - {offline}"
@@ -168,10 +502,14 @@ class Messages:
     BAD_JSON = "badly formed json response"
     # make request
     REQUEST_FAILED = "request failed, trying again"
+    REQUEST_STATUS = "request failed with status {code}, trying again"
+    REQUEST_REJECTED = "request rejected"
     # add branch info
     NO_DEFAULT = "{repo} has no default branch - most likely empty"
     GETTING_BRANCH_DATA = "getting branch data for {repo} ({pos}/{total})"
     BRANCH_MAX_RETRIES = "max retries requesting branch data, skipping"
+    REPOS_CHANGED = "{changed}/{total} targeted repos changed, added or stale"
+    REPOS_DELETED = "{count} repos deleted"
     # write repo data
     PARSING_FAILED = "error parsing repo data"
     # load search words
@@ -208,14 +546,25 @@ class Messages:
     STR = "{repo} - {branches}, {path}"
     PATH_EXISTS = "branch path exists"
     PATH_DOESNT_EXIST = "branch path does not exist"
-    INTERVAL = 1
-    RETRYING = f"trying again in {INTERVAL}s"
+    RETRYING = "trying again in {delay:.1f}s"
     GIT_MAX_RETRIES = "max retries for {mode}"
     GIT_SUCCESS = "{mode} success"
     GIT_FAILURE = "{mode} failed - {err}"
-    PULL = "pull"
-    CLONE = "clone"
+    RESET = "reset"
+    WORKTREE = "worktree add"
+    FETCH = "fetch"
+    SEED = "seed"
+    SEEDING_STORE = "copying objects of {path} to shared clone"
+    REPLACING_BRANCH = "replacing branch folder with worktree"
     URL_NOT_SPECIFIED = "repo url not specified"
+    LS_REMOTE_FAILED = "listing remote branches failed - {err}"
+    DIFF_FAILED = "listing changed files failed - {err}"
+    LS_FILES_FAILED = "listing tracked files failed - {err}"
+    LS_TREE_FAILED = "listing tree failed - {err}"
+    STATUS_FAILED = "listing local changes failed - {err}"
+
+    ## scheduler
+    UPDATING = "updating {branch} of {repo}"
 
     ## searcher
     SEARCHING = "starting search"
@@ -224,21 +573,50 @@ class Messages:
     UPDATE_NEEDED = "update required"
     UPDATE_FAILED = "update failed"
     UP_TO_DATE = "updated less than 1 day ago"
+    REMOTE_CHANGED = "remote head changed since last update"
+    REMOTE_UNCHANGED = "remote head unchanged since last update"
     NO_LOCAL = "branch files not locally available"
     NO_SEARCH = "no search words"
     BAD_PATH = "path does not exist"
-    FILE = "file - {path}"
+    # per file records, %-style so formatted only if logged
+    FILE = "file - %s"
     LINE_TOO_LONG = "LINE TOO LONG - look at file"
     LINE = "line {idx} - {line}"
-    MATCH = "match - {word} - {line}"
+    MATCH = "match - %s - line %d - %s"
     PATH_TOO_LONG = "file not found - path too long? - {path}"
-    DECODING_SUCCESS = "decoding success - {path}"
+    READ_FAILED = "file not read - {path}"
+    DECODING_SUCCESS = "decoding success - %s"
     DECODING_FAILED = "decoding failure - {path}"
+    FILE_REJECTED = "file not searched - %s - %s"
+    BINARY_CONTENT = "binary content"
+    ENCODED_CONTENT = "UTF-16/32 encoded content"
+    CONTENT_TOO_LARGE = "larger than max file size - {size} bytes"
+    CLASSIFIER_FAILED = "content classifier unavailable - {err}"
+    FULL_SEARCH = "no usable previous search of branch"
+    INCREMENTAL_SEARCH = "reusing results of {count} files unchanged since {commit}"
+    CACHED_SEARCH = "{count} files have previously searched content"
+    PARTIAL_SEARCH = "{count} files only searched for words added since"
+
+    ## search state, match cache
+    STATE_PARSING_FAILED = "parsing search state failed - {path}"
+    MATCH_CACHE_FAILED = "match cache unavailable - {err}"
+
+    ## trigram index
+    INDEX_FAILED = "trigram index unavailable - {err}"
+    INDEX_UPDATED = "indexed {added} new files, {total} files in index"
+    INDEX_COMPACTING = "compacting trigram index"
+    INDEX_RULED_OUT = "{count} files can't contain search words"
+
+    ## branch packs
+    PACK_FAILED = "branch pack unavailable - {err}"
+    PACKING = "packing branch checkout"
+    COMPACTING_PACK = "compacting branch pack - {path}"
 
     ## writer
     MATCHES = "Matches"
     ERRORS = "Errors"
     SKIPPED_FOLDERS = "Skipped folders"
     SKIPPED_FILES = "Skipped files"
+    REJECTED_FILES = "Rejected files"
     SEARCHED_FOLDERS = "Searched folders"
     SEARCHED_FILES = "Searched files"
@@ -0,0 +1,292 @@
+"""contains TrigramIndex class"""
+
+import codecs
+import itertools
+import os
+import sqlite3
+import zlib
+from typing import Callable, Iterable, Optional
+from logger import LoggingManager
+from constants import Constants, Messages
+
+
+class TrigramIndex:
+    """used to find files that can contain words without reading them
+
+    one database per repo, content indexed once for all branches, posting
+    lists of trigram -> content ids stored as compressed chunks
+    """
+
+    def __init__(self, logger: LoggingManager, repo: str) -> None:
+        self.__logger = logger
+        self.__conn: Optional[sqlite3.Connection] = None
+        # content id of branch files keyed by path, set by update
+        self.__files: dict[str, int] = {}
+        try:
+            folder = os.path.join(Constants.STATE_FOLDER, Constants.INDEX_FOLDER)
+            os.makedirs(folder, exist_ok=True)
+            self.__conn = sqlite3.connect(
+                os.path.join(folder, repo + Constants.INDEX_EXTENSION)
+            )
+            with self.__conn:
+                self.__conn.execute(
+                    "CREATE TABLE IF NOT EXISTS docs "
+                    "(id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE)"
+                )
+                self.__conn.execute(
+                    "CREATE TABLE IF NOT EXISTS files (branch TEXT, path TEXT, "
+                    "doc INTEGER, PRIMARY KEY (branch, path))"
+                )
+                self.__conn.execute(
+                    "CREATE TABLE IF NOT EXISTS postings (trigram TEXT, ids BLOB)"
+                )
+                self.__conn.execute(
+                    "CREATE INDEX IF NOT EXISTS postings_trigram ON postings (trigram)"
+                )
+        except (OSError, sqlite3.Error) as err:
+            self.__logger.error(Messages.INDEX_FAILED.format(err=err))
+            self.__conn = None
+
+    def update(
+        self,
+        branch: str,
+        files: dict[str, str],
+        read: Callable[[str], Optional[Iterable[bytes]]],
+    ) -> bool:
+        """indexes branch files, keyed by path relative to branch with content
+        keys as values, reading only content not indexed before in chunks
+
+        files read returns None for, or that can't be read, are left out,
+        returns False if index is unavailable
+        """
+        if self.__conn is None:
+            return False
+        try:
+            with self.__conn:
+                docs = self.__doc_ids(set(files.values()))
+                new: dict[str, list[int]] = {}
+                added = 0
+                for path, key in files.items():
+                    if key in docs:
+                        continue
+                    try:
+                        chunks = read(path)
+                        if chunks is None:
+                            continue
+                        content_trigrams = trigrams(chunks)
+                    except OSError:
+                        continue
+                    doc = self.__conn.execute(
+                        "INSERT INTO docs (key) VALUES (?)", (key,)
+                    ).lastrowid
+                    assert doc is not None
+                    docs[key] = doc
+                    for trigram in content_trigrams:
+                        new.setdefault(trigram, []).append(doc)
+                    added += 1
+                    if added % Constants.INDEX_BATCH_SIZE == 0:
+                        self.__add_postings(new)
+                        new = {}
+                self.__add_postings(new)
+
+                self.__files = {
+                    path: docs[key] for path, key in files.items() if key in docs
+                }
+                self.__store_files(branch)
+            self.__logger.info(
+                Messages.INDEX_UPDATED.format(added=added, total=len(self.__files))
+            )
+            self.__compact()
+            return True
+        except sqlite3.Error as err:
+            self.__logger.error(Messages.INDEX_FAILED.format(err=err))
+            self.__files = {}
+            return False
+
+    def unindexed(self, files: dict[str, str]) -> set[str]:
+        """paths of files with content keys not indexed yet"""
+        if self.__conn is None:
+            return set()
+        try:
+            docs = self.__doc_ids(set(files.values()))
+        except sqlite3.Error as err:
+            self.__logger.error(Messages.INDEX_FAILED.format(err=err))
+            return set()
+        return {path for path, key in files.items() if key not in docs}
+
+    def ruled_out(self, words: list[str]) -> Optional[set[str]]:
+        """paths of indexed branch files that can't contain any word
+
+        None if some word can't be narrowed down by trigrams
+        """
+        if self.__conn is None:
+            return None
+        docs: set[int] = set()
+        try:
+            for word in words:
+                word_trigrams = required_trigrams(word)
+                if not word_trigrams:
+                    return None
+                docs |= self.__docs_with_all(word_trigrams)
+        except sqlite3.Error as err:
+            self.__logger.error(Messages.INDEX_FAILED.format(err=err))
+            return None
+        return {path for path, doc in self.__files.items() if doc not in docs}
+
+    def close(self) -> None:
+        """closes database connection"""
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+
+    def __doc_ids(self, keys: set[str]) -> dict[str, int]:
+        assert self.__conn is not None
+        ids = {}
+        unique = list(keys)
+        for start in range(0, len(unique), Constants.SQL_BATCH_SIZE):
+            chunk = unique[start : start + Constants.SQL_BATCH_SIZE]
+            rows = self.__conn.execute(
+                f"SELECT key, id FROM docs WHERE key IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            ids.update(rows)
+        return ids
+
+    def __add_postings(self, new: dict[str, list[int]]) -> None:
+        """appends chunk per trigram, new ids are higher than stored ones"""
+        assert self.__conn is not None
+        self.__conn.executemany(
+            "INSERT INTO postings VALUES (?, ?)",
+            ((trigram, encode_ids(ids)) for trigram, ids in new.items()),
+        )
+
+    def __store_files(self, branch: str) -> None:
+        """replaces stored branch files, only writing changed paths"""
+        assert self.__conn is not None
+        stored = dict(
+            self.__conn.execute(
+                "SELECT path, doc FROM files WHERE branch = ?", (branch,)
+            )
+        )
+        self.__conn.executemany(
+            "DELETE FROM files WHERE branch = ? AND path = ?",
+            ((branch, path) for path in stored if path not in self.__files),
+        )
+        self.__conn.executemany(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+            (
+                (branch, path, doc)
+                for path, doc in self.__files.items()
+                if stored.get(path) != doc
+            ),
+        )
+
+    def __docs_with_all(self, word_trigrams: set[str]) -> set[int]:
+        assert self.__conn is not None
+        postings: dict[str, set[int]] = {trigram: set() for trigram in word_trigrams}
+        rows = self.__conn.execute(
+            "SELECT trigram, ids FROM postings "
+            f"WHERE trigram IN ({', '.join('?' * len(postings))})",
+            list(postings),
+        )
+        for trigram, ids in rows:
+            postings[trigram].update(decode_ids(ids))
+        # rarest trigram first keeps intersections small
+        ordered = sorted(postings.values(), key=len)
+        return ordered[0].intersection(*ordered[1:])
+
+    def __compact(self) -> None:
+        """merges posting chunks and drops content no branch uses anymore,
+        once either makes up most of the index
+        """
+        assert self.__conn is not None
+        chunks, trigram_count = self.__conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT trigram) FROM postings"
+        ).fetchone()
+        doc_count, live_count = self.__conn.execute(
+            "SELECT (SELECT COUNT(*) FROM docs), "
+            "(SELECT COUNT(DISTINCT doc) FROM files)"
+        ).fetchone()
+        if (
+            chunks <= Constants.INDEX_MAX_CHUNKS * trigram_count
+            and doc_count <= 2 * live_count
+        ):
+            return
+
+        self.__logger.info(Messages.INDEX_COMPACTING)
+        with self.__conn:
+            self.__conn.execute(
+                "DELETE FROM docs WHERE id NOT IN (SELECT doc FROM files)"
+            )
+            live = {doc for (doc,) in self.__conn.execute("SELECT id FROM docs")}
+            merged: dict[str, list[int]] = {}
+            for trigram, ids in self.__conn.execute(
+                "SELECT trigram, ids FROM postings"
+            ):
+                merged.setdefault(trigram, []).extend(
+                    doc for doc in decode_ids(ids) if doc in live
+                )
+            self.__conn.execute("DELETE FROM postings")
+            self.__add_postings(
+                {trigram: sorted(ids) for trigram, ids in merged.items() if ids}
+            )
+        self.__conn.execute("VACUUM")
+
+
+def trigrams(chunks: Iterable[bytes]) -> set[str]:
+    """trigrams of lowercased text, as the scanner decodes and lowercases it,
+    from contents in chunks
+    """
+    decoder = codecs.getincrementaldecoder(Constants.ENCODING)(errors="ignore")
+    found: set[str] = set()
+    # last characters of the previous chunk, for trigrams across chunks
+    tail = ""
+    for chunk in itertools.chain(chunks, [b""]):
+        text = tail + decoder.decode(chunk, final=not chunk).lower()
+        found.update(text[idx : idx + 3] for idx in range(len(text) - 2))
+        tail = text[-2:]
+    return found
+
+
+def required_trigrams(word: str) -> set[str]:
+    """trigrams any match of word contains, empty if there are none
+
+    words with regex metacharacters other than . (any character) aren't
+    narrowed down, their literal parts might be optional
+    """
+    parts = word.split(".")
+    if any(char in Constants.REGEX_METACHARACTERS for char in "".join(parts)):
+        return set()
+    return {part[idx : idx + 3] for part in parts for idx in range(len(part) - 2)}
+
+
+def encode_ids(ids: list[int]) -> bytes:
+    """ascending ids as compressed varint deltas"""
+    out = bytearray()
+    previous = 0
+    for doc in ids:
+        delta = doc - previous
+        previous = doc
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return zlib.compress(bytes(out))
+
+
+def decode_ids(data: bytes) -> list[int]:
+    """ids encoded by encode_ids"""
+    ids = []
+    previous = 0
+    delta = 0
+    shift = 0
+    for byte in zlib.decompress(data):
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += delta
+        ids.append(previous)
+        delta = 0
+        shift = 0
+    return ids
@@ -1,13 +1,29 @@
 """contains LoggingManager class"""
 
 import os
+import queue
 import sys
 import logging
+import logging.handlers
+from typing import Optional
 from constants import Constants, Messages
 
 
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """queues records as logged, message formatted by the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # queue never leaves the process, args are safe to format later
+        return record
+
+
 class LoggingManager:
-    """used for logging and printing"""
+    """used for logging and printing
+
+    records are written to the log file by a background thread, per file
+    records (files, decoding, matches) go through a separate logger with
+    its own level and %-style arguments formatted only if enabled
+    """
 
     def __init__(
         self, date: str, folder=Constants.RESULTS_FOLDER, level=logging.DEBUG
@@ -16,14 +32,29 @@ class LoggingManager:
         if not os.path.exists(path):
             os.makedirs(path)
 
-        logging.basicConfig(
-            level=level,
-            filename=os.path.join(path, Constants.LOG_FILE),
-            filemode="a",
-            format="%(asctime)s - LOGGING.%(levelname)s - %(message)s",
+        handler = logging.FileHandler(os.path.join(path, Constants.LOG_FILE), "a")
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s - LOGGING.%(levelname)s - %(message)s")
         )
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.__listener: Optional[logging.handlers.QueueListener] = (
+            logging.handlers.QueueListener(log_queue, handler)
+        )
+        self.__listener.start()
+        logging.basicConfig(level=level, handlers=[_DeferredQueueHandler(log_queue)])
 
         self.logger = logging.getLogger()
+        self.file_logger = logging.getLogger(Constants.FILE_LOGGER)
+
+    def set_file_level(self, level: int) -> None:
+        """sets level of per file records"""
+        self.file_logger.setLevel(level)
+
+    def close(self) -> None:
+        """writes queued records, stops log thread"""
+        if self.__listener is not None:
+            self.__listener.stop()
+            self.__listener = None
 
     def debug(self, msg: str, stdout=True) -> None:
         """logs debug message"""
@@ -49,6 +80,7 @@ class LoggingManager:
         if stdout:
             print(Messages.CRIT_MSG.format(msg=msg))
             print(Messages.EXITING)
+        self.close()
         sys.exit()
 
     def warning(self, msg: str, stdout=True) -> None:
@@ -0,0 +1,236 @@
+"""contains RegexMatcher, LiteralMatcher classes"""
+
+import re
+from collections import deque
+from typing import Optional, Union
+from constants import Constants
+
+
+# pylint: disable=too-few-public-methods
+class RegexMatcher:
+    """matches all search words against a line with one combined regex"""
+
+    def __init__(self, pattern: str, words: list[str]) -> None:
+        self.words = words
+        self.buffer_pattern: Optional[re.Pattern] = None
+        self.__word_patterns = [re.compile(pattern.format(word=word)) for word in words]
+        self.__groups: dict[str, int] = {}
+        self.__combined = self.__combine(pattern, words)
+
+    def search_line(self, line: str) -> list[int]:
+        """indices of words matching line, in word list order"""
+        if self.__combined is None:
+            return [
+                idx
+                for idx, word_pattern in enumerate(self.__word_patterns)
+                if word_pattern.search(line)
+            ]
+
+        found = set()
+        for match in self.__combined.finditer(line):
+            for name, val in match.groupdict().items():
+                if val is not None and name in self.__groups:
+                    found.add(self.__groups[name])
+        if not found:
+            return []
+
+        # a word can be shadowed by another word matching at the same position
+        return [
+            idx
+            for idx, word_pattern in enumerate(self.__word_patterns)
+            if idx in found or word_pattern.search(line)
+        ]
+
+    def __combine(self, pattern: str, words: list[str]) -> Optional[re.Pattern]:
+        """single regex for all words, None if pattern can't be merged"""
+        if not words:
+            return None
+
+        parts = pattern.format(word=Constants.WORD_SENTINEL).split(
+            Constants.WORD_SENTINEL
+        )
+        # word used more than once, or pattern contains backreferences
+        if len(parts) != 2 or re.search(r"\\\d|\(\?P=", pattern):
+            return None
+        # top level alternatives of the pattern or a word don't contain the
+        # word, so merging them would change what each word matches
+        if any(_has_top_level_alternation(regex) for regex in (pattern, *words)):
+            return None
+        prefix, suffix = parts
+
+        literal_words = {}
+        alternatives = []
+        for idx, word in enumerate(words):
+            group = f"{Constants.WORD_GROUP_PREFIX}{idx}"
+            if is_literal(word):
+                if word in literal_words:
+                    continue
+                literal_words[word] = group
+            else:
+                alternatives.append(f"(?P<{group}>{word})")
+            self.__groups[group] = idx
+        if literal_words:
+            alternatives.insert(0, _trie_regex(literal_words))
+
+        try:
+            return re.compile(f"{prefix}(?:{'|'.join(alternatives)}){suffix}")
+        except (re.error, RecursionError, OverflowError):
+            return None
+
+
+# pylint: disable=too-many-instance-attributes, too-few-public-methods
+class LiteralMatcher:
+    """matches literal search words against a line with an Aho-Corasick automaton"""
+
+    def __init__(self, pattern: str, words: list[str], boundary: bool) -> None:
+        self.words = words
+        self.__boundary = boundary
+
+        # words that aren't plain literals keep their regex semantics
+        regex_idxs = [idx for idx, word in enumerate(words) if not is_literal(word)]
+        self.__regex_idxs = regex_idxs
+        self.__regex_matcher = (
+            RegexMatcher(pattern, [words[idx] for idx in regex_idxs])
+            if regex_idxs
+            else None
+        )
+
+        # case-insensitive literal search over raw file bytes
+        self.buffer_pattern: Optional[re.Pattern] = None
+        if words and not regex_idxs and all(word.isascii() for word in words):
+            trie = _trie_regex(dict.fromkeys(words))
+            self.buffer_pattern = re.compile(trie.encode(), re.IGNORECASE)
+
+        self.__goto: list[dict[str, int]] = [{}]
+        self.__fail: list[int] = [0]
+        self.__outputs: list[tuple[tuple[int, int], ...]] = [()]
+        self.__build([idx for idx in range(len(words)) if is_literal(words[idx])])
+
+    def search_line(self, line: str) -> list[int]:
+        """indices of words matching line, in word list order"""
+        found = set()
+        goto = self.__goto
+        fail = self.__fail
+        outputs = self.__outputs
+        state = 0
+        for end, char in enumerate(line, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word_idx, length in outputs[state]:
+                if word_idx in found:
+                    continue
+                if self.__boundary and not self.__at_boundary(line, end - length, end):
+                    continue
+                found.add(word_idx)
+
+        if self.__regex_matcher is not None:
+            found.update(
+                self.__regex_idxs[idx] for idx in self.__regex_matcher.search_line(line)
+            )
+        return sorted(found)
+
+    @staticmethod
+    def __at_boundary(line: str, start: int, end: int) -> bool:
+        """same check as the database table pattern lookarounds"""
+        word_chars = Constants.WORD_CHARACTERS
+        if start > 0 and line[start - 1] in word_chars:
+            return False
+        return end == len(line) or line[end] not in word_chars
+
+    def __build(self, word_idxs: list[int]) -> None:
+        goto = self.__goto
+        outputs: list[list[tuple[int, int]]] = [[]]
+        for idx in word_idxs:
+            word = self.words[idx]
+            state = 0
+            for char in word:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((idx, len(word)))
+
+        # breadth first so fail links of shorter prefixes are known
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(char, 0)
+                outputs[child] += outputs[fail[child]]
+
+        self.__fail = fail
+        self.__outputs = [tuple(output) for output in outputs]
+
+
+def create_matcher(
+    engine: str, pattern: str, words: list[str]
+) -> Union[RegexMatcher, LiteralMatcher]:
+    """matcher for configured search engine and pattern"""
+    if engine == Constants.LITERAL_ENGINE:
+        if pattern == Constants.NO_PATTERN.pattern:
+            return LiteralMatcher(pattern, words, boundary=False)
+        if pattern == Constants.DB_TABLE_PATTERN.pattern:
+            return LiteralMatcher(pattern, words, boundary=True)
+    return RegexMatcher(pattern, words)
+
+
+def is_literal(word: str) -> bool:
+    """whether word matches only itself when used as a regex"""
+    return not any(char in Constants.REGEX_METACHARACTERS for char in word)
+
+
+def _has_top_level_alternation(regex: str) -> bool:
+    """whether regex has a | outside of groups and character sets"""
+    depth = 0
+    idx = 0
+    while idx < len(regex):
+        char = regex[idx]
+        if char == "\\":
+            idx += 1
+        elif char == "[":
+            # a ] right after the opening bracket (or ^) is a member
+            idx += 2 if regex[idx + 1 : idx + 2] == "^" else 1
+            if regex[idx : idx + 1] == "]":
+                idx += 1
+            while idx < len(regex) and regex[idx] != "]":
+                idx += 2 if regex[idx] == "\\" else 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+        idx += 1
+    return False
+
+
+def _trie_regex(words: dict[str, Optional[str]]) -> str:
+    """trie-shaped alternation of literal words, optionally ending in empty named groups"""
+    trie: dict = {}
+    for word, group in words.items():
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = group
+    return _trie_node_regex(trie)
+
+
+def _trie_node_regex(node: dict) -> str:
+    branches = [
+        re.escape(char) + _trie_node_regex(child)
+        for char, child in node.items()
+        if char != ""
+    ]
+    # longer words are tried first, end marker last
+    if "" in node:
+        branches.append("" if node[""] is None else f"(?P<{node['']}>)")
+    if len(branches) == 1:
+        return branches[0]
+    return f"(?:{'|'.join(branches)})"
@@ -0,0 +1,258 @@
+"""contains BranchPack class"""
+
+import json
+import mmap
+import os
+from typing import BinaryIO, Callable, Iterator, Optional
+from logger import LoggingManager
+from constants import BranchSearchResults, Constants, Messages
+
+
+class BranchPack:
+    """used to read branch checkout files from one content file, instead of
+    walking the checkout and opening every file
+
+    file contents are appended once per blob, index holds their offsets and
+    the walk of the checkout at the packed commit
+    """
+
+    def __init__(
+        self, logger: LoggingManager, repo: str, branch: str, excludes_hash: str
+    ) -> None:
+        self.__logger = logger
+        path = os.path.join(Constants.STATE_FOLDER, Constants.PACK_FOLDER, repo, branch)
+        self.__pack_path = path + Constants.PACK_EXTENSION
+        self.__index_path = path + Constants.PACK_INDEX_EXTENSION
+        self.__excludes_hash = excludes_hash
+        self.__index: dict = {}
+        self.__buffer: Optional[mmap.mmap] = None
+
+    def load(self, commit: str) -> bool:
+        """whether branch is packed at commit"""
+        self.__index = self.__read_index()
+        return (
+            self.__index.get(Constants.COMMIT_KEY) == commit
+            and self.__index.get(Constants.EXCLUDES_HASH_KEY) == self.__excludes_hash
+        )
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def update(
+        self,
+        commit: str,
+        path: str,
+        files: list[str],
+        walked: BranchSearchResults,
+        blobs: dict[str, str],
+        rejection: Callable[[str, str], str],
+    ) -> bool:
+        """packs walked checkout files, appending only blobs not packed before,
+        files other than tracked blobs, and files rejection gives a reason not
+        to search for, are left to be read from the checkout
+        """
+        blob_spans: dict[str, list[int]] = self.__index.get(Constants.BLOBS_KEY, {})
+        try:
+            entries, size = self.__append(
+                path,
+                files,
+                blobs,
+                blob_spans,
+                self.__index.get(Constants.SIZE_KEY, 0),
+                rejection,
+            )
+        except OSError as err:
+            self.__logger.error(Messages.PACK_FAILED.format(err=err))
+            return False
+
+        live = {blob for _, blob in entries if blob}
+        self.__index = {
+            Constants.STATE_VERSION_KEY: Constants.PACK_VERSION,
+            Constants.COMMIT_KEY: commit,
+            Constants.EXCLUDES_HASH_KEY: self.__excludes_hash,
+            Constants.SIZE_KEY: size,
+            Constants.BLOBS_KEY: {
+                blob: span for blob, span in blob_spans.items() if blob in live
+            },
+            Constants.FOLDERS_KEY: [
+                self.__rel_path(folder, path) for folder in walked.folders
+            ],
+            Constants.SKIPPED_FOLDERS_KEY: [
+                self.__rel_path(folder, path) for folder in walked.skipped_folders
+            ],
+            Constants.SKIPPED_FILES_KEY: [
+                self.__rel_path(file, path) for file in walked.skipped_files
+            ],
+            Constants.FILES_KEY: entries,
+        }
+        packed = sum(span[1] for span in self.__index[Constants.BLOBS_KEY].values())
+        if size > Constants.PACK_MAX_GARBAGE * packed:
+            return self.__compact()
+        return self.__write_index()
+
+    def __append(
+        self,
+        path: str,
+        files: list[str],
+        blobs: dict[str, str],
+        blob_spans: dict[str, list[int]],
+        size: int,
+        rejection: Callable[[str, str], str],
+    ) -> tuple[list[list[str]], int]:
+        """appends contents of blobs not packed yet in chunks, returns pack
+        entries of files and new content size
+        """
+        entries = []
+        os.makedirs(os.path.dirname(self.__pack_path), exist_ok=True)
+        with open(self.__pack_path, "ab") as pack:
+            # drop content appended after the index was last written
+            pack.truncate(size)
+            for file_path in files:
+                rel_path = self.__rel_path(file_path, path)
+                blob = blobs.get(rel_path, "")
+                if blob and rejection(file_path, rel_path):
+                    # rejected again from its size and first bytes when searched
+                    blob = ""
+                elif blob and blob not in blob_spans:
+                    with open(file_path, "rb") as file:
+                        length = _copy(file, pack)
+                    blob_spans[blob] = [size, length]
+                    size += length
+                entries.append([rel_path, blob])
+        return (entries, size)
+
+    def walk(
+        self, path: str, results: BranchSearchResults
+    ) -> Iterator[tuple[str, str]]:
+        """paths of files to search and their blob, empty if read from the
+        checkout, records searched and skipped folders like a checkout walk
+        """
+        results.folders.extend(
+            self.__full_path(folder, path)
+            for folder in self.__index[Constants.FOLDERS_KEY]
+        )
+        results.skipped_folders.extend(
+            self.__full_path(folder, path)
+            for folder in self.__index[Constants.SKIPPED_FOLDERS_KEY]
+        )
+        results.skipped_files.extend(
+            self.__full_path(file, path)
+            for file in self.__index[Constants.SKIPPED_FILES_KEY]
+        )
+        for rel_path, blob in self.__index[Constants.FILES_KEY]:
+            yield (self.__full_path(rel_path, path), blob)
+
+    def read(self, blob: str) -> bytes:
+        """packed contents of blob"""
+        offset, length = self.__index[Constants.BLOBS_KEY][blob]
+        if not length:
+            return b""
+        return self.__map()[offset : offset + length]
+
+    def size(self, blob: str) -> int:
+        """size of packed contents of blob"""
+        return self.__index[Constants.BLOBS_KEY][blob][1]
+
+    def chunks(self, blob: str) -> Iterator[bytes]:
+        """packed contents of blob in bounded chunks"""
+        offset, length = self.__index[Constants.BLOBS_KEY][blob]
+        if not length:
+            return
+        buffer = self.__map()
+        end = offset + length
+        for start in range(offset, end, Constants.READ_CHUNK_SIZE):
+            yield buffer[start : min(start + Constants.READ_CHUNK_SIZE, end)]
+
+    def __map(self) -> mmap.mmap:
+        if self.__buffer is None:
+            with open(self.__pack_path, "rb") as pack:
+                self.__buffer = mmap.mmap(pack.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.__buffer
+
+    def close(self) -> None:
+        """unmaps content file"""
+        if self.__buffer is not None:
+            self.__buffer.close()
+            self.__buffer = None
+
+    def __compact(self) -> bool:
+        """rewrites content file with only blobs of the packed commit"""
+        self.__logger.info(Messages.COMPACTING_PACK.format(path=self.__pack_path))
+        blob_spans = self.__index[Constants.BLOBS_KEY]
+        size = 0
+        try:
+            with open(self.__pack_path, "rb") as old, open(
+                self.__pack_path + Constants.TEMP_EXTENSION, "wb"
+            ) as new:
+                for blob, (offset, length) in sorted(
+                    blob_spans.items(), key=lambda item: item[1][0]
+                ):
+                    old.seek(offset)
+                    _copy(old, new, length)
+                    blob_spans[blob] = [size, length]
+                    size += length
+            # offsets of the old index no longer hold
+            if os.path.exists(self.__index_path):
+                os.remove(self.__index_path)
+            os.replace(self.__pack_path + Constants.TEMP_EXTENSION, self.__pack_path)
+        except OSError as err:
+            self.__logger.error(Messages.PACK_FAILED.format(err=err))
+            self.__index = {}
+            return False
+        self.__index[Constants.SIZE_KEY] = size
+        return self.__write_index()
+
+    def __read_index(self) -> dict:
+        if not os.path.exists(self.__index_path):
+            return {}
+        try:
+            with open(self.__index_path, "r", encoding=Constants.ENCODING) as file:
+                index = json.load(file)
+        except (OSError, json.decoder.JSONDecodeError):
+            self.__logger.error(
+                Messages.STATE_PARSING_FAILED.format(path=self.__index_path)
+            )
+            return {}
+        if index.get(Constants.STATE_VERSION_KEY) != Constants.PACK_VERSION:
+            return {}
+        # content file missing or cut short, contents packed again
+        if not os.path.exists(self.__pack_path) or os.path.getsize(
+            self.__pack_path
+        ) < index.get(Constants.SIZE_KEY, 0):
+            return {}
+        return index
+
+    def __write_index(self) -> bool:
+        try:
+            with open(self.__index_path, "w", encoding=Constants.ENCODING) as file:
+                json.dump(self.__index, file)
+        except OSError as err:
+            self.__logger.error(Messages.PACK_FAILED.format(err=err))
+            self.__index = {}
+            return False
+        return True
+
+    @staticmethod
+    def __rel_path(full_path: str, path: str) -> str:
+        rel_path = os.path.relpath(full_path, path).replace(os.sep, "/")
+        # skipped folders end in a separator
+        return rel_path + "/" if full_path.endswith(os.sep) else rel_path
+
+    @staticmethod
+    def __full_path(rel_path: str, path: str) -> str:
+        return os.path.join(path, *rel_path.split("/"))
+
+
+def _copy(source: BinaryIO, target: BinaryIO, length: Optional[int] = None) -> int:
+    """copies bytes of source to target in bounded chunks, up to length if
+    given, returns number of bytes copied
+    """
+    copied = 0
+    while length is None or copied < length:
+        size = Constants.READ_CHUNK_SIZE
+        if length is not None:
+            size = min(size, length - copied)
+        chunk = source.read(size)
+        if not chunk:
+            break
+        target.write(chunk)
+        copied += len(chunk)
+    return copied
@@ -0,0 +1,234 @@
+"""contains PathFilter class, gitignore style pattern functions"""
+
+import re
+from typing import Optional
+from constants import Constants
+
+
+class PathFilter:
+    """used to decide which branch folders and files are searched, from
+    gitignore style exclude and include patterns compiled once
+
+    patterns without a slash match names at any depth, others match paths
+    relative to the branch, a trailing slash only matches folders, ! negates,
+    and the last matching pattern decides, case insensitively
+
+    when there are include patterns only files they match are searched, and
+    folders they can't match anything in aren't walked
+    """
+
+    def __init__(
+        self,
+        exclude_folders: list[str],
+        exclude_files: list[str],
+        include_files: Optional[list[str]] = None,
+    ) -> None:
+        excludes = [gitignore_pattern(folder, True) for folder in exclude_folders]
+        file_excludes = [gitignore_pattern(file, False) for file in exclude_files]
+        # file entries only prune folders when they only match folders
+        self.__folder_excludes = _RuleSet(
+            excludes + [exclude for exclude in file_excludes if _parse(exclude)[2]],
+            True,
+        )
+        self.__file_excludes = _RuleSet(excludes + file_excludes, False)
+
+        self.__file_includes: Optional[_RuleSet] = None
+        # segments of anchored includes, None if any include is not
+        self.__include_paths: Optional[list[list[Optional[re.Pattern]]]] = None
+        if include_files:
+            includes = [_folder_contents(include) for include in include_files]
+            self.__file_includes = _RuleSet(includes, False)
+            self.__include_paths = _anchored_segments(includes)
+
+    def skip_folder(self, rel_path: str) -> bool:
+        """whether folder and everything in it isn't searched"""
+        if self.__folder_excludes.matches(rel_path):
+            return True
+        return self.__include_paths is not None and not self.__can_include(rel_path)
+
+    def skip_file(self, rel_path: str) -> bool:
+        """whether file isn't searched"""
+        if self.__file_excludes.matches(rel_path):
+            return True
+        return self.__file_includes is not None and not (
+            self.__file_includes.matches(rel_path)
+        )
+
+    def __can_include(self, rel_path: str) -> bool:
+        """whether includes can match files in folder, one check per folder
+        segment of each anchored include
+        """
+        assert self.__include_paths is not None
+        folders = rel_path.lower().split("/")
+        for segments in self.__include_paths:
+            for idx, folder in enumerate(folders):
+                segment = segments[idx]
+                if segment is None:
+                    # ** matches any folders
+                    return True
+                if idx == len(segments) - 1 or not segment.fullmatch(folder):
+                    # include ends above folder contents, or misses folder
+                    break
+            else:
+                return True
+        return False
+
+
+# pylint: disable=too-few-public-methods
+class _RuleSet:
+    """compiled patterns, literal names, suffixes and paths looked up in dicts
+    keyed to their last pattern index, others tried in one regex
+    """
+
+    def __init__(self, patterns: list[str], folders: bool) -> None:
+        self.__negated: list[bool] = []
+        self.__names: dict[str, int] = {}
+        self.__suffixes: dict[str, int] = {}
+        self.__suffix_lengths: list[int] = []
+        self.__paths: dict[str, int] = {}
+        name_regexes: list[str] = []
+        path_regexes: list[str] = []
+
+        for idx, pattern in enumerate(patterns):
+            negated, body, folder_only = _parse(pattern.lower())
+            self.__negated.append(negated)
+            if folder_only and not folders:
+                continue
+            anchored = "/" in body
+            body = body.lstrip("/")
+            if not _has_glob(body):
+                literal = _unescape(body)
+                (self.__paths if anchored else self.__names)[literal] = idx
+            elif not anchored and body.startswith("*") and not _has_glob(body[1:]):
+                self.__suffixes[_unescape(body[1:])] = idx
+            elif anchored:
+                path_regexes.append(f"(?P<r{idx}>{_path_regex(body)})")
+            else:
+                name_regexes.append(f"(?P<r{idx}>{_glob_regex(body)})")
+
+        self.__suffix_lengths = sorted({len(suffix) for suffix in self.__suffixes})
+        # later patterns first, so the first alternative matching is the last
+        self.__name_regex = (
+            re.compile("|".join(reversed(name_regexes))) if name_regexes else None
+        )
+        self.__path_regex = (
+            re.compile("|".join(reversed(path_regexes))) if path_regexes else None
+        )
+
+    def matches(self, rel_path: str) -> bool:
+        """whether last pattern matching path is not negated"""
+        rel_path = rel_path.lower()
+        name = rel_path.rsplit("/", 1)[-1]
+        last = max(self.__names.get(name, -1), self.__paths.get(rel_path, -1))
+        for length in self.__suffix_lengths:
+            if length > len(name):
+                break
+            last = max(last, self.__suffixes.get(name[-length:], -1))
+        for regex, text in ((self.__name_regex, name), (self.__path_regex, rel_path)):
+            if regex is not None and (match := regex.fullmatch(text)):
+                assert match.lastgroup is not None
+                last = max(last, int(match.lastgroup[1:]))
+        return last >= 0 and not self.__negated[last]
+
+
+def gitignore_pattern(entry: str, folder: bool) -> str:
+    """gitignore pattern of exclude entry, plain names are folder names or
+    file name endings (like .dll) as before patterns were supported
+    """
+    if not _has_glob(entry) and not entry.startswith("!") and "/" not in entry:
+        return entry + "/" if folder else "*" + entry
+    if folder and not entry.endswith("/"):
+        return entry + "/"
+    return entry
+
+
+def _folder_contents(pattern: str) -> str:
+    """pattern matching files in folders pattern matches, if it only matches
+    folders, since files in included folders are included
+    """
+    negated, body, folder_only = _parse(pattern)
+    if not folder_only:
+        return pattern
+    prefix = "!" if negated else ""
+    if "/" not in body:
+        prefix += "**/"
+    return prefix + body + "/**"
+
+
+def _parse(pattern: str) -> tuple[bool, str, bool]:
+    """whether pattern is negated, its body, whether it only matches folders"""
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    folder_only = pattern.endswith("/")
+    return (negated, pattern.rstrip("/"), folder_only)
+
+
+def _anchored_segments(
+    patterns: list[str],
+) -> Optional[list[list[Optional[re.Pattern]]]]:
+    """segment regexes of include patterns, None for **, or None if any include
+    matches names at any depth
+    """
+    anchored = []
+    for pattern in patterns:
+        negated, body, _ = _parse(pattern.lower())
+        if negated:
+            # only narrows what other includes match
+            continue
+        if "/" not in body:
+            return None
+        anchored.append(
+            [
+                None if segment == "**" else re.compile(_glob_regex(segment))
+                for segment in body.lstrip("/").split("/")
+            ]
+        )
+    return anchored
+
+
+def _has_glob(text: str) -> bool:
+    return any(char in Constants.GLOB_CHARACTERS for char in text)
+
+
+def _unescape(text: str) -> str:
+    return re.sub(r"\\(.)", r"\1", text)
+
+
+def _path_regex(body: str) -> str:
+    """regex of slash separated pattern, ** matching any number of folders"""
+    segments = body.split("/")
+    regex = ""
+    for idx, segment in enumerate(segments):
+        last = idx == len(segments) - 1
+        if segment == "**":
+            regex += ".+" if last else "(?:[^/]+/)*"
+        else:
+            regex += _glob_regex(segment) + ("" if last else "/")
+    return regex
+
+
+def _glob_regex(glob: str) -> str:
+    """regex of glob within one path segment"""
+    regex = ""
+    idx = 0
+    while idx < len(glob):
+        char = glob[idx]
+        end = glob.find("]", idx + 2) if char == "[" else -1
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif end != -1:
+            members = glob[idx + 1 : end]
+            if members[0] in "!^":
+                members = "^" + members[1:]
+            regex += "[" + members.replace("\\", "\\\\") + "]"
+            idx = end
+        elif char == "\\" and idx + 1 < len(glob):
+            idx += 1
+            regex += re.escape(glob[idx])
+        else:
+            regex += re.escape(char)
+        idx += 1
+    return regex
@@ -1,15 +1,20 @@
 """contains ADORepository class"""
 
 import os
+import random
+import shutil
+import threading
 import time
-from typing import Union
+from typing import Any, Callable, Iterator, Optional, Union
 import git
 from git.repo import Repo
 from logger import LoggingManager
 from constants import Messages, Constants
+from pathfilter import gitignore_pattern
 
 
-# pylint: disable=too-many-arguments, too-few-public-methods
+# pylint: disable=too-many-arguments, too-many-positional-arguments
+# pylint: disable=too-many-instance-attributes, too-few-public-methods
 class ADORepository:
     """Azure DevOps repository"""
 
@@ -20,6 +25,10 @@ class ADORepository:
         branches: set[str],
         path: str,
         url: Union[str, None] = None,
+        backend: str = Constants.CHECKOUT_BACKEND,
+        depth: int = 0,
+        blob_filter: str = "",
+        sparse: Optional[list[str]] = None,
     ) -> None:
         self.logger = logger
 
@@ -27,9 +36,26 @@ class ADORepository:
         self.branches = branches
         self.path = path
         self.url = url
+        self.backend = backend
+        # history depth and partial clone filter of fetches, none if falsy
+        self.depth = depth
+        self.blob_filter = blob_filter
+        # sparse-checkout patterns of branch worktrees, full checkout if None
+        self.sparse = sparse
         if not os.path.exists(self.path):
             os.makedirs(self.path)
 
+        # one bare repo fetched once per run for all branches, branches are
+        # worktrees of it for the checkout backend
+        self.__store: Optional[git.Git] = None
+        self.__fetch_result: Optional[tuple[bool, float]] = None
+        self.__fetch_lock = threading.Lock()
+        # remote branch heads, listed once per run
+        self.__remote_heads: Optional[dict[str, str]] = None
+        # blob whose first bytes were read, its head and the cat-file stream
+        # holding the rest
+        self.__open_blob: Optional[tuple[str, bytes, Any]] = None
+
     def __str__(self) -> str:
         return Messages.STR.format(
             repo=self.name, path=self.path, branches=self.branches
@@ -42,43 +68,482 @@ class ADORepository:
         """updates local branch files if necessary"""
         assert branch in self.branches
 
-        if os.path.exists(os.path.join(self.path, branch)):
+        with self.__fetch_lock:
+            # the first branch update fetches every target branch
+            if self.__fetch_result is None:
+                self.__fetch_result = self.__retry(Messages.FETCH, self.__fetch)
+        if self.backend == Constants.OBJECT_BACKEND or not self.__fetch_result[0]:
+            return self.__fetch_result
+
+        path = os.path.join(self.path, branch)
+        if os.path.exists(path):
             self.logger.info(Messages.PATH_EXISTS)
-            mode = Messages.PULL
         else:
             self.logger.info(Messages.PATH_DOESNT_EXIST)
-            mode = Messages.CLONE
+        if os.path.isfile(os.path.join(path, Constants.GIT_FOLDER)):
+            mode = Messages.RESET
+        else:
+            mode = Messages.WORKTREE
+        return self.__retry(mode, lambda: self.__update_helper(branch, mode))
 
-        for _ in range(Constants.RETRIES):
-            if self.__update_helper(branch, mode):
+    def __retry(self, mode: str, update: Callable[[], bool]) -> tuple[bool, float]:
+        for attempt in range(Constants.RETRIES):
+            if update():
                 return (True, time.time())
+            if attempt == Constants.RETRIES - 1:
+                break
 
-            self.logger.info(Messages.RETRYING)
-            time.sleep(Messages.INTERVAL)
+            # exponential backoff with full jitter
+            delay = random.uniform(
+                0, min(Constants.BACKOFF_MAX, Constants.BACKOFF_BASE * 2**attempt)
+            )
+            self.logger.info(Messages.RETRYING.format(delay=delay))
+            time.sleep(delay)
 
         self.logger.error(Messages.GIT_MAX_RETRIES.format(mode=mode))
         return (False, Constants.DEFAULT_TIME)
 
-    def __update_helper(self, branch, mode) -> bool:
+    def remote_heads(self) -> dict[str, str]:
+        """remote branch head commits, one ls-remote for all branches, reused
+        for the rest of the run once tried, empty if listing failed
+        """
+        if self.__remote_heads is not None:
+            return self.__remote_heads
+        if self.url is None:
+            return {}
+        try:
+            output = git.cmd.Git().ls_remote("--heads", self.url)
+        except git.GitCommandError as err:
+            self.logger.error(Messages.LS_REMOTE_FAILED.format(err=err))
+            # unreachable for the run, later branches fall back right away
+            self.__remote_heads = {}
+            return {}
+
+        heads = {}
+        for line in output.splitlines():
+            commit, _, ref = line.partition(Constants.TAB)
+            heads[ref.replace(Constants.BRANCH_PREFIX, "", 1)] = commit
+        self.__remote_heads = heads
+        return heads
+
+    def branch_exists(self, branch) -> bool:
+        """whether branch files are locally available"""
+        if self.backend == Constants.OBJECT_BACKEND:
+            return bool(self.head_commit(branch))
+        return os.path.exists(os.path.join(self.path, branch))
+
+    def head_commit(self, branch) -> str:
+        """commit of local branch files, empty if unavailable"""
+        try:
+            if self.backend == Constants.OBJECT_BACKEND:
+                return self.__repo_store().rev_parse(
+                    "--verify",
+                    "--quiet",
+                    f"{Constants.BRANCH_PREFIX}{branch}^{{commit}}",
+                )
+            return Repo(os.path.join(self.path, branch)).head.commit.hexsha
+        except (git.GitError, ValueError, OSError):
+            return ""
+
+    def tree_entries(self, commit) -> Optional[list[tuple[str, str, str, str]]]:
+        """mode, type, SHA and path of every tree entry of commit in the object
+        store, trees listed before their contents
+
+        None if the tree can't be read
+        """
+        try:
+            output = self.__repo_store().ls_tree("-r", "-t", "-z", commit)
+        except (git.GitError, ValueError, OSError) as err:
+            self.logger.error(Messages.LS_TREE_FAILED.format(err=err))
+            return None
+
+        entries = []
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            # <mode> <type> <sha>\t<path>
+            info, _, path = entry.partition(Constants.TAB)
+            mode, _type, sha = info.split()
+            entries.append((mode, _type, sha, path))
+        return entries
+
+    def blob_data(self, blob) -> bytes:
+        """contents of blob in the object store, read by a long-lived cat-file,
+        continuing from its head if that was read last
+        """
+        if self.__open_blob is not None and self.__open_blob[0] == blob:
+            _, head, stream = self.__open_blob
+            self.__open_blob = None
+            return head + stream.read()
+        self.__skip_open_blob()
+        return self.__repo_store().get_object_data(blob)[3]
+
+    def blob_chunks(self, blob) -> Iterator[bytes]:
+        """contents of blob in the object store in bounded chunks, continuing
+        from its head if that was read last, OSError if missing
+        """
+        if self.__open_blob is not None and self.__open_blob[0] == blob:
+            _, head, stream = self.__open_blob
+        else:
+            self.__skip_open_blob()
+            try:
+                stream = self.__repo_store().stream_object_data(blob)[3]
+            except (git.GitError, ValueError) as err:
+                raise OSError(err) from err
+            head = b""
+        # rest is skipped by the next read if chunks aren't read to the end
+        self.__open_blob = ("", b"", stream)
+        chunk = head + stream.read(Constants.READ_CHUNK_SIZE - len(head))
+        while chunk:
+            yield chunk
+            chunk = stream.read(Constants.READ_CHUNK_SIZE)
+        self.__open_blob = None
+
+    def blob_size(self, blob) -> Optional[int]:
+        """size of blob in the object store without reading it, None if missing"""
         try:
-            if mode == Messages.PULL:
-                repo = Repo(os.path.join(self.path, branch))
-                repo.git.checkout(branch)
-                # clear local changes / files
-                repo.git.reset("--hard")
-                repo.git.clean("-f", "-d", "-x")
-                repo.remotes.origin.pull(branch)
+            return self.__repo_store().get_object_header(blob)[2]
+        except (git.GitError, ValueError, OSError):
+            return None
+
+    def blob_head(self, blob, size: int) -> Optional[bytes]:
+        """first bytes of blob in the object store, the rest is kept to be read
+        by blob_data or blob_chunks next, None if missing
+        """
+        self.__skip_open_blob()
+        try:
+            stream = self.__repo_store().stream_object_data(blob)[3]
+        except (git.GitError, ValueError, OSError):
+            return None
+        head = stream.read(size)
+        self.__open_blob = (blob, head, stream)
+        return head
+
+    def __skip_open_blob(self) -> None:
+        """reads past the rest of the blob whose head was read, in chunks, so
+        cat-file can read the next object
+        """
+        if self.__open_blob is None:
+            return
+        stream = self.__open_blob[2]
+        self.__open_blob = None
+        while stream.read(Constants.READ_CHUNK_SIZE):
+            pass
+
+    def close(self) -> None:
+        """stops git processes kept alive for the object store"""
+        self.__skip_open_blob()
+        if self.__store is not None:
+            self.__store.clear_cache()
+            self.__store = None
+
+    def tracked_blobs(self, branch) -> Optional[dict[str, str]]:
+        """blob SHAs of tracked regular files keyed by path, None if unavailable"""
+        staged = self.__staged(branch)
+        if staged is None:
+            return None
+        # symlinks and submodules skipped
+        return {
+            path: blob
+            for mode, blob, path in staged
+            if mode in Constants.REGULAR_FILE_MODES
+        }
+
+    def tracked_files(self, branch) -> Optional[list[tuple[str, str]]]:
+        """modes and paths of tracked files in index order, None if unavailable"""
+        staged = self.__staged(branch)
+        if staged is None:
+            return None
+        return [(mode, path) for mode, _, path in staged]
+
+    def __staged(self, branch) -> Optional[list[tuple[str, str, str]]]:
+        """mode, blob SHA and path of merged index entries of branch checkout"""
+        try:
+            output = Repo(os.path.join(self.path, branch)).git.ls_files("-s", "-z")
+        except (git.GitError, ValueError) as err:
+            self.logger.error(Messages.LS_FILES_FAILED.format(err=err))
+            return None
+
+        staged = []
+        for entry in output.split("\0"):
+            if not entry:
+                continue
+            # <mode> <blob> <stage>\t<path>
+            info, _, path = entry.partition(Constants.TAB)
+            mode, blob, stage = info.split()
+            if stage == "0":
+                staged.append((mode, blob, path))
+        return staged
+
+    def local_changes(self, branch) -> Optional[set[str]]:
+        """paths differing from branch head in the checkout, None if unavailable"""
+        try:
+            status = Repo(os.path.join(self.path, branch)).git.status(
+                "--porcelain", "-z", "--untracked-files=all", "--ignored"
+            )
+        except (git.GitError, ValueError) as err:
+            self.logger.error(Messages.STATUS_FAILED.format(err=err))
+            return None
+
+        changes = set()
+        entries = iter(status.split("\0"))
+        for entry in entries:
+            if entry:
+                changes.add(entry[3:])
+            # renamed and copied entries are followed by the original path
+            if entry[:1] in ("R", "C"):
+                changes.add(next(entries, ""))
+        return changes
+
+    def changed_since(self, branch, commit, head) -> Optional[set[str]]:
+        """paths changed between commit and head, None if unavailable"""
+        try:
+            if self.backend == Constants.OBJECT_BACKEND:
+                cmd = self.__repo_store()
             else:
-                if self.url is None:
-                    self.logger.error(Messages.URL_NOT_SPECIFIED)
-                    return False
-                Repo.clone_from(
-                    self.url, os.path.join(self.path, branch), branch=branch
+                cmd = Repo(os.path.join(self.path, branch)).git
+            diff = cmd.diff("--name-only", "--no-renames", "-z", commit, head)
+        except (git.GitError, ValueError, OSError) as err:
+            self.logger.error(Messages.DIFF_FAILED.format(err=err))
+            return None
+        return {path for path in diff.split("\0") if path}
+
+    def __update_helper(self, branch, mode) -> bool:
+        path = os.path.join(self.path, branch)
+        try:
+            if mode == Messages.RESET and self.__reset_worktree(branch):
+                self.logger.info(Messages.GIT_SUCCESS.format(mode=mode))
+                return True
+
+            if os.path.exists(path):
+                # clone from before the shared store, or leftover files
+                self.logger.info(Messages.REPLACING_BRANCH)
+                shutil.rmtree(path)
+            with self.__fetch_lock:
+                self.__repo_store().worktree(
+                    "add",
+                    "--detach",
+                    "--force",
+                    "--no-checkout",
+                    os.path.abspath(path),
+                    Constants.REMOTE_PREFIX + branch,
                 )
+            # checked out after sparse patterns are set
+            self.__reset_worktree(branch)
 
-            self.logger.info(Messages.GIT_SUCCESS.format(mode=mode))
+            self.logger.info(Messages.GIT_SUCCESS.format(mode=Messages.WORKTREE))
             return True
 
-        except git.GitCommandError as err:
+        except (git.GitCommandError, OSError) as err:
             self.logger.error(Messages.GIT_FAILURE.format(mode=mode, err=err))
             return False
+
+    def __reset_worktree(self, branch) -> bool:
+        """resets worktree to fetched branch, False if it lost its shared clone"""
+        try:
+            repo = Repo(os.path.join(self.path, branch))
+        except git.InvalidGitRepositoryError:
+            return False
+        if self.sparse is not None:
+            repo.git.sparse_checkout("set", "--no-cone", *self.sparse)
+        elif self.__is_sparse(repo):
+            repo.git.sparse_checkout("disable")
+        # clear local changes / files
+        repo.git.reset("--hard", Constants.REMOTE_PREFIX + branch)
+        repo.git.clean("-f", "-d", "-x")
+        return True
+
+    @staticmethod
+    def __is_sparse(repo: Repo) -> bool:
+        try:
+            repo.git.sparse_checkout("list")
+            return True
+        except git.GitCommandError:
+            return False
+
+    def __repo_store(self) -> git.Git:
+        """git commands run in the bare repo store
+
+        run from its folder rather than through Repo, which misreads stores
+        whose core.bare moved to config.worktree for sparse worktrees
+        """
+        if self.__store is None:
+            if not os.path.isdir(self.__store_path()):
+                raise git.NoSuchPathError(self.__store_path())
+            self.__store = git.Git(self.__store_path())
+        return self.__store
+
+    def __store_path(self) -> str:
+        if self.backend == Constants.OBJECT_BACKEND:
+            return os.path.join(self.path, Constants.OBJECT_STORE)
+        return os.path.join(self.path, Constants.SHARED_STORE)
+
+    def __fetch(self) -> bool:
+        """fetches all target branches into the repo store at once"""
+        if self.url is None:
+            self.logger.error(Messages.URL_NOT_SPECIFIED)
+            return False
+
+        heads = self.remote_heads()
+        # a missing remote branch would fail the whole fetch
+        branches = [
+            branch for branch in sorted(self.branches) if not heads or branch in heads
+        ]
+        if self.backend == Constants.OBJECT_BACKEND:
+            refs = Constants.BRANCH_PREFIX
+        else:
+            refs = Constants.REMOTE_PREFIX
+        try:
+            if not os.path.exists(self.__store_path()):
+                Repo.init(self.__store_path(), bare=True)
+                # a shallow fetch is cheaper than copying full history
+                if self.backend == Constants.CHECKOUT_BACKEND and not self.depth:
+                    self.__seed_store()
+            store = self.__configure_remote()
+            old_refs = store.for_each_ref(refs)
+            store.fetch(
+                *self.__fetch_options(),
+                Constants.REMOTE,
+                *[
+                    f"+{Constants.BRANCH_PREFIX}{branch}:{refs}{branch}"
+                    for branch in branches
+                ],
+            )
+            if self.backend == Constants.CHECKOUT_BACKEND:
+                # forget worktrees whose folders were deleted
+                store.worktree("prune")
+            if self.depth and store.for_each_ref(refs) != old_refs:
+                # drop history older than the fetched depth, only once new
+                # commits arrived
+                store.reflog("expire", "--expire=now", "--all")
+                store.gc("--prune=now", "--quiet")
+            self.logger.info(Messages.GIT_SUCCESS.format(mode=Messages.FETCH))
+            return True
+
+        except git.GitCommandError as err:
+            self.logger.error(Messages.GIT_FAILURE.format(mode=Messages.FETCH, err=err))
+            return False
+
+    def __configure_remote(self) -> git.Git:
+        """points origin of the repo store at the url, as a promisor remote
+        for partial clones so missing blobs are downloaded when read
+        """
+        store = self.__repo_store()
+        remote = f"remote.{Constants.REMOTE}"
+        store.config(f"{remote}.url", self.url)
+        if self.blob_filter:
+            store.config(f"{remote}.promisor", "true")
+            store.config(f"{remote}.partialclonefilter", self.blob_filter)
+        return store
+
+    def __fetch_options(self) -> list[str]:
+        options = ["--no-tags"]
+        if self.depth:
+            options.append(f"--depth={self.depth}")
+        if self.blob_filter:
+            options.append(f"--filter={self.blob_filter}")
+        return options
+
+    def fetch_blobs(self, blobs: list[str]) -> None:
+        """downloads blobs left out by the partial clone filter in batches,
+        instead of one request per blob as they're read
+        """
+        if not self.blob_filter:
+            return
+        store = self.__repo_store()
+        for start in range(0, len(blobs), Constants.BLOB_BATCH_SIZE):
+            try:
+                # negotiating would walk the wanted blobs as commits, git's own
+                # lazy fetch of missing blobs skips it the same way
+                store(c=Constants.NOOP_NEGOTIATION).fetch(
+                    "--no-tags",
+                    "--no-write-fetch-head",
+                    "--recurse-submodules=no",
+                    f"--filter={self.blob_filter}",
+                    Constants.REMOTE,
+                    *blobs[start : start + Constants.BLOB_BATCH_SIZE],
+                )
+            except git.GitCommandError as err:
+                # blobs are still downloaded one at a time when read
+                self.logger.error(
+                    Messages.GIT_FAILURE.format(mode=Messages.FETCH, err=err)
+                )
+                return
+
+    def __seed_store(self) -> None:
+        """copies objects of a branch clone from before the shared store, so only
+        newer objects are downloaded
+        """
+        for branch in sorted(self.branches):
+            path = os.path.join(self.path, branch)
+            if not os.path.isdir(os.path.join(path, Constants.GIT_FOLDER)):
+                continue
+            self.logger.info(Messages.SEEDING_STORE.format(path=path))
+            try:
+                self.__repo_store().fetch(
+                    "--no-tags",
+                    os.path.abspath(path),
+                    f"+{Constants.REMOTE_PREFIX}*:{Constants.REMOTE_PREFIX}*",
+                )
+                return
+            except git.GitCommandError as err:
+                self.logger.error(
+                    Messages.GIT_FAILURE.format(mode=Messages.SEED, err=err)
+                )
+
+
+def sparse_patterns(
+    exclude_folders: list[str],
+    exclude_files: list[str],
+    include_files: Optional[list[str]] = None,
+) -> list[str]:
+    """sparse-checkout patterns leaving out excluded folders, and files not
+    included if there are includes
+
+    sparse patterns also match folders, so excluded files are left to the path
+    filter, apart from entries that only match folders
+    """
+    patterns = [_any_case(include) for include in include_files or []] or ["/*"]
+    excludes = [gitignore_pattern(folder, True) for folder in exclude_folders]
+    excludes += [
+        exclude
+        for exclude in (gitignore_pattern(file, False) for file in exclude_files)
+        if exclude.endswith("/")
+    ]
+    for exclude in excludes:
+        # sparse patterns list what's checked out, so negations flip
+        if exclude.startswith("!"):
+            patterns.append(_any_case(exclude[1:]))
+        else:
+            patterns.append("!" + _any_case(exclude))
+    return patterns
+
+
+def _any_case(pattern: str) -> str:
+    """gitignore pattern matching in any case, like the lowercased path filter"""
+    glob = "!" if pattern.startswith("!") else ""
+    idx = len(glob)
+    while idx < len(pattern):
+        char = pattern[idx]
+        end = pattern.find("]", idx + 2) if char == "[" else -1
+        if end != -1:
+            members = pattern[idx + 1 : end]
+            glob += f"[{members}{members.upper()}]"
+            idx = end
+        elif char == "\\" and idx + 1 < len(pattern):
+            idx += 1
+            glob += _any_case_literal(pattern[idx])
+        elif char in "*?/":
+            glob += char
+        else:
+            glob += _any_case_literal(char)
+        idx += 1
+    return glob
+
+
+def _any_case_literal(char: str) -> str:
+    if char.lower() != char.upper():
+        return f"[{char.lower()}{char.upper()}]"
+    if char in Constants.GLOB_SPECIAL:
+        return "\\" + char
+    return char
@@ -0,0 +1,355 @@
+"""contains FileScanner class, process pool worker functions"""
+
+import io
+import itertools
+import mmap
+import os
+import re
+from typing import IO, Any, Iterable, Iterator, Optional, Union
+from constants import Constants, FileSearchResults, Messages
+from matcher import create_matcher
+
+
+class FileScanner:
+    """used to search a single file, safe to send to worker processes"""
+
+    def __init__(self, engine: str, pattern: str, words: list[str]) -> None:
+        self.__engine = engine
+        self.__pattern = pattern
+        self.__matcher = create_matcher(engine, pattern, words)
+        # scanners for some of the words, built once per process
+        self.__subsets: dict[tuple[str, ...], FileScanner] = {}
+
+    def subset(self, words: tuple[str, ...]) -> "FileScanner":
+        """scanner searching only for given words"""
+        if words not in self.__subsets:
+            self.__subsets[words] = FileScanner(
+                self.__engine, self.__pattern, list(words)
+            )
+        return self.__subsets[words]
+
+    def scan(self, path: str) -> FileSearchResults:
+        """search file for all words"""
+        results = FileSearchResults(path)
+
+        read = None
+        if self.__matcher.buffer_pattern is not None:
+            read = self.__read_candidate_lines(path, results)
+        if read is None:
+            read = self.__read_file(path, results)
+        return self.__search(read, results)
+
+    def scan_data(self, path: str, data: bytes) -> FileSearchResults:
+        """search file contents for all words, path only used for results"""
+        results = FileSearchResults(path)
+
+        if self.__buffer_safe(data, results):
+            read = self.__buffer_candidate_lines(data)
+        else:
+            file = io.TextIOWrapper(
+                io.BytesIO(data), encoding=Constants.ENCODING, errors="ignore"
+            )
+            read = self.__read_lines(file, results)
+        return self.__search(read, results)
+
+    def scan_chunks(self, path: str, chunks: Iterator[bytes]) -> FileSearchResults:
+        """search file contents read in chunks for all words, path only used for
+        results, contents longer than a chunk read line by line
+        """
+        try:
+            first = next(chunks, b"")
+            second = next(chunks, None)
+        except OSError:
+            results = FileSearchResults(path)
+            results.error = Messages.READ_FAILED
+            return results
+        if second is None:
+            return self.scan_data(path, first)
+
+        results = FileSearchResults(path)
+        file = _text_stream(itertools.chain((first, second), chunks))
+        return self.__search(self.__read_stream(file, results), results)
+
+    def __search(
+        self, read: Iterable[tuple[int, str]], results: FileSearchResults
+    ) -> FileSearchResults:
+        hits: dict[int, list[tuple[int, str]]] = {}
+        previous = -1
+        for idx, line in read:
+            # segments of a long line share its index
+            segment = idx == previous
+            previous = idx
+            word_idxs = self.__matcher.search_line(line)
+            if not word_idxs:
+                continue
+            if segment or len(line) > Constants.MAX_PREVIEW_LENGTH:
+                line = Messages.LINE_TOO_LONG
+            match = (idx + 1, line)
+            for word_idx in word_idxs:
+                if word_idx not in hits:
+                    hits[word_idx] = []
+                elif segment and hits[word_idx][-1] == match:
+                    continue
+                hits[word_idx].append(match)
+        # lines read before a decoding failure aren't reported
+        if results.error:
+            return results
+
+        # word list order, same as searching one word at a time
+        for word_idx in sorted(hits):
+            word = self.__matcher.words[word_idx]
+            if not word in results.matches:
+                results.matches[word] = []
+            results.matches[word] += hits[word_idx]
+        return results
+
+    def __read_candidate_lines(
+        self, path: str, results: FileSearchResults
+    ) -> Optional[Iterable[tuple[int, str]]]:
+        """reads file as bytes, only decoding lines around literal hits, large
+        files mapped into memory until their lines are read
+
+        returns None if the file must be read line by line instead
+        """
+        try:
+            with open(path, "rb") as file:
+                if os.fstat(file.fileno()).st_size < Constants.MMAP_THRESHOLD:
+                    data = file.read()
+                    if not self.__buffer_safe(data, results):
+                        return None
+                    return self.__buffer_candidate_lines(data)
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            results.error = Messages.PATH_TOO_LONG
+            return []
+        except OSError:
+            results.error = Messages.READ_FAILED
+            return []
+        if not self.__buffer_safe(buffer, results):
+            buffer.close()
+            return None
+        return self.__mapped_candidate_lines(buffer)
+
+    def __buffer_safe(
+        self, buffer: Union[bytes, mmap.mmap], results: FileSearchResults
+    ) -> bool:
+        """whether lines around literal hits can be found in raw bytes"""
+        if self.__matcher.buffer_pattern is None:
+            return False
+        # decoding and lowercasing non-ascii text or splitting on lone carriage
+        # returns can't be reproduced on raw bytes
+        if Constants.NOT_BUFFER_SAFE.search(buffer):
+            return False
+        results.decoded = True
+        return True
+
+    def __mapped_candidate_lines(self, buffer: mmap.mmap) -> Iterator[tuple[int, str]]:
+        """candidate lines of mapped file, unmapped once read"""
+        with buffer:
+            yield from self.__buffer_candidate_lines(buffer)
+
+    def __buffer_candidate_lines(
+        self, buffer: Union[bytes, mmap.mmap]
+    ) -> Iterator[tuple[int, str]]:
+        """index and lowercased, stripped text of lines with literal hits,
+        comments left out, long lines in segments like the line by line read
+        """
+        pattern: re.Pattern = self.__matcher.buffer_pattern
+        newline = Constants.NEWLINE.encode()
+        size = Constants.LINE_SEGMENT_SIZE
+        line_idx = 0
+        counted = 0
+        pos = 0
+        while match := pattern.search(buffer, pos):
+            start = buffer.rfind(newline, 0, match.start()) + 1
+            end = buffer.find(newline, match.start())
+            if end == -1:
+                end = len(buffer)
+
+            line_idx += _count_lines(buffer, counted, start)
+            counted = start
+            # carriage returns before newlines aren't read as characters
+            length = end - start - (buffer[end - 1 : end] == b"\r")
+            if length >= size:
+                # memory stays bounded for long lines
+                file = _text_stream(_slices(buffer, start, end))
+                yield from self.__read_segments(file, line_idx, file.readline(size))
+            else:
+                line = buffer[start:end].decode(Constants.ENCODING).lower().strip()
+                if not line.startswith(Constants.COMMENT_PREFIXES):
+                    yield (line_idx, line)
+            pos = end + 1
+
+    def __read_file(
+        self, path: str, results: FileSearchResults
+    ) -> Iterator[tuple[int, str]]:
+        try:
+            with open(path, "r", encoding=Constants.ENCODING, errors="ignore") as file:
+                yield from self.__read_lines(file, results)
+        except FileNotFoundError:
+            results.error = Messages.PATH_TOO_LONG
+        except OSError:
+            results.error = Messages.READ_FAILED
+
+    @staticmethod
+    def __read_stream(
+        file: IO[str], results: FileSearchResults
+    ) -> Iterator[tuple[int, str]]:
+        try:
+            yield from FileScanner.__read_lines(file, results)
+        except OSError:
+            results.error = Messages.READ_FAILED
+
+    @staticmethod
+    def __read_lines(
+        file: IO[str], results: FileSearchResults
+    ) -> Iterator[tuple[int, str]]:
+        """index and lowercased, stripped text of lines read one at a time,
+        comments left out, lines longer than a segment read in segments
+        """
+        size = Constants.LINE_SEGMENT_SIZE
+        try:
+            idx = 0
+            while segment := file.readline(size):
+                if len(segment) < size or segment.endswith(Constants.NEWLINE):
+                    line = segment.lower().strip()
+                    if not line.startswith(Constants.COMMENT_PREFIXES):
+                        yield (idx, line)
+                else:
+                    yield from FileScanner.__read_segments(file, idx, segment)
+                idx += 1
+            results.decoded = True
+        except (UnicodeDecodeError, UnicodeError):
+            results.error = Messages.DECODING_FAILED
+
+    @staticmethod
+    def __read_segments(
+        file: IO[str], idx: int, segment: str
+    ) -> Iterator[tuple[int, str]]:
+        """overlapping lowercased segments of line with index, starting with its
+        first segment, so matches shorter than the overlap aren't cut, nothing
+        for comments
+
+        segments are cut next to non-word characters unless word characters
+        run on for longer than the overlap
+        """
+        size = Constants.LINE_SEGMENT_SIZE
+        overlap = Constants.LINE_SEGMENT_OVERLAP
+        prefix_length = max(len(prefix) for prefix in Constants.COMMENT_PREFIXES)
+        text = ""
+        # unknown until leading whitespace is passed
+        comment: Optional[bool] = None
+        while True:
+            complete = len(segment) < size or segment.endswith(Constants.NEWLINE)
+            if comment is None:
+                text = (text + segment.lower()).lstrip()
+                if len(text) >= prefix_length or complete:
+                    comment = text.startswith(Constants.COMMENT_PREFIXES)
+            elif not comment:
+                text += segment.lower()
+
+            if comment is False and complete:
+                yield (idx, text.rstrip())
+            elif comment is False and len(text) > 2 * overlap:
+                # segment ends after a non-word character and the next starts
+                # at one, keeping what word boundary checks look at
+                end = _last_non_word(text, len(text) - overlap)
+                cut = len(text) if end == -1 else end + 1
+                yield (idx, text[:cut])
+                start = _first_non_word(text, cut - overlap)
+                text = text[cut - overlap if start == -1 else start :]
+            if complete:
+                return
+            segment = file.readline(size)
+
+
+def _count_lines(buffer: Union[bytes, mmap.mmap], start: int, end: int) -> int:
+    """newlines in buffer range, counted in bounded slices since mmap has no
+    count
+    """
+    newline = Constants.NEWLINE.encode()
+    return sum(
+        buffer[pos : min(pos + Constants.READ_CHUNK_SIZE, end)].count(newline)
+        for pos in range(start, end, Constants.READ_CHUNK_SIZE)
+    )
+
+
+def _slices(buffer: Union[bytes, mmap.mmap], start: int, end: int) -> Iterator[bytes]:
+    """buffer range in bounded slices"""
+    for pos in range(start, end, Constants.READ_CHUNK_SIZE):
+        yield buffer[pos : min(pos + Constants.READ_CHUNK_SIZE, end)]
+
+
+def _text_stream(chunks: Iterator[bytes]) -> IO[str]:
+    """text read from chunks in order, undecodable bytes left out"""
+    return io.TextIOWrapper(
+        io.BufferedReader(_ChunkReader(chunks)),
+        encoding=Constants.ENCODING,
+        errors="ignore",
+    )
+
+
+class _ChunkReader(io.RawIOBase):
+    """raw stream of bytes read from chunks in order"""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        super().__init__()
+        self.__chunks = chunks
+        # rest of the chunk being read
+        self.__chunk = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self.__chunk:
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                return 0
+            self.__chunk = memoryview(chunk)
+        size = min(len(buffer), len(self.__chunk))
+        buffer[:size] = self.__chunk[:size]
+        self.__chunk = self.__chunk[size:]
+        return size
+
+
+def _first_non_word(text: str, start: int) -> int:
+    """index of first non-word character from start, -1 if none"""
+    for pos in range(start, len(text)):
+        if text[pos] not in Constants.WORD_CHARACTERS:
+            return pos
+    return -1
+
+
+def _last_non_word(text: str, start: int) -> int:
+    """index of last non-word character from start, -1 if none"""
+    for pos in range(len(text) - 1, start - 1, -1):
+        if text[pos] not in Constants.WORD_CHARACTERS:
+            return pos
+    return -1
+
+
+# scanner set once per worker process by the pool initializer
+_WORKER_SCANNER: Optional[FileScanner] = None
+
+
+def init_worker(scanner: FileScanner) -> None:
+    """stores scanner in worker process"""
+    global _WORKER_SCANNER  # pylint: disable=global-statement
+    _WORKER_SCANNER = scanner
+
+
+def scan_batch(
+    items: list[tuple[str, Optional[bytes], tuple[str, ...]]],
+) -> list[FileSearchResults]:
+    """search batch of files in worker process, contents read from path if None,
+    only for given words unless empty
+    """
+    assert _WORKER_SCANNER is not None
+    results = []
+    for path, data, words in items:
+        scanner = _WORKER_SCANNER.subset(words) if words else _WORKER_SCANNER
+        results.append(
+            scanner.scan(path) if data is None else scanner.scan_data(path, data)
+        )
+    return results
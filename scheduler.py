@@ -0,0 +1,86 @@
+"""contains UpdateScheduler, UpdatePipeline classes"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+from logger import LoggingManager
+from constants import Messages
+from repository import ADORepository
+
+
+class UpdateScheduler:
+    """used to update repo branches concurrently, limiting updates per host"""
+
+    def __init__(self, logger: LoggingManager, workers: int, host_limit: int) -> None:
+        self.__logger = logger
+        self.__executor = ThreadPoolExecutor(max_workers=workers)
+        self.__host_limit = host_limit
+        self.__host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self.__lock = threading.Lock()
+
+    def submit(self, repo: ADORepository, branch: str) -> Future:
+        """schedules branch update, future resolves to update_branch result"""
+        return self.__executor.submit(self.__update, repo, branch)
+
+    def shutdown(self) -> None:
+        """waits for running updates, cancels pending ones"""
+        self.__executor.shutdown(cancel_futures=True)
+
+    def __update(self, repo: ADORepository, branch: str) -> tuple[bool, float]:
+        with self.__host_semaphore(repo):
+            self.__logger.info(Messages.UPDATING.format(repo=repo.name, branch=branch))
+            return repo.update_branch(branch)
+
+    def __host_semaphore(self, repo: ADORepository) -> threading.BoundedSemaphore:
+        host = (urlparse(repo.url).hostname or "") if repo.url else ""
+        with self.__lock:
+            if host not in self.__host_semaphores:
+                self.__host_semaphores[host] = threading.BoundedSemaphore(
+                    self.__host_limit
+                )
+            return self.__host_semaphores[host]
+
+
+class UpdatePipeline:
+    """prefetches branch updates a bounded number of branches ahead of the search"""
+
+    def __init__(
+        self,
+        scheduler: UpdateScheduler,
+        branches: list[tuple[ADORepository, str]],
+        depth: int,
+    ) -> None:
+        self.__scheduler = scheduler
+        self.__depth = depth
+        # branches needing update, in search order
+        self.__pending = deque(branches)
+        self.__scheduled = {(repo.name, branch) for repo, branch in branches}
+        self.__prefetched: dict[tuple[str, str], Future] = {}
+        self.__fill()
+
+    def scheduled(self, repo: ADORepository, branch: str) -> bool:
+        """whether branch update is handled by the pipeline"""
+        return (repo.name, branch) in self.__scheduled
+
+    def update_branch(self, repo: ADORepository, branch: str) -> tuple[bool, float]:
+        """waits for prefetched branch update, updates inline if not scheduled"""
+        key = (repo.name, branch)
+        if key not in self.__scheduled:
+            return repo.update_branch(branch)
+
+        while key not in self.__prefetched:
+            self.__submit_next()
+        future = self.__prefetched.pop(key)
+        self.__scheduled.discard(key)
+        # keep updater busy while this branch is searched
+        self.__fill()
+        return future.result()
+
+    def __fill(self) -> None:
+        while self.__pending and len(self.__prefetched) < self.__depth:
+            self.__submit_next()
+
+    def __submit_next(self) -> None:
+        repo, branch = self.__pending.popleft()
+        self.__prefetched[(repo.name, branch)] = self.__scheduler.submit(repo, branch)
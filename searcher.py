@@ -1,14 +1,26 @@
 """contains RepositorySearcher class"""
 
+import logging
 import os
-import re
+import posixpath
 import time
-from typing import Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
 from config import ConfigurationManager
-from constants import BranchSearchResults, Constants, Messages
+from constants import BranchSearchResults, Constants, FileSearchResults, Messages
 from logger import LoggingManager
+from scanner import FileScanner, init_worker, scan_batch
 from writer import ResultsWriter
 from repository import ADORepository
+from scheduler import UpdatePipeline, UpdateScheduler
+from state import SearchStateStore, list_hash
+from cache import MatchCache
+from classifier import ContentClassifier
+from index import TrigramIndex
+from pack import BranchPack
+from pathfilter import PathFilter
+from walker import BranchWalker
 
 
 # pylint: disable=too-many-instance-attributes, too-few-public-methods
@@ -28,29 +40,141 @@ class RepositorySearcher:
             Constants.BRANCH_UPDATES_FILE.config_key()
         )
         self.__words: list[str] = config.get_list(Constants.WORDS_FILE.config_key())
-        self.__exclude_folders = config.get_list(
-            Constants.EXCLUDE_FOLDERS_FILE.config_key()
+        exclude_folders = config.get_list(Constants.EXCLUDE_FOLDERS_FILE.config_key())
+        exclude_files = config.get_list(Constants.EXCLUDE_FILES_FILE.config_key())
+        include_files = config.get_list(Constants.INCLUDE_FILES_FILE.config_key())
+        self.__path_filter = PathFilter(exclude_folders, exclude_files, include_files)
+        self.__enumerate = config.get_str(
+            Constants.ENUMERATE_KEY, Constants.WALK_ENUMERATION
         )
-        self.__exclude_files = config.get_list(
-            Constants.EXCLUDE_FILES_FILE.config_key()
+        self.__walker = BranchWalker(
+            self.__path_filter, config.get_bool(Constants.INODE_ORDER_KEY)
         )
         self.__repos: list[ADORepository] = config.get_list(Constants.REPOS_KEY)
         self.__pattern = config.get_str(Constants.PATTERN_KEY)
+        self.__scanner = FileScanner(
+            config.get_str(Constants.ENGINE_KEY, Constants.REGEX_ENGINE),
+            self.__pattern,
+            self.__words,
+        )
+        self.__workers = config.get_int(Constants.WORKERS_KEY, 1)
+        self.__pool: Optional[ProcessPoolExecutor] = None
+        self.__git_workers = config.get_int(Constants.GIT_WORKERS_KEY, 1)
+        self.__host_limit = config.get_int(Constants.HOST_LIMIT_KEY, 1)
+        self.__prefetch = config.get_int(Constants.PREFETCH_KEY, 0)
+        self.__pipeline: Optional[UpdatePipeline] = None
+        self.__full_search = config.get_bool(Constants.FULL_SEARCH_KEY)
+        # empty entries keep folder and file excludes and includes apart
+        excludes = [*exclude_folders, "", *exclude_files, "", *include_files]
+        max_file_size = config.get_int(Constants.MAX_FILE_SIZE_KEY, 0)
+        self.__classifier = ContentClassifier(
+            logger, max_file_size * Constants.BYTES_IN_MB
+        )
+        # files too large aren't searched either, walks don't depend on it
+        searched_excludes = [*excludes, "", str(max_file_size)]
+        self.__state_store = SearchStateStore(
+            logger, self.__pattern, self.__words, searched_excludes
+        )
+        self.__match_cache = MatchCache(
+            logger, self.__pattern, self.__words, searched_excludes
+        )
+        self.__pack = config.get_bool(Constants.PACK_KEY)
+        self.__counts_only = config.get_bool(Constants.COUNTS_ONLY_KEY)
+        # packs hold the listed files
+        self.__excludes_hash = list_hash([*excludes, "", self.__enumerate])
+        # custom patterns can match text around words, or without them
+        self.__index = config.get_bool(Constants.INDEX_KEY) and self.__pattern in (
+            Constants.NO_PATTERN.pattern,
+            Constants.DB_TABLE_PATTERN.pattern,
+        )
 
     def search(self) -> None:
         """search target repos and branches"""
         self.__logger.info(Messages.SEARCHING)
 
-        for idx, repo in enumerate(self.__repos):
-            self.__logger.info(
-                Messages.SEARCHING_REPO.format(
-                    name=repo.name, idx=idx + 1, total=len(self.__repos)
-                )
+        if self.__workers > 1:
+            # scanner is sent to each worker once, not with every batch
+            self.__pool = ProcessPoolExecutor(
+                max_workers=self.__workers,
+                initializer=init_worker,
+                initargs=(self.__scanner,),
+            )
+
+        scheduler = None
+        if not self.__offline and (self.__git_workers > 1 or self.__prefetch > 0):
+            # every branch is checked up front, otherwise just before its update
+            self.__load_remote_heads()
+            # updates run ahead of the search, bounded so disk use stays flat
+            scheduler = UpdateScheduler(
+                self.__logger, self.__git_workers, self.__host_limit
+            )
+            self.__pipeline = UpdatePipeline(
+                scheduler,
+                [
+                    (repo, branch)
+                    for repo in self.__repos
+                    for branch in repo.branches
+                    if self.__check_update(repo, branch)[0]
+                ],
+                max(self.__prefetch, self.__git_workers),
             )
-            self.__search_repo(repo)
+
+        try:
+            for idx, repo in enumerate(self.__repos):
+                self.__logger.info(
+                    Messages.SEARCHING_REPO.format(
+                        name=repo.name, idx=idx + 1, total=len(self.__repos)
+                    )
+                )
+                self.__search_repo(repo)
+        finally:
+            if scheduler is not None:
+                scheduler.shutdown()
+                self.__pipeline = None
+            if self.__pool is not None:
+                self.__pool.shutdown()
+                self.__pool = None
+            self.__match_cache.close()
+            self.__classifier.close()
+
+    def __load_remote_heads(self) -> None:
+        """lists remote branch heads of all repos concurrently, one ls-remote
+        per repo, kept by each repo for its fetch
+        """
+        with ThreadPoolExecutor(max_workers=self.__git_workers) as executor:
+            list(executor.map(ADORepository.remote_heads, self.__repos))
+
+    def __branch_update(self, repo: ADORepository, branch: str) -> dict:
+        try:
+            return self.__branch_updates[repo.name][branch]
+        except KeyError:
+            return {}
+
+    def __check_update(self, repo: ADORepository, branch: str) -> tuple[bool, str]:
+        """whether branch needs update, with reason"""
+        branch_update = self.__branch_update(repo, branch)
+        commit = branch_update.get(Constants.COMMIT_KEY)
+        remote_commit = repo.remote_heads().get(branch)
+        if commit and remote_commit and repo.branch_exists(branch):
+            if remote_commit == commit:
+                return (False, Messages.REMOTE_UNCHANGED)
+            return (True, Messages.REMOTE_CHANGED)
+
+        update_time = branch_update.get(
+            Constants.LAST_UPDATE_KEY, Constants.DEFAULT_TIME
+        )
+        if time.time() - update_time > Constants.SECONDS_IN_DAY:
+            return (True, Messages.UPDATE_NEEDED)
+        return (False, Messages.UP_TO_DATE)
+
+    def __update_branch(self, repo: ADORepository, branch: str) -> tuple[bool, float]:
+        if self.__pipeline is None:
+            return repo.update_branch(branch)
+        return self.__pipeline.update_branch(repo, branch)
 
     def __search_repo(self, repo: ADORepository) -> None:
         self.__writer.write_repo_start(repo.name)
+        index = TrigramIndex(self.__logger, repo.name) if self.__index else None
 
         for idx, branch in enumerate(repo.branches):
             self.__logger.info(
@@ -59,129 +183,580 @@ class RepositorySearcher:
                 )
             )
 
-            try:
-                update_time = self.__branch_updates[repo.name][branch]
-            except KeyError:
-                update_time = Constants.DEFAULT_TIME
+            update_time = self.__branch_update(repo, branch).get(
+                Constants.LAST_UPDATE_KEY, Constants.DEFAULT_TIME
+            )
 
             if not self.__offline:
-                if time.time() - update_time > Constants.SECONDS_IN_DAY:
+                needed, reason = self.__check_update(repo, branch)
+                if (
+                    not needed
+                    and self.__pipeline is not None
+                    and self.__pipeline.scheduled(repo, branch)
+                ):
+                    # already being updated by the pipeline
+                    needed, reason = (True, Messages.UPDATE_NEEDED)
+                self.__logger.info(reason)
+
+                if needed:
                     # update
-                    self.__logger.info(Messages.UPDATE_NEEDED)
-                    result, timestamp = repo.update_branch(branch)
+                    result, timestamp = self.__update_branch(repo, branch)
 
                     if result:
-                        # populate timestamp
+                        # populate timestamp and synced commit
                         if repo.name not in self.__branch_updates:
                             self.__branch_updates[repo.name] = {}
-                        self.__branch_updates[repo.name][branch] = timestamp
+                        self.__branch_updates[repo.name][branch] = {
+                            Constants.LAST_UPDATE_KEY: timestamp,
+                            Constants.COMMIT_KEY: repo.head_commit(branch),
+                        }
 
                     else:
                         # skip search
-                        self.__skip_branch(Messages.UPDATE_FAILED)
+                        self.__skip_branch(branch, Messages.UPDATE_FAILED)
                         continue
 
-                else:
-                    # skip update
-                    self.__logger.info(Messages.UP_TO_DATE)
-
             elif update_time == -1:
-                self.__skip_branch(Messages.NO_LOCAL)
+                self.__skip_branch(branch, Messages.NO_LOCAL)
                 continue
 
             if not self.__words:
-                self.__skip_branch(Messages.NO_SEARCH)
+                self.__skip_branch(branch, Messages.NO_SEARCH)
                 continue
 
-            results = self.__search_branch(branch, repo)
+            results = self.__search_branch(branch, repo, index)
             if results:
                 self.__writer.write_branch_results(repo.name, branch, results)
 
-    def __skip_branch(self, msg: str) -> None:
+        repo.close()
+        if index is not None:
+            index.close()
+
+    def __skip_branch(self, branch: str, msg: str) -> None:
         self.__logger.error(msg)
-        self.__writer.write_branch_skip(msg)
+        self.__writer.write_branch_skip(branch, msg)
 
+    # pylint: disable=too-many-locals, too-many-branches, too-many-statements
     def __search_branch(
-        self, branch: str, repo: ADORepository
+        self, branch: str, repo: ADORepository, index: Optional[TrigramIndex]
     ) -> Optional[BranchSearchResults]:
         self.__writer.write_branch_start(branch)
 
         path = os.path.join(repo.path, branch)
-        if not os.path.exists(path):
+        if not repo.branch_exists(branch):
             self.__logger.error(Messages.BAD_PATH)
             return None
 
-        results = BranchSearchResults()
-        for root, dirs, files in os.walk(path):
-            skip_dirs = [dir for dir in dirs if dir.lower() in self.__exclude_folders]
-            skip_files = [
-                file
-                for file in files
-                if file.lower().endswith(tuple(self.__exclude_files))
-            ]
+        results = BranchSearchResults(self.__counts_only)
+        commit = repo.head_commit(branch)
+        pack = None
+        # reads contents of file sources, blobs of object store or branch pack,
+        # whole to send small ones to workers, in chunks otherwise
+        read: Callable[[str], bytes] = repo.blob_data
+        read_chunks: Callable[[str], Iterator[bytes]] = repo.blob_chunks
+        read_size: Callable[[str], Optional[int]] = repo.blob_size
+        if repo.backend == Constants.OBJECT_BACKEND:
+            tree = repo.tree_entries(commit)
+            if tree is None:
+                self.__logger.error(Messages.BAD_PATH)
+                return None
+            blobs = {
+                rel_path: sha
+                for mode, _, sha, rel_path in tree
+                if mode in Constants.REGULAR_FILE_MODES
+            }
+            # nothing checked out, so nothing changed locally
+            complete = True
+            files = self.__walk_tree(repo, tree, path, results)
+        else:
+            blobs, complete, pristine = self.__clean_blobs(repo, branch, commit)
+            if self.__pack and pristine:
+                pack = self.__load_pack(repo, branch, commit, path, blobs)
+            if pack is None:
+                files = (
+                    (file_path, "")
+                    for file_path in self.__walk_branch(repo, branch, path, results)
+                )
+            else:
+                files = pack.walk(path, results)
+                read = pack.read
+                read_chunks = pack.chunks
+                read_size = pack.size
 
-            results.skipped_folders += [
-                os.path.join(root, dir) + os.sep for dir in skip_dirs
-            ]
-            results.skipped_files += [os.path.join(root, file) for file in skip_files]
+        state, unchanged = self.__load_state(repo, branch, commit, blobs)
+        known, partial = self.__load_known(commit, blobs)
+        ruled_out: set[str] = set()
+        fetched: set[str] = set()
+        if index is not None:
+            files = list(files)
+            ruled_out, fetched = self.__index_branch(
+                index, repo, branch, path, files, blobs, read_chunks
+            )
+        if repo.backend == Constants.OBJECT_BACKEND and repo.blob_filter:
+            # download blobs to read at once, previously searched ones never
+            files = list(files)
+            missing = set()
+            for file_path, source in files:
+                rel_path = os.path.relpath(file_path, path).replace(os.sep, "/")
+                if not (
+                    source in fetched
+                    or rel_path in ruled_out
+                    or self.__is_cached(rel_path, blobs, state, unchanged, known)
+                ):
+                    missing.add(source)
+            repo.fetch_blobs(sorted(missing))
+        # matches of blobs scanned in this search, to be cached
+        scanned: dict[str, dict] = {}
+        pending: set[str] = set()
 
-            # prune search tree
-            dirs[:] = [dir for dir in dirs if dir not in skip_dirs]
-            files[:] = [file for file in files if file not in skip_files]
+        searched: dict[str, FileSearchResults] = {}
+        # pool results are merged in walk order, None until then, with blob SHA
+        # and whether an earlier file with the same blob is being scanned
+        entries: list[tuple[str, str, str, Optional[FileSearchResults], str, bool]] = []
+        # small batches keep all workers busy on large branches, results of
+        # the oldest collected once a few per worker are queued
+        batches: deque[Future] = deque()
+        pool_results: list[FileSearchResults] = []
+        batch: list[tuple[str, Optional[bytes], tuple[str, ...]]] = []
+        # source is the blob to read for the object backend, empty for checkouts
+        for file_path, source in files:
+            rel_path = os.path.relpath(file_path, path).replace(os.sep, "/")
+            blob = blobs.get(rel_path, "")
+            file_results = None
+            duplicate = False
+            if state is not None and rel_path in unchanged:
+                file_results = SearchStateStore.cached_results(
+                    state, rel_path, file_path
+                )
+            elif blob in known:
+                file_results = MatchCache.cached_results(known[blob], file_path)
+            elif rejected := self.__rejection(
+                repo, file_path, rel_path, source or blob
+            ):
+                # before the index, so results don't depend on it
+                file_results = FileSearchResults(file_path)
+                file_results.rejected = rejected
+            elif rel_path in ruled_out:
+                # indexed content was decoded like a scan would
+                file_results = MatchCache.cached_results({}, file_path)
+            elif self.__pool is None:
+                file_results = self.__scan(
+                    read_chunks, file_path, source, partial.get(blob, ())
+                )
+                self.__merge_partial(blob, file_results, partial)
+            elif blob in pending:
+                duplicate = True
+            elif source and self.__streamed(read_size(source)):
+                # large blobs are never held whole or queued for workers
+                file_results = self.__scan(
+                    read_chunks, file_path, source, partial.get(blob, ())
+                )
+                self.__merge_partial(blob, file_results, partial)
+                self.__add_blob_results(blob, file_results, known, scanned)
+            else:
+                if blob:
+                    # copies wait for this scan, so content is searched once
+                    pending.add(blob)
+                batch.append(
+                    (
+                        file_path,
+                        read(source) if source else None,
+                        # blobs searched before only for words added since
+                        partial.get(blob, ()),
+                    )
+                )
+                if len(batch) == Constants.BATCH_SIZE:
+                    batches.append(self.__pool.submit(scan_batch, batch))
+                    batch = []
+                if len(batches) > Constants.BATCHES_PER_WORKER * self.__workers:
+                    pool_results += batches.popleft().result()
 
-            results.folders += [os.path.join(root, dir) for dir in dirs]
+            if self.__pool is None:
+                assert file_results is not None
+                self.__add_file_results(rel_path, file_results, results, searched)
+                self.__add_blob_results(blob, file_results, known, scanned)
+            else:
+                entries.append(
+                    (rel_path, file_path, source, file_results, blob, duplicate)
+                )
 
-            for file in files:
-                file_path = os.path.join(root, file)
-                self.__logger.info(Messages.FILE.format(path=file_path), stdout=False)
-                self.__search_file(file_path, results)
+        if batch and self.__pool is not None:
+            batches.append(self.__pool.submit(scan_batch, batch))
 
+        # merge in walk order so output matches a sequential search
+        pool_results += (
+            file_results for future in batches for file_results in future.result()
+        )
+        pool_iter = iter(pool_results)
+        for rel_path, file_path, source, file_results, blob, duplicate in entries:
+            if duplicate and blob in known:
+                file_results = MatchCache.cached_results(known[blob], file_path)
+            elif duplicate:
+                # first copy failed, scan this one for its own error
+                file_results = self.__scan(read_chunks, file_path, source)
+            elif file_results is None:
+                file_results = next(pool_iter)
+                self.__merge_partial(blob, file_results, partial)
+                self.__add_blob_results(blob, file_results, known, scanned)
+            self.__add_file_results(rel_path, file_results, results, searched)
+
+        if commit:
+            # results of locally changed files can't be tied to the commit
+            if complete:
+                self.__state_store.save(repo.name, branch, commit, searched)
+            self.__match_cache.save(
+                commit if complete else "", blobs, searched, scanned
+            )
+        self.__classifier.save()
+        if pack is not None:
+            pack.close()
         return results
 
-    def __search_file(self, file_path: str, results: BranchSearchResults) -> None:
-        result, lines = self.__read_file(file_path)
-        if not result:
-            results.errors.append(file_path)
-        results.files.append(file_path)
-        if not lines:
-            return
+    @staticmethod
+    def __is_cached(
+        rel_path: str,
+        blobs: dict[str, str],
+        state: Optional[dict],
+        unchanged: set[str],
+        known: dict[str, dict],
+    ) -> bool:
+        """whether file results are reused instead of scanned"""
+        return (state is not None and rel_path in unchanged) or blobs.get(
+            rel_path, ""
+        ) in known
 
-        for word in self.__words:
-            pattern = self.__pattern.format(word=word)
-            for idx, line in enumerate(lines):
-                if re.search(pattern, line):
-                    if len(line) > Constants.MAX_PREVIEW_LENGTH:
-                        line = Messages.LINE_TOO_LONG
-                    formatted_line = Messages.LINE.format(idx=idx + 1, line=line)
-                    self.__logger.info(
-                        Messages.MATCH.format(word=word, line=formatted_line),
-                        stdout=False,
-                    )
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def __index_branch(
+        self,
+        index: TrigramIndex,
+        repo: ADORepository,
+        branch: str,
+        path: str,
+        files: list[tuple[str, str]],
+        blobs: dict[str, str],
+        read_chunks: Callable[[str], Iterator[bytes]],
+    ) -> tuple[set[str], set[str]]:
+        """indexes branch files not indexed before, returns paths relative to
+        branch of files that can't contain search words, and blobs downloaded
+        to be indexed
+        """
+        # content keys, blob of clean checkout files or of object store files
+        keys: dict[str, str] = {}
+        sources: dict[str, tuple[str, str]] = {}
+        for file_path, source in files:
+            rel_path = os.path.relpath(file_path, path).replace(os.sep, "/")
+            key = self.__content_key(
+                file_path, rel_path, source or blobs.get(rel_path, "")
+            )
+            # left out of index if missing, so always scanned
+            if key is not None:
+                keys[rel_path] = key
+                sources[rel_path] = (file_path, source)
+
+        fetched = set()
+        if repo.blob_filter and repo.backend == Constants.OBJECT_BACKEND:
+            fetched = {sources[rel_path][1] for rel_path in index.unindexed(keys)}
+            repo.fetch_blobs(sorted(fetched))
+
+        def read_file(file_path: str) -> Iterator[bytes]:
+            with open(file_path, "rb") as file:
+                while chunk := file.read(Constants.READ_CHUNK_SIZE):
+                    yield chunk
 
-                    if not file_path in results.matches:
-                        results.matches[file_path] = {}
-                    if not word in results.matches[file_path]:
-                        results.matches[file_path][word] = []
-                    results.matches[file_path][word].append(formatted_line)
+        def read(rel_path: str) -> Optional[Iterator[bytes]]:
+            file_path, source = sources[rel_path]
+            # rejected files are never scanned, so never indexed
+            if self.__rejection(
+                repo, file_path, rel_path, source or blobs.get(rel_path, "")
+            ):
+                return None
+            return read_chunks(source) if source else read_file(file_path)
 
-    def __read_file(self, path: str) -> tuple[bool, list[str]]:
-        lines = []
+        if not index.update(branch, keys, read):
+            return (set(), fetched)
+        ruled_out = index.ruled_out(self.__words)
+        if ruled_out is None:
+            return (set(), fetched)
+        self.__logger.info(Messages.INDEX_RULED_OUT.format(count=len(ruled_out)))
+        return (ruled_out, fetched)
+
+    @staticmethod
+    def __content_key(file_path: str, rel_path: str, sha: str) -> Optional[str]:
+        """key of blob contents, or of checkout file by path, size and times,
+        None if file is missing
+        """
+        if sha:
+            return Constants.CONTENT_BLOB_KEY.format(sha=sha)
         try:
-            with open(path, "r", encoding=Constants.ENCODING, errors="ignore") as file:
-                lines = [line.lower().strip() for line in file.readlines()]
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return Constants.CONTENT_STAT_KEY.format(
+            path=rel_path,
+            size=stat.st_size,
+            mtime=stat.st_mtime_ns,
+            ctime=stat.st_ctime_ns,
+        )
+
+    def __rejection(
+        self, repo: ADORepository, file_path: str, rel_path: str, sha: str
+    ) -> str:
+        """reason file isn't searched, from its size and first bytes before the
+        full read, empty if it's searched
+        """
+        key = self.__content_key(file_path, rel_path, sha)
+        if key is None:
+            return ""
+        if repo.backend == Constants.OBJECT_BACKEND:
+            # the scan reads the rest of the blob
+            return self.__classifier.skip_reason(
+                key,
+                lambda: repo.blob_size(sha),
+                lambda: repo.blob_head(sha, Constants.SNIFF_SIZE),
+            )
+
+        def read_size() -> Optional[int]:
+            try:
+                return os.path.getsize(file_path)
+            except OSError:
+                return None
+
+        def read_head() -> Optional[bytes]:
+            try:
+                with open(file_path, "rb") as file:
+                    return file.read(Constants.SNIFF_SIZE)
+            except OSError:
+                return None
+
+        return self.__classifier.skip_reason(key, read_size, read_head)
+
+    def __scan(
+        self,
+        read_chunks: Callable[[str], Iterator[bytes]],
+        file_path: str,
+        source: str,
+        words: tuple[str, ...] = (),
+    ) -> FileSearchResults:
+        """searches file for all words, or only for given ones"""
+        scanner = self.__scanner.subset(words) if words else self.__scanner
+        if source:
+            return scanner.scan_chunks(file_path, read_chunks(source))
+        return scanner.scan(file_path)
+
+    @staticmethod
+    def __streamed(size: Optional[int]) -> bool:
+        """whether blob is read in chunks here instead of sent whole to
+        workers, blobs of unknown size fail to be read here
+        """
+        return size is None or size > Constants.READ_CHUNK_SIZE
+
+    def __merge_partial(
+        self,
+        blob: str,
+        file_results: FileSearchResults,
+        partial: dict[str, tuple[str, ...]],
+    ) -> None:
+        """adds stored matches of words blob was searched for before"""
+        if blob in partial and not file_results.error:
+            file_results.matches = self.__match_cache.merge(blob, file_results.matches)
+
+    @staticmethod
+    def __add_blob_results(
+        blob: str,
+        file_results: FileSearchResults,
+        known: dict[str, dict],
+        scanned: dict[str, dict],
+    ) -> None:
+        """remembers matches of scanned blob, errors depend on path so aren't,
+        rejected blobs weren't scanned
+        """
+        if (
+            blob
+            and blob not in known
+            and not file_results.error
+            and not file_results.rejected
+        ):
+            known[blob] = file_results.matches
+            scanned[blob] = file_results.matches
+
+    def __clean_blobs(
+        self, repo: ADORepository, branch: str, commit: str
+    ) -> tuple[dict[str, str], bool, bool]:
+        """blob SHAs of tracked files without local changes, whether that's all,
+        and whether the checkout has no other files either
+        """
+        if not commit:
+            return ({}, False, False)
+        tracked = repo.tracked_blobs(branch)
+        changes = repo.local_changes(branch)
+        if tracked is None or changes is None:
+            return ({}, False, False)
+        blobs = {path: blob for path, blob in tracked.items() if path not in changes}
+        return (blobs, len(blobs) == len(tracked), not changes)
+
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    def __load_pack(
+        self,
+        repo: ADORepository,
+        branch: str,
+        commit: str,
+        path: str,
+        blobs: dict[str, str],
+    ) -> Optional[BranchPack]:
+        """branch pack at commit, packing new contents first if needed"""
+        pack = BranchPack(self.__logger, repo.name, branch, self.__excludes_hash)
+        if pack.load(commit):
+            return pack
+        self.__logger.info(Messages.PACKING)
+        walked = BranchSearchResults()
+        files = list(self.__walk_branch(repo, branch, path, walked))
+        if pack.update(
+            commit,
+            path,
+            files,
+            walked,
+            blobs,
+            lambda file_path, rel_path: self.__rejection(
+                repo, file_path, rel_path, blobs.get(rel_path, "")
+            ),
+        ):
+            return pack
+        return None
+
+    def __load_state(
+        self, repo: ADORepository, branch: str, commit: str, blobs: dict[str, str]
+    ) -> tuple[Optional[dict], set[str]]:
+        """previous search state and files unchanged since, None for full search"""
+        if self.__full_search or not commit:
+            return (None, set())
+
+        state = self.__state_store.load(repo.name, branch)
+        if state is None:
+            self.__logger.info(Messages.FULL_SEARCH)
+            return (None, set())
+
+        changed = repo.changed_since(branch, state[Constants.COMMIT_KEY], commit)
+        if changed is None:
+            self.__logger.info(Messages.FULL_SEARCH)
+            return (None, set())
+
+        unchanged = {path for path in blobs if path not in changed}
+        self.__logger.info(
+            Messages.INCREMENTAL_SEARCH.format(
+                count=len(unchanged), commit=state[Constants.COMMIT_KEY]
+            )
+        )
+        return (state, unchanged)
+
+    def __load_known(
+        self, commit: str, blobs: dict[str, str]
+    ) -> tuple[dict[str, dict], dict[str, tuple[str, ...]]]:
+        """previously searched blob matches keyed by blob SHA, and words added
+        since other blobs were searched
+        """
+        if self.__full_search:
+            return ({}, {})
+        known, partial = self.__match_cache.load(commit, blobs)
+        if known:
             self.__logger.info(
-                Messages.DECODING_SUCCESS.format(path=path), stdout=False
+                Messages.CACHED_SEARCH.format(
+                    count=sum(1 for blob in blobs.values() if blob in known)
+                )
             )
-            lines = [
-                "" if line.startswith(Constants.COMMENT_PREFIXES) else line
-                for line in lines
-            ]
-        except FileNotFoundError:
-            self.__logger.error(Messages.PATH_TOO_LONG.format(path=path), stdout=False)
-            return (False, lines)
-        except (UnicodeDecodeError, UnicodeError):
-            self.__logger.error(
-                Messages.DECODING_FAILED.format(path=path), stdout=False
+        if partial:
+            self.__logger.info(
+                Messages.PARTIAL_SEARCH.format(
+                    count=sum(1 for blob in blobs.values() if blob in partial)
+                )
             )
-            return (False, lines)
-        return (True, lines)
+        return (known, partial)
+
+    def __walk_branch(
+        self,
+        repo: ADORepository,
+        branch: str,
+        path: str,
+        results: BranchSearchResults,
+    ) -> Iterator[str]:
+        """paths of files to search, records searched and skipped folders"""
+        if self.__enumerate == Constants.TRACKED_ENUMERATION:
+            tracked = repo.tracked_files(branch)
+            if tracked is not None:
+                return self.__walker.tracked(path, tracked, results)
+        return self.__walker.walk(path, results)
+
+    def __walk_tree(
+        self,
+        repo: ADORepository,
+        tree: list[tuple[str, str, str, str]],
+        path: str,
+        results: BranchSearchResults,
+    ) -> Iterator[tuple[str, str]]:
+        """paths and blobs of files to search in object store tree, records
+        searched and skipped folders like a checkout walk
+        """
+        regular = {
+            rel_path: sha
+            for mode, _, sha, rel_path in tree
+            if mode in Constants.REGULAR_FILE_MODES
+        }
+        # subtrees follow their tree entry, so one skipped prefix at a time
+        skipped = None
+        for mode, _type, sha, rel_path in tree:
+            if skipped is not None and rel_path.startswith(skipped):
+                continue
+            folder = posixpath.dirname(rel_path)
+            full_path = os.path.join(path, *rel_path.split("/"))
+
+            if _type != Constants.BLOB_TYPE:
+                # trees and submodules, which checkouts leave as folders
+                if self.__path_filter.skip_folder(rel_path):
+                    results.skipped_folders.append(full_path + os.sep)
+                    skipped = rel_path + "/"
+                else:
+                    results.folders.append(full_path)
+                continue
+
+            if self.__path_filter.skip_file(rel_path):
+                results.skipped_files.append(full_path)
+                continue
+
+            if mode == Constants.SYMLINK_MODE:
+                # search link target when it's a file in the same tree
+                target = repo.blob_data(sha).decode(Constants.ENCODING, "replace")
+                sha = regular.get(posixpath.normpath(posixpath.join(folder, target)))
+                if sha is None:
+                    continue
+            yield (full_path, sha)
+
+    def __add_file_results(
+        self,
+        rel_path: str,
+        file_results: FileSearchResults,
+        results: BranchSearchResults,
+        searched: dict[str, FileSearchResults],
+    ) -> None:
+        path = file_results.path
+        file_logger = self.__logger.file_logger
+        if file_results.error or file_results.rejected or file_results.matches:
+            searched[rel_path] = file_results
+        self.__writer.write_file_results(file_results, not self.__counts_only)
+        if file_results.rejected:
+            file_logger.info(Messages.FILE_REJECTED, path, file_results.rejected)
+            results.rejected_files.append(path)
+            return
+        file_logger.debug(Messages.FILE, path)
+        if file_results.decoded:
+            file_logger.debug(Messages.DECODING_SUCCESS, path)
+        if file_results.error:
+            if file_logger.isEnabledFor(logging.ERROR):
+                file_logger.error(file_results.error.format(path=path))
+            results.errors.append(path)
+        results.files.append(path)
+
+        if file_logger.isEnabledFor(logging.INFO):
+            for word, lines in file_results.matches.items():
+                for number, preview in lines:
+                    file_logger.info(Messages.MATCH, word, number, preview)
+        if file_results.matches:
+            results.matches.add(path, file_results.matches)
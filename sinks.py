@@ -0,0 +1,228 @@
+"""contains JsonLinesSink, SqliteSink classes"""
+
+import gzip
+import json
+import os
+import sqlite3
+from typing import IO, Iterator, Union
+from constants import BranchSearchResults, Constants, FileSearchResults
+
+
+class JsonLinesSink:
+    """used to stream results as one JSON record per line, gzipped if chosen
+
+    match and status records of each file are written as the file is
+    searched, folder and skipped path records once the branch is done
+    """
+
+    def __init__(self, path: str, compressed: bool) -> None:
+        self.__file: IO[str]
+        if compressed:
+            self.__file = gzip.open(
+                os.path.join(path, Constants.JSONL_FILE + Constants.GZIP_EXTENSION),
+                "at",
+                encoding=Constants.ENCODING,
+            )
+        else:
+            # pylint: disable=consider-using-with
+            self.__file = open(
+                os.path.join(path, Constants.JSONL_FILE),
+                "a",
+                encoding=Constants.ENCODING,
+                buffering=Constants.WRITE_BUFFER_SIZE,
+            )
+
+    def write_branch_skip(self, repo: str, branch: str, reason: str) -> None:
+        """writes branch skip record"""
+        self.__write(
+            {
+                Constants.TYPE_KEY: Constants.SKIP_RECORD,
+                Constants.REPO_KEY: repo,
+                Constants.BRANCH_KEY: branch,
+                Constants.REASON_KEY: reason,
+            }
+        )
+
+    def write_file_results(
+        self, repo: str, branch: str, results: FileSearchResults, listed: bool
+    ) -> None:
+        """writes match and status records of file"""
+        for record in file_records(repo, branch, results, listed):
+            self.__write(record)
+
+    def write_branch_results(
+        self, repo: str, branch: str, results: BranchSearchResults
+    ) -> None:
+        """writes folder and skipped path records of branch, files were
+        written as searched
+        """
+        statuses = {
+            Constants.SKIPPED_FOLDER_STATUS: results.skipped_folders,
+            Constants.SKIPPED_FILE_STATUS: results.skipped_files,
+            Constants.FOLDER_STATUS: results.folders,
+        }
+        for status, paths in statuses.items():
+            for path in paths:
+                self.__write(_file_record(repo, branch, path, status))
+
+    def flush(self) -> None:
+        """flushes written records"""
+        self.__file.flush()
+
+    def close(self) -> None:
+        """closes file"""
+        self.__file.close()
+
+    def __write(self, record: dict) -> None:
+        self.__file.write(json.dumps(record) + Constants.NEWLINE)
+
+
+class SqliteSink:
+    """used to store results in a SQLite database for querying"""
+
+    def __init__(self, path: str) -> None:
+        # used by the writer thread when there is one, never at the same time
+        self.__conn = sqlite3.connect(
+            os.path.join(path, Constants.RESULTS_DB_FILE), check_same_thread=False
+        )
+        with self.__conn:
+            self.__conn.execute(
+                "CREATE TABLE IF NOT EXISTS matches (repo TEXT, branch TEXT, "
+                "path TEXT, word TEXT, line INTEGER, text TEXT)"
+            )
+            self.__conn.execute(
+                "CREATE TABLE IF NOT EXISTS files (repo TEXT, branch TEXT, "
+                "path TEXT, status TEXT)"
+            )
+            self.__conn.execute(
+                "CREATE TABLE IF NOT EXISTS skips (repo TEXT, branch TEXT, reason TEXT)"
+            )
+            for table, column in Constants.RESULTS_DB_INDEXES:
+                self.__conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})"
+                )
+
+    def write_branch_skip(self, repo: str, branch: str, reason: str) -> None:
+        """stores branch skip"""
+        with self.__conn:
+            self.__conn.execute(
+                "INSERT INTO skips VALUES (?, ?, ?)", (repo, branch, reason)
+            )
+
+    def write_branch_results(
+        self, repo: str, branch: str, results: BranchSearchResults
+    ) -> None:
+        """stores matches, files and folders of branch, one transaction per branch"""
+        matches = []
+        files = []
+        with self.__conn:
+            for record in branch_records(repo, branch, results):
+                if record[Constants.TYPE_KEY] == Constants.MATCH_RECORD:
+                    matches.append(
+                        (
+                            repo,
+                            branch,
+                            record[Constants.PATH_KEY],
+                            record[Constants.WORD_KEY],
+                            record[Constants.LINE_KEY],
+                            record[Constants.TEXT_KEY],
+                        )
+                    )
+                else:
+                    files.append(
+                        (
+                            repo,
+                            branch,
+                            record[Constants.PATH_KEY],
+                            record[Constants.STATUS_KEY],
+                        )
+                    )
+                if len(matches) + len(files) >= Constants.SQL_BATCH_SIZE:
+                    self.__insert(matches, files)
+                    matches = []
+                    files = []
+            self.__insert(matches, files)
+
+    def flush(self) -> None:
+        """inserts are committed per branch"""
+
+    def close(self) -> None:
+        """closes database connection"""
+        self.__conn.close()
+
+    def __insert(self, matches: list[tuple], files: list[tuple]) -> None:
+        self.__conn.executemany(
+            "INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?)", matches
+        )
+        self.__conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", files)
+
+
+def create_sink(name: str, path: str) -> Union[JsonLinesSink, SqliteSink]:
+    """sink for configured name, writing to results folder"""
+    if name == Constants.SQLITE_SINK:
+        return SqliteSink(path)
+    return JsonLinesSink(path, name == Constants.JSONL_GZIP_SINK)
+
+
+def branch_records(
+    repo: str, branch: str, results: BranchSearchResults
+) -> Iterator[dict]:
+    """match records, then file and folder records with their status"""
+    for path, word, number, preview in results.matches.records():
+        yield _match_record(repo, branch, path, word, (number, preview))
+
+    statuses = {
+        Constants.ERROR_STATUS: results.errors,
+        Constants.SKIPPED_FOLDER_STATUS: results.skipped_folders,
+        Constants.SKIPPED_FILE_STATUS: results.skipped_files,
+        Constants.REJECTED_FILE_STATUS: results.rejected_files,
+        Constants.FOLDER_STATUS: results.folders,
+        Constants.SEARCHED_STATUS: results.files,
+    }
+    for status, paths in statuses.items():
+        for path in paths:
+            yield _file_record(repo, branch, path, status)
+
+
+def file_records(
+    repo: str, branch: str, results: FileSearchResults, listed: bool
+) -> Iterator[dict]:
+    """match records of file, then status records, only errors unless listed,
+    like the branch results sections
+    """
+    path = results.path
+    for word, lines in results.matches.items():
+        for number, preview in lines:
+            yield _match_record(repo, branch, path, word, (number, preview))
+    if results.rejected:
+        if listed:
+            yield _file_record(repo, branch, path, Constants.REJECTED_FILE_STATUS)
+        return
+    if results.error:
+        yield _file_record(repo, branch, path, Constants.ERROR_STATUS)
+    if listed:
+        yield _file_record(repo, branch, path, Constants.SEARCHED_STATUS)
+
+
+def _match_record(
+    repo: str, branch: str, path: str, word: str, line: tuple[int, str]
+) -> dict:
+    return {
+        Constants.TYPE_KEY: Constants.MATCH_RECORD,
+        Constants.REPO_KEY: repo,
+        Constants.BRANCH_KEY: branch,
+        Constants.PATH_KEY: path,
+        Constants.WORD_KEY: word,
+        Constants.LINE_KEY: line[0],
+        Constants.TEXT_KEY: line[1],
+    }
+
+
+def _file_record(repo: str, branch: str, path: str, status: str) -> dict:
+    return {
+        Constants.TYPE_KEY: Constants.FILE_RECORD,
+        Constants.REPO_KEY: repo,
+        Constants.BRANCH_KEY: branch,
+        Constants.PATH_KEY: path,
+        Constants.STATUS_KEY: status,
+    }
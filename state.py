@@ -0,0 +1,97 @@
+"""contains SearchStateStore class"""
+
+import hashlib
+import json
+import os
+from typing import Optional
+from logger import LoggingManager
+from constants import Constants, FileSearchResults, Messages
+
+
+class SearchStateStore:
+    """used to persist branch search results between runs"""
+
+    def __init__(
+        self,
+        logger: LoggingManager,
+        pattern: str,
+        words: list[str],
+        excludes: list[str],
+    ) -> None:
+        self.__logger = logger
+        self.__pattern = pattern
+        self.__words_hash = list_hash(words)
+        # files implied to have no matches depend on what was excluded
+        self.__excludes_hash = list_hash(excludes)
+
+    def load(self, repo: str, branch: str) -> Optional[dict]:
+        """last search state of branch, None if missing or for other words/pattern"""
+        path = self.__path(repo, branch)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding=Constants.ENCODING) as file:
+                state = json.load(file)
+        except (OSError, json.decoder.JSONDecodeError):
+            self.__logger.error(Messages.STATE_PARSING_FAILED.format(path=path))
+            return None
+
+        if (
+            state.get(Constants.STATE_VERSION_KEY) != Constants.STATE_VERSION
+            or state.get(Constants.PATTERN_KEY) != self.__pattern
+            or state.get(Constants.WORDS_HASH_KEY) != self.__words_hash
+            or state.get(Constants.EXCLUDES_HASH_KEY) != self.__excludes_hash
+        ):
+            return None
+        return state
+
+    def save(
+        self,
+        repo: str,
+        branch: str,
+        commit: str,
+        files: dict[str, FileSearchResults],
+    ) -> None:
+        """stores branch search state, files keyed by path relative to branch"""
+        state = {
+            Constants.STATE_VERSION_KEY: Constants.STATE_VERSION,
+            Constants.COMMIT_KEY: commit,
+            Constants.PATTERN_KEY: self.__pattern,
+            Constants.WORDS_HASH_KEY: self.__words_hash,
+            Constants.EXCLUDES_HASH_KEY: self.__excludes_hash,
+            # files without matches, errors or rejections are implied by the commit
+            Constants.FILES_KEY: {
+                rel_path: {
+                    Constants.ERROR_KEY: file_results.error,
+                    Constants.REJECTED_KEY: file_results.rejected,
+                    Constants.MATCHES_KEY: file_results.matches,
+                }
+                for rel_path, file_results in files.items()
+                if file_results.error or file_results.rejected or file_results.matches
+            },
+        }
+
+        path = self.__path(repo, branch)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding=Constants.ENCODING) as file:
+            json.dump(state, file)
+
+    @staticmethod
+    def cached_results(state: dict, rel_path: str, path: str) -> FileSearchResults:
+        """stored results of unchanged file"""
+        file_results = FileSearchResults(path)
+        stored = state[Constants.FILES_KEY].get(rel_path)
+        if stored:
+            file_results.error = stored[Constants.ERROR_KEY]
+            file_results.rejected = stored[Constants.REJECTED_KEY]
+            file_results.matches = stored[Constants.MATCHES_KEY]
+        return file_results
+
+    @staticmethod
+    def __path(repo: str, branch: str) -> str:
+        return os.path.join(Constants.STATE_FOLDER, repo, branch + ".json")
+
+
+def list_hash(items: list[str]) -> str:
+    """identifies list, order included since word order decides output order"""
+    return hashlib.sha256(Constants.NEWLINE.join(items).encode()).hexdigest()
@@ -0,0 +1,20 @@
+"""tests of repo searcher modules"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from constants import Constants
+
+
+def temp_state(test: unittest.TestCase) -> str:
+    """temporary folder removed after test, holding the state folder"""
+    folder = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, folder)
+    patcher = mock.patch.object(
+        Constants, "STATE_FOLDER", os.path.join(folder, "state")
+    )
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return folder
@@ -0,0 +1,130 @@
+"""tests for MatchCache class"""
+
+import unittest
+from unittest import mock
+from cache import MatchCache
+from constants import FileSearchResults
+from tests import temp_state
+
+PATTERN = "pattern"
+BLOBS = {"a.sql": "blob-a", "b.sql": "blob-b", "c.sql": "blob-a"}
+MATCHES = {"users": [[1, "from users"]], "orders": [[2, "from orders"]]}
+
+
+def results(path: str, matches: dict) -> FileSearchResults:
+    """searched file with matches"""
+    file_results = FileSearchResults(path)
+    file_results.decoded = True
+    file_results.matches = matches
+    return file_results
+
+
+class MatchCacheTest(unittest.TestCase):
+    """results reused by blob, and by commit for files without matches"""
+
+    def setUp(self) -> None:
+        temp_state(self)
+
+    def cache(self, words: list[str], excludes: tuple[str, ...] = ()) -> MatchCache:
+        """cache of search words, closed after the test"""
+        cache = MatchCache(mock.Mock(), PATTERN, words, list(excludes))
+        self.addCleanup(cache.close)
+        return cache
+
+    def save(self, cache: MatchCache, commit: str, scanned: dict) -> None:
+        """stores all blobs as searched, with matches of those given"""
+        files = {
+            path: results(path, scanned[blob])
+            for path, blob in BLOBS.items()
+            if blob in scanned
+        }
+        cache.save(
+            commit, BLOBS, files, {blob: {} for blob in BLOBS.values()} | scanned
+        )
+
+    def test_empty(self) -> None:
+        """nothing is found before anything was saved"""
+        self.assertEqual(self.cache(["users"]).load("c1", BLOBS), ({}, {}))
+
+    def test_blob_hits(self) -> None:
+        """blobs are found again at other commits"""
+        self.save(self.cache(["users", "orders"]), "", {"blob-a": MATCHES})
+        found, missing = self.cache(["users", "orders"]).load("c2", BLOBS)
+        self.assertEqual(found, {"blob-a": MATCHES, "blob-b": {}})
+        self.assertEqual(missing, {})
+
+    def test_blob_miss(self) -> None:
+        """blobs never searched aren't found"""
+        self.save(self.cache(["users"]), "c1", {})
+        found, _ = self.cache(["users"]).load("c2", {"d.sql": "blob-d"})
+        self.assertEqual(found, {})
+
+    def test_commit_hits(self) -> None:
+        """files of a fully searched commit are found, those without matches
+        implied from the stored commit results
+        """
+        self.save(self.cache(["users", "orders"]), "c1", {"blob-a": MATCHES})
+        # blobs of the commit aren't looked up one by one
+        with mock.patch.object(MatchCache, "_MatchCache__load_blobs") as load_blobs:
+            found, missing = self.cache(["users", "orders"]).load("c1", BLOBS)
+        load_blobs.assert_not_called()
+        self.assertEqual(found, {"blob-a": MATCHES, "blob-b": {}})
+        self.assertEqual(missing, {})
+
+    def test_commit_keys(self) -> None:
+        """commit results only apply to the same words and excludes"""
+        self.save(self.cache(["users"], ("bin",)), "c1", {})
+        with mock.patch.object(MatchCache, "_MatchCache__load_blobs") as load_blobs:
+            load_blobs.return_value = ({}, {})
+            self.cache(["users"], ("obj",)).load("c1", BLOBS)
+            self.cache(["orders"], ("bin",)).load("c1", BLOBS)
+        self.assertEqual(load_blobs.call_count, 2)
+
+    def test_no_commit_with_errors(self) -> None:
+        """commits with errors or rejected files aren't stored"""
+        cache = self.cache(["users"])
+        failed = FileSearchResults("b.sql")
+        failed.error = "unreadable"
+        cache.save("c1", BLOBS, {"b.sql": failed}, {"blob-a": {}})
+        rejected = FileSearchResults("b.sql")
+        rejected.rejected = "binary"
+        cache.save("c2", BLOBS, {"b.sql": rejected}, {"blob-a": {}})
+        for commit in ("c1", "c2"):
+            found, _ = self.cache(["users"]).load(commit, BLOBS)
+            self.assertEqual(found, {"blob-a": {}})
+
+    def test_removed_words(self) -> None:
+        """results of words removed since are left out"""
+        self.save(self.cache(["users", "orders"]), "", {"blob-a": MATCHES})
+        found, missing = self.cache(["orders"]).load("c1", BLOBS)
+        self.assertEqual(found["blob-a"], {"orders": MATCHES["orders"]})
+        self.assertEqual(missing, {})
+
+    def test_added_words(self) -> None:
+        """stored blobs are rescanned only for words added since, merged with
+        the stored results
+        """
+        self.save(self.cache(["users"]), "c1", {"blob-a": {"users": MATCHES["users"]}})
+        cache = self.cache(["orders", "users"])
+        found, missing = cache.load("c1", BLOBS)
+        self.assertEqual(found, {})
+        self.assertEqual(missing, {"blob-a": ("orders",), "blob-b": ("orders",)})
+        merged = cache.merge("blob-a", {"orders": MATCHES["orders"]})
+        # search word order
+        self.assertEqual(list(merged), ["orders", "users"])
+        self.assertEqual(merged, MATCHES)
+        self.assertEqual(cache.merge("blob-b", {}), {})
+
+    def test_rescans_saved(self) -> None:
+        """rescanned blobs are stored for all words searched so far"""
+        self.save(self.cache(["users"]), "", {"blob-a": {"users": MATCHES["users"]}})
+        cache = self.cache(["orders"])
+        cache.load("c1", BLOBS)
+        cache.save("", BLOBS, {}, {"blob-a": {"orders": MATCHES["orders"]}})
+        found, missing = self.cache(["users", "orders"]).load("c2", {"a.sql": "blob-a"})
+        self.assertEqual(found, {"blob-a": MATCHES})
+        self.assertEqual(missing, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""tests for ADOClient class"""
+
+import unittest
+from unittest import mock
+import requests
+from client import ADOClient
+from constants import Constants
+
+URL = "https://dev.azure.com/org/project/_apis/git/repositories"
+
+
+def response(code: int, headers: dict) -> requests.models.Response:
+    """response with status code and headers"""
+    resp = requests.models.Response()
+    resp.status_code = code
+    resp.headers.update(headers)
+    resp.url = URL
+    return resp
+
+
+class ADOClientTest(unittest.TestCase):
+    """retries throttled and failing requests, gives up on rejected ones"""
+
+    def setUp(self) -> None:
+        session = mock.patch("client.requests.Session")
+        self.session = session.start().return_value
+        self.addCleanup(session.stop)
+        sleep = mock.patch("client.time.sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+        self.client = ADOClient(mock.Mock(), ("user", "token"), 1)
+
+    def test_retry_after(self) -> None:
+        """throttled requests wait as long as Retry-After says, then retry"""
+        success = response(Constants.SUCCESS_CODE, {})
+        self.session.get.side_effect = [
+            response(429, {Constants.RETRY_AFTER_HEADER: "7"}),
+            response(503, {Constants.RETRY_AFTER_HEADER: "2"}),
+            success,
+        ]
+        self.assertIs(self.client.get(URL), success)
+        self.assertEqual(self.session.get.call_count, 3)
+        self.assertEqual(self.sleep.call_args_list, [mock.call(7.0), mock.call(2.0)])
+
+    def test_retry_after_capped(self) -> None:
+        """Retry-After waits are capped"""
+        self.session.get.side_effect = [
+            response(429, {Constants.RETRY_AFTER_HEADER: "100000"}),
+            response(Constants.SUCCESS_CODE, {}),
+        ]
+        self.client.get(URL)
+        self.sleep.assert_called_once_with(Constants.RETRY_AFTER_MAX)
+
+    def test_backoff(self) -> None:
+        """without Retry-After, server errors back off until retries run out"""
+        self.session.get.return_value = response(500, {})
+        self.assertIsNone(self.client.get(URL))
+        self.assertEqual(self.session.get.call_count, Constants.RETRIES)
+        self.assertEqual(self.sleep.call_count, Constants.RETRIES - 1)
+        for attempt, call in enumerate(self.sleep.call_args_list):
+            limit = min(Constants.BACKOFF_MAX, Constants.BACKOFF_BASE * 2**attempt)
+            self.assertLessEqual(call.args[0], limit)
+
+    def test_connection_error(self) -> None:
+        """connection errors are retried"""
+        success = response(Constants.SUCCESS_CODE, {})
+        self.session.get.side_effect = [
+            requests.exceptions.ConnectionError(),
+            success,
+        ]
+        self.assertIs(self.client.get(URL), success)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_not_retryable(self) -> None:
+        """statuses retrying won't fix raise without retrying"""
+        for code in (401, 404):
+            self.session.get.reset_mock()
+            self.session.get.return_value = response(code, {})
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.client.get(URL)
+            self.session.get.assert_called_once()
+        self.sleep.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""tests for TrigramIndex class"""
+
+import unittest
+from typing import Iterable, Optional
+from unittest import mock
+from constants import Constants
+from index import TrigramIndex, decode_ids, encode_ids, required_trigrams, trigrams
+from tests import temp_state
+
+CONTENTS = {
+    "users.sql": b"SELECT * FROM users",
+    "orders.sql": b"select * from orders o join order_items i",
+    "empty.sql": b"",
+    "app.dll": b"users",
+}
+
+
+class TrigramIndexTest(unittest.TestCase):
+    """files ruled out by trigrams of search words, rejected files never"""
+
+    def setUp(self) -> None:
+        temp_state(self)
+        # content keys of files, read once per key
+        self.keys = {path: f"blob-{path}" for path in CONTENTS}
+        self.reads: list[str] = []
+
+    def read(self, path: str) -> Optional[Iterable[bytes]]:
+        """file contents in small chunks, None for rejected files"""
+        self.reads.append(path)
+        if path.endswith(".dll"):
+            return None
+        data = CONTENTS[path]
+        return (data[idx : idx + 4] for idx in range(0, len(data), 4))
+
+    def index(self) -> TrigramIndex:
+        """index of the repo, closed after the test"""
+        index = TrigramIndex(mock.Mock(), "repo")
+        self.addCleanup(index.close)
+        return index
+
+    def test_ruled_out(self) -> None:
+        """files missing a trigram of every word are ruled out"""
+        index = self.index()
+        self.assertTrue(index.update("main", self.keys, self.read))
+        self.assertEqual(index.ruled_out(["users"]), {"orders.sql", "empty.sql"})
+        self.assertEqual(index.ruled_out(["order_items"]), {"users.sql", "empty.sql"})
+        self.assertEqual(index.ruled_out(["users", "orders"]), {"empty.sql"})
+        # dot matches any character, the parts around it are required
+        self.assertEqual(index.ruled_out(["sel.ct"]), {"empty.sql"})
+
+    def test_rejected_files(self) -> None:
+        """rejected files aren't indexed, so never ruled out"""
+        index = self.index()
+        index.update("main", self.keys, self.read)
+        ruled_out = index.ruled_out(["orders"])
+        assert ruled_out is not None
+        self.assertNotIn("app.dll", ruled_out)
+        self.assertEqual(index.unindexed(self.keys), {"app.dll"})
+
+    def test_not_narrowed(self) -> None:
+        """words without trigrams or with other metacharacters rule out nothing"""
+        index = self.index()
+        index.update("main", self.keys, self.read)
+        self.assertIsNone(index.ruled_out(["id"]))
+        self.assertIsNone(index.ruled_out(["users", "order.*items"]))
+
+    def test_reuse(self) -> None:
+        """content indexed for a branch isn't read again for others"""
+        self.index().update("main", self.keys, self.read)
+        self.reads.clear()
+        index = self.index()
+        dev = {"moved/users.sql": self.keys["users.sql"]}
+        index.update("dev", dev, self.read)
+        self.assertEqual(self.reads, [])
+        self.assertEqual(index.ruled_out(["orders"]), {"moved/users.sql"})
+
+    def test_compaction(self) -> None:
+        """content no branch uses is dropped, postings stay correct"""
+        steps = [
+            {path: f"{key}-{step}" for path, key in self.keys.items()}
+            for step in range(3)
+        ]
+        with mock.patch.object(Constants, "INDEX_MAX_CHUNKS", 1):
+            index = self.index()
+            for keys in steps:
+                index.update("main", keys, self.read)
+        self.assertEqual(index.unindexed(steps[0]), set(self.keys))
+        self.assertEqual(index.unindexed(steps[2]), {"app.dll"})
+        self.assertEqual(index.ruled_out(["users"]), {"orders.sql", "empty.sql"})
+
+    def test_unavailable(self) -> None:
+        """a broken index rules out nothing"""
+        with mock.patch("index.sqlite3.connect", side_effect=OSError("disk")):
+            index = self.index()
+        self.assertFalse(index.update("main", self.keys, self.read))
+        self.assertIsNone(index.ruled_out(["users"]))
+
+
+class TrigramsTest(unittest.TestCase):
+    """trigram extraction and posting list encoding"""
+
+    def test_chunks(self) -> None:
+        """trigrams across chunks and multibyte characters split by chunks"""
+        data = "Grüße aus Köln".encode()
+        whole = trigrams([data])
+        self.assertEqual(
+            trigrams(data[idx : idx + 1] for idx in range(len(data))), whole
+        )
+        self.assertIn("üße", whole)
+        self.assertIn("köl", whole)
+
+    def test_required(self) -> None:
+        """required trigrams of plain and dotted words"""
+        self.assertEqual(required_trigrams("users"), {"use", "ser", "ers"})
+        self.assertEqual(required_trigrams("ab.cde"), {"cde"})
+        self.assertEqual(required_trigrams("us+ers"), set())
+
+    def test_ids(self) -> None:
+        """ids survive encoding"""
+        ids = [1, 2, 127, 128, 300, 70000, 70001]
+        self.assertEqual(decode_ids(encode_ids(ids)), ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
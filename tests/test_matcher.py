@@ -0,0 +1,64 @@
+"""tests for RegexMatcher, LiteralMatcher classes"""
+
+import re
+import unittest
+from constants import Constants
+from matcher import create_matcher
+
+
+class MatcherTest(unittest.TestCase):
+    """combined matching finds the same words as one regex per word"""
+
+    def assert_same_as_per_word(
+        self, engine: str, pattern: str, words: list[str], lines: list[str]
+    ) -> None:
+        """checks matcher against word regexes searched one at a time"""
+        matcher = create_matcher(engine, pattern, words)
+        for line in lines:
+            expected = [
+                idx
+                for idx, word in enumerate(words)
+                if re.search(pattern.format(word=word), line)
+            ]
+            self.assertEqual(matcher.search_line(line), expected, line)
+
+    def test_pattern_alternation(self) -> None:
+        """alternatives of the pattern match without the word"""
+        lines = ["select * from users", "todo: remove", "nothing here"]
+        self.assert_same_as_per_word(
+            Constants.REGEX_ENGINE, "{word}|todo", ["users", "orders"], lines
+        )
+        self.assert_same_as_per_word(
+            Constants.REGEX_ENGINE, "(?:x)|{word}", ["users"], ["x", "users", "y"]
+        )
+
+    def test_word_alternation(self) -> None:
+        """alternatives of a word only take the pattern on their side"""
+        pattern = Constants.DB_TABLE_PATTERN.pattern
+        lines = ["usersx", "xorders", "users", "orders", "_orders_"]
+        for engine in (Constants.REGEX_ENGINE, Constants.LITERAL_ENGINE):
+            self.assert_same_as_per_word(engine, pattern, ["users|orders"], lines)
+
+    def test_grouped_alternation(self) -> None:
+        """alternatives inside groups and sets are still merged"""
+        lines = ["dbo.users", "orders", "[users]", "user|s"]
+        self.assert_same_as_per_word(
+            Constants.REGEX_ENGINE,
+            r"(?:dbo\.|\[)?{word}[|\]]?",
+            ["users", "(?:order|item)s"],
+            lines,
+        )
+
+    def test_literal_words(self) -> None:
+        """literal engine finds words at table name boundaries"""
+        lines = ["from users u", "from users_archive", "join order_items", "orders"]
+        self.assert_same_as_per_word(
+            Constants.LITERAL_ENGINE,
+            Constants.DB_TABLE_PATTERN.pattern,
+            ["users", "orders", "order_items"],
+            lines,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
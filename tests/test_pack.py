@@ -0,0 +1,112 @@
+"""tests for BranchPack class"""
+
+import os
+import unittest
+from unittest import mock
+from constants import BranchSearchResults, Constants
+from pack import BranchPack
+from tests import temp_state
+
+
+class BranchPackTest(unittest.TestCase):
+    """checkout files packed once per blob, read back from the content file"""
+
+    def setUp(self) -> None:
+        self.folder = temp_state(self)
+        self.checkout = os.path.join(self.folder, "checkout")
+        os.makedirs(self.checkout)
+        # blob of each file, a new one whenever contents change
+        self.blobs: dict[str, str] = {}
+
+    def write(self, rel_path: str, data: bytes) -> None:
+        """writes checkout file, recording a blob for its contents"""
+        with open(os.path.join(self.checkout, rel_path), "wb") as file:
+            file.write(data)
+        self.blobs[rel_path] = f"{rel_path}:{len(data)}:{hash(data)}"
+
+    def pack(self, commit: str, rejected: tuple[str, ...] = ()) -> BranchPack:
+        """packs checkout files at commit, rejecting given files"""
+        pack = BranchPack(mock.Mock(), "repo", "main", "")
+        pack.load(commit)
+        files = [os.path.join(self.checkout, rel_path) for rel_path in self.blobs]
+        self.assertTrue(
+            pack.update(
+                commit,
+                self.checkout,
+                files,
+                BranchSearchResults(),
+                self.blobs,
+                lambda _, rel_path: "binary content" if rel_path in rejected else "",
+            )
+        )
+        self.addCleanup(pack.close)
+        return pack
+
+    def pack_size(self) -> int:
+        """size of content file"""
+        return os.path.getsize(
+            os.path.join(
+                Constants.STATE_FOLDER,
+                Constants.PACK_FOLDER,
+                "repo",
+                "main" + Constants.PACK_EXTENSION,
+            )
+        )
+
+    def test_rejected_files(self) -> None:
+        """rejected files are left to be read from the checkout"""
+        self.write("a.sql", b"from users")
+        self.write("lib.dll", b"\0" * 100)
+        pack = self.pack("c1", ("lib.dll",))
+
+        walked = dict(pack.walk(self.checkout, BranchSearchResults()))
+        self.assertEqual(walked[os.path.join(self.checkout, "lib.dll")], "")
+        blob = walked[os.path.join(self.checkout, "a.sql")]
+        self.assertEqual(pack.read(blob), b"from users")
+        self.assertEqual(self.pack_size(), len(b"from users"))
+
+    def test_chunks(self) -> None:
+        """contents longer than a chunk are copied and read in chunks"""
+        data = b"select 1 from dual\n" * (Constants.READ_CHUNK_SIZE // 10)
+        self.write("large.sql", data)
+        pack = self.pack("c1")
+
+        chunks = list(pack.chunks(self.blobs["large.sql"]))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(
+            all(len(chunk) <= Constants.READ_CHUNK_SIZE for chunk in chunks)
+        )
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual(pack.read(self.blobs["large.sql"]), data)
+
+    def test_reuse(self) -> None:
+        """packed commits are loaded, later commits append only new blobs"""
+        self.write("a.sql", b"from users")
+        self.write("b.sql", b"from orders")
+        self.pack("c1")
+        self.assertTrue(BranchPack(mock.Mock(), "repo", "main", "").load("c1"))
+        self.assertFalse(BranchPack(mock.Mock(), "repo", "main", "").load("c2"))
+        self.assertFalse(BranchPack(mock.Mock(), "repo", "main", "x").load("c1"))
+
+        self.write("b.sql", b"from order_items")
+        pack = self.pack("c2")
+        self.assertEqual(
+            self.pack_size(), len(b"from usersfrom ordersfrom order_items")
+        )
+        self.assertEqual(pack.read(self.blobs["a.sql"]), b"from users")
+        self.assertEqual(pack.read(self.blobs["b.sql"]), b"from order_items")
+
+    def test_compaction(self) -> None:
+        """content file is rewritten once stale blobs outgrow live ones"""
+        self.write("a.sql", b"from users")
+        for commit in ("c1", "c2", "c3"):
+            self.write("b.sql", commit.encode() * 100)
+            pack = self.pack(commit)
+        self.assertEqual(self.pack_size(), len(b"from users") + 200)
+        self.assertEqual(pack.read(self.blobs["a.sql"]), b"from users")
+        self.assertEqual(pack.read(self.blobs["b.sql"]), b"c3" * 100)
+        self.assertTrue(BranchPack(mock.Mock(), "repo", "main", "").load("c3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
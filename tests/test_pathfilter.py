@@ -0,0 +1,66 @@
+"""tests for PathFilter class"""
+
+import unittest
+from pathfilter import PathFilter
+
+
+class PathFilterTest(unittest.TestCase):
+    """gitignore style exclude and include patterns"""
+
+    def test_file_endings(self) -> None:
+        """plain file entries are name endings of files only"""
+        path_filter = PathFilter(["bin"], [".js", "test"])
+        for folder in ("lib/chart.js", "src/unittest", "latest"):
+            self.assertFalse(path_filter.skip_folder(folder), folder)
+        for file in ("lib/chart.js", "src/unittest", "latest", "a/b.JS"):
+            self.assertTrue(path_filter.skip_file(file), file)
+        self.assertFalse(path_filter.skip_file("lib/chart.js/q.sql"))
+        self.assertTrue(path_filter.skip_folder("src/bin"))
+        self.assertFalse(path_filter.skip_file("bin"))
+
+    def test_folder_only_file_entries(self) -> None:
+        """file entries ending in a slash still prune folders"""
+        path_filter = PathFilter([], ["logs/", "*.log"])
+        self.assertTrue(path_filter.skip_folder("a/logs"))
+        self.assertFalse(path_filter.skip_file("a/logs"))
+        self.assertFalse(path_filter.skip_folder("a/debug.log"))
+
+    def test_excludes(self) -> None:
+        """slashes anchor patterns, ** spans folders, the last match decides"""
+        path_filter = PathFilter(
+            ["/build", "docs/**/old"], ["*.min.*", "!keep.min.js", "data/*.csv"]
+        )
+        self.assertTrue(path_filter.skip_folder("build"))
+        self.assertFalse(path_filter.skip_folder("src/build"))
+        self.assertTrue(path_filter.skip_folder("docs/old"))
+        self.assertTrue(path_filter.skip_folder("docs/a/b/old"))
+        self.assertFalse(path_filter.skip_folder("src/docs/old"))
+        self.assertTrue(path_filter.skip_file("lib/app.MIN.js"))
+        self.assertFalse(path_filter.skip_file("lib/keep.min.js"))
+        self.assertTrue(path_filter.skip_file("data/rows.csv"))
+        self.assertFalse(path_filter.skip_file("data/raw/rows.csv"))
+
+    def test_includes(self) -> None:
+        """only included files are searched, folders they can't reach aren't
+        walked
+        """
+        path_filter = PathFilter(["bin"], [], ["src/**/*.sql", "/scripts/", "!*.tmp"])
+        self.assertTrue(path_filter.skip_folder("docs"))
+        self.assertFalse(path_filter.skip_folder("src/db/tables"))
+        self.assertFalse(path_filter.skip_folder("scripts"))
+        self.assertTrue(path_filter.skip_folder("src/bin"))
+        self.assertFalse(path_filter.skip_file("src/db/users.sql"))
+        self.assertTrue(path_filter.skip_file("src/db/users.cs"))
+        self.assertFalse(path_filter.skip_file("scripts/a/run.sh"))
+        self.assertTrue(path_filter.skip_file("scripts/run.tmp"))
+
+    def test_unanchored_includes(self) -> None:
+        """includes matching names at any depth walk every folder"""
+        path_filter = PathFilter([], [], ["*.sql"])
+        self.assertFalse(path_filter.skip_folder("any/folder"))
+        self.assertFalse(path_filter.skip_file("any/folder/a.SQL"))
+        self.assertTrue(path_filter.skip_file("any/folder/a.cs"))
+
+
+if __name__ == "__main__":
+    unittest.main()
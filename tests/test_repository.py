@@ -0,0 +1,130 @@
+"""tests for repository module functions"""
+
+import os
+import posixpath
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import git
+from git.repo import Repo
+from repository import ADORepository, sparse_patterns
+
+
+class SparsePatternsTest(unittest.TestCase):
+    """sparse checkouts leave out excluded folders, never folders named like
+    excluded files
+    """
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def test_checkout(self) -> None:
+        """folders named like excluded file endings are checked out"""
+        repo = Repo.init(self.folder)
+        self.addCleanup(repo.close)
+        paths = ["lib/chart.js/q.sql", "src/unittest/a.sql", "Bin/app.sql", "a.dll"]
+        for rel_path in paths:
+            path = os.path.join(self.folder, *rel_path.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("select 1")
+        repo.git.add(*paths)
+        repo.index.commit("files")
+
+        patterns = sparse_patterns(["bin"], [".js", "test"])
+        repo.git.sparse_checkout("set", "--no-cone", *patterns)
+        checked_out = []
+        for root, folders, files in os.walk(self.folder):
+            if ".git" in folders:
+                folders.remove(".git")
+            rel_root = os.path.relpath(root, self.folder).replace(os.sep, "/")
+            checked_out += [posixpath.normpath(f"{rel_root}/{name}") for name in files]
+        self.assertEqual(
+            sorted(checked_out), ["a.dll", "lib/chart.js/q.sql", "src/unittest/a.sql"]
+        )
+
+
+class RemoteHeadsTest(unittest.TestCase):
+    """remote branch heads are listed once per run, even if listing fails"""
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def repository(self, url: str) -> ADORepository:
+        """repository with two branches at url"""
+        return ADORepository(
+            mock.Mock(),
+            "repo",
+            {"main", "dev"},
+            os.path.join(self.folder, "repo"),
+            url,
+        )
+
+    def test_listed_once(self) -> None:
+        """heads are reused for every branch"""
+        repo = self.repository("https://example.com/repo")
+        with mock.patch("repository.git.cmd.Git") as cmd:
+            ls_remote = cmd.return_value.ls_remote
+            ls_remote.return_value = "a1\trefs/heads/main\nb2\trefs/heads/dev"
+            heads = [repo.remote_heads(), repo.remote_heads()]
+        ls_remote.assert_called_once_with("--heads", "https://example.com/repo")
+        self.assertEqual(heads, [{"main": "a1", "dev": "b2"}] * 2)
+
+    def test_failure_cached(self) -> None:
+        """an unreachable remote isn't listed again for later branches"""
+        repo = self.repository("https://example.com/repo")
+        with mock.patch("repository.git.cmd.Git") as cmd:
+            ls_remote = cmd.return_value.ls_remote
+            ls_remote.side_effect = git.GitCommandError("ls-remote", 128)
+            heads = [repo.remote_heads(), repo.remote_heads()]
+        ls_remote.assert_called_once()
+        self.assertEqual(heads, [{}, {}])
+
+
+class ChangedSinceTest(unittest.TestCase):
+    """files changed since the last searched commit, from a git diff"""
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.repo = ADORepository(
+            mock.Mock(), "repo", {"main"}, os.path.join(self.folder, "repo")
+        )
+        self.branch = Repo.init(os.path.join(self.repo.path, "main"))
+        self.addCleanup(self.branch.close)
+
+    def commit(self, files: dict[str, str], removed: tuple[str, ...] = ()) -> str:
+        """commits files written with contents and removed files"""
+        for rel_path, data in files.items():
+            path = os.path.join(self.branch.working_dir, *rel_path.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(data)
+        if files:
+            self.branch.git.add(*files)
+        if removed:
+            self.branch.git.rm(*removed)
+        return self.branch.index.commit("files").hexsha
+
+    def test_changed(self) -> None:
+        """added, modified and removed files changed, others unchanged"""
+        first = self.commit({"a.sql": "1", "b.sql": "1", "sub/c.sql": "1"})
+        head = self.commit({"a.sql": "2", "sub/d.sql": "1"}, ("b.sql",))
+        self.assertEqual(
+            self.repo.changed_since("main", first, head),
+            {"a.sql", "b.sql", "sub/d.sql"},
+        )
+        self.assertEqual(self.repo.changed_since("main", head, head), set())
+
+    def test_unknown_commit(self) -> None:
+        """full search if the last searched commit is gone"""
+        head = self.commit({"a.sql": "1"})
+        self.assertIsNone(self.repo.changed_since("main", "0" * 40, head))
+        self.repo.logger.error.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
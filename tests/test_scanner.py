@@ -0,0 +1,97 @@
+"""tests for FileScanner class"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from constants import Constants, Messages
+from scanner import FileScanner
+
+WORDS = ["users", "orders", "order_items"]
+
+
+class FileScannerTest(unittest.TestCase):
+    """literal engine reads raw bytes, regex engine reads decoded lines"""
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def write(self, name: str, data: bytes) -> str:
+        """writes file in temporary folder, returns its path"""
+        path = os.path.join(self.folder, name)
+        with open(path, "wb") as file:
+            file.write(data)
+        return path
+
+    def scan(self, engine: str, path: str) -> dict[str, list[str]]:
+        """matches of words in file with engine"""
+        scanner = FileScanner(engine, Constants.DB_TABLE_PATTERN.pattern, WORDS)
+        results = scanner.scan(path)
+        self.assertEqual(results.error, "")
+        return results.matches
+
+    def test_mapped_file(self) -> None:
+        """files mapped into memory report the same lines"""
+        filler = b"select 1 from dual\n" * (Constants.MMAP_THRESHOLD // 10)
+        data = b"from USERS u\n" + filler + b"join order_items\n" + filler + b"orders"
+        self.assertGreater(len(data), Constants.MMAP_THRESHOLD)
+        path = self.write("large.sql", data)
+
+        matches = self.scan(Constants.LITERAL_ENGINE, path)
+        line = len(filler.splitlines()) + 2
+        self.assertEqual(
+            matches,
+            {
+                "users": [(1, "from users u")],
+                "orders": [(2 * line - 1, "orders")],
+                "order_items": [(line, "join order_items")],
+            },
+        )
+        self.assertEqual(matches, self.scan(Constants.REGEX_ENGINE, path))
+
+    def test_long_line(self) -> None:
+        """long lines with literal hits are read in segments like line by line"""
+        long_line = b"select a, " * (Constants.LINE_SEGMENT_SIZE // 5) + b"from users"
+        data = b"from orders\n" + long_line + b"\r\njoin order_items\n"
+        path = self.write("long.sql", data)
+
+        matches = self.scan(Constants.LITERAL_ENGINE, path)
+        self.assertEqual(
+            matches,
+            {
+                "users": [(2, Messages.LINE_TOO_LONG)],
+                "orders": [(1, "from orders")],
+                "order_items": [(3, "join order_items")],
+            },
+        )
+        self.assertEqual(matches, self.scan(Constants.REGEX_ENGINE, path))
+
+    def test_chunks(self) -> None:
+        """contents read in chunks report the same lines as read at once"""
+        filler = "select 1 from dual -- café\n".encode() * (
+            Constants.READ_CHUNK_SIZE // 10
+        )
+        data = b"from USERS u\n" + filler + b"join order_items\n" + filler + b"orders"
+        size = Constants.READ_CHUNK_SIZE
+        for engine in (Constants.LITERAL_ENGINE, Constants.REGEX_ENGINE):
+            scanner = FileScanner(engine, Constants.DB_TABLE_PATTERN.pattern, WORDS)
+            chunks = (data[pos : pos + size] for pos in range(0, len(data), size))
+            results = scanner.scan_chunks("large.sql", chunks)
+            self.assertEqual(results.error, "")
+            self.assertEqual(
+                results.matches, scanner.scan_data("large.sql", data).matches
+            )
+            self.assertEqual(len(results.matches), len(WORDS))
+
+    def test_unreadable_file(self) -> None:
+        """read failures are recorded as file errors"""
+        for engine in (Constants.LITERAL_ENGINE, Constants.REGEX_ENGINE):
+            scanner = FileScanner(engine, Constants.DB_TABLE_PATTERN.pattern, WORDS)
+            results = scanner.scan(self.folder)
+            self.assertEqual(results.error, Messages.READ_FAILED)
+            self.assertEqual(results.matches, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""tests for UpdateScheduler, UpdatePipeline classes"""
+
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+from scheduler import UpdatePipeline, UpdateScheduler
+
+
+# pylint: disable=too-few-public-methods
+class Updates:
+    """records branch updates and how many ran at once per host"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.running: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self.done: list[tuple[str, str]] = []
+
+
+class FakeRepo:
+    """repo whose branch updates take a moment"""
+
+    def __init__(self, name: str, host: str, updates: Updates) -> None:
+        self.name = name
+        self.host = host
+        self.url = f"https://{host}/org/project/_git/{name}"
+        self.__updates = updates
+
+    def update_branch(self, branch: str) -> tuple[bool, float]:
+        """counts the update as running for a moment"""
+        updates = self.__updates
+        with updates.lock:
+            running = updates.running.get(self.host, 0) + 1
+            updates.running[self.host] = running
+            updates.peak[self.host] = max(updates.peak.get(self.host, 0), running)
+        time.sleep(0.02)
+        with updates.lock:
+            updates.running[self.host] -= 1
+            updates.done.append((self.name, branch))
+        return (True, 0.0)
+
+
+class UpdateSchedulerTest(unittest.TestCase):
+    """branches updated concurrently, at most host limit at once per host"""
+
+    def setUp(self) -> None:
+        self.updates = Updates()
+
+    def update(self, repos: list[FakeRepo], host_limit: int) -> None:
+        """updates four branches of each repo"""
+        scheduler = UpdateScheduler(mock.Mock(), 8, host_limit)
+        futures = [
+            scheduler.submit(repo, f"b{idx}") for repo in repos for idx in range(4)
+        ]
+        self.assertEqual([future.result() for future in futures], [(True, 0.0)] * 8)
+        scheduler.shutdown()
+        self.assertEqual(len(self.updates.done), 8)
+
+    def test_host_limit(self) -> None:
+        """updates of one host beyond the limit wait for others"""
+        repos = [FakeRepo(name, "dev.azure.com", self.updates) for name in "ab"]
+        self.update(repos, 2)
+        self.assertEqual(self.updates.peak, {"dev.azure.com": 2})
+
+    def test_hosts(self) -> None:
+        """hosts are limited separately"""
+        repos = [
+            FakeRepo("a", "one.example.com", self.updates),
+            FakeRepo("b", "two.example.com", self.updates),
+        ]
+        self.update(repos, 1)
+        self.assertEqual(
+            self.updates.peak, {"one.example.com": 1, "two.example.com": 1}
+        )
+
+
+class UpdatePipelineTest(unittest.TestCase):
+    """branch updates submitted a bounded number of branches ahead"""
+
+    def setUp(self) -> None:
+        self.updates = Updates()
+        self.repo = FakeRepo("a", "dev.azure.com", self.updates)
+        self.scheduler = mock.Mock()
+        self.scheduler.submit.side_effect = self.submit
+        self.submitted: list[str] = []
+
+    def submit(self, _repo: FakeRepo, branch: str) -> Future:
+        """finished update future"""
+        self.submitted.append(branch)
+        future: Future = Future()
+        future.set_result((True, float(len(self.submitted))))
+        return future
+
+    def pipeline(self, branches: list[str], depth: int) -> UpdatePipeline:
+        """pipeline of repo branches"""
+        return UpdatePipeline(
+            self.scheduler, [(self.repo, branch) for branch in branches], depth
+        )
+
+    def test_depth(self) -> None:
+        """updates run ahead by depth, refilled as branches are searched"""
+        pipeline = self.pipeline(["b0", "b1", "b2", "b3"], 2)
+        self.assertEqual(self.submitted, ["b0", "b1"])
+        self.assertEqual(pipeline.update_branch(self.repo, "b0"), (True, 1.0))
+        self.assertEqual(self.submitted, ["b0", "b1", "b2"])
+        self.assertFalse(pipeline.scheduled(self.repo, "b0"))
+        self.assertTrue(pipeline.scheduled(self.repo, "b3"))
+
+    def test_out_of_order(self) -> None:
+        """branches searched ahead of order are submitted right away"""
+        pipeline = self.pipeline(["b0", "b1", "b2", "b3"], 1)
+        self.assertEqual(pipeline.update_branch(self.repo, "b2"), (True, 3.0))
+        self.assertEqual(self.submitted, ["b0", "b1", "b2"])
+        # earlier branches stay prefetched
+        self.assertEqual(pipeline.update_branch(self.repo, "b0"), (True, 1.0))
+        self.assertEqual(self.submitted, ["b0", "b1", "b2"])
+
+    def test_unscheduled(self) -> None:
+        """branches not needing updates aren't submitted, updated inline if asked"""
+        pipeline = self.pipeline(["b0"], 2)
+        self.assertFalse(pipeline.scheduled(self.repo, "main"))
+        self.assertEqual(pipeline.update_branch(self.repo, "main"), (True, 0.0))
+        self.assertEqual(self.submitted, ["b0"])
+        self.assertEqual(self.updates.done, [("a", "main")])
+
+
+if __name__ == "__main__":
+    unittest.main()
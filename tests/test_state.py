@@ -0,0 +1,78 @@
+"""tests for SearchStateStore class"""
+
+import os
+import unittest
+from unittest import mock
+from constants import Constants, FileSearchResults
+from state import SearchStateStore
+from tests import temp_state
+
+
+def results(path: str, error: str = "", rejected: str = "", matches=None):
+    """file results with error, rejection or matches"""
+    file_results = FileSearchResults(path)
+    file_results.error = error
+    file_results.rejected = rejected
+    file_results.matches = matches or {}
+    return file_results
+
+
+class SearchStateStoreTest(unittest.TestCase):
+    """branch results stored per commit, reused for the same search only"""
+
+    def setUp(self) -> None:
+        temp_state(self)
+        self.files = {
+            "a.sql": results("/b/a.sql", matches={"users": [[1, "from users"]]}),
+            "b.sql": results("/b/b.sql", error="unreadable"),
+            "c.dll": results("/b/c.dll", rejected="binary"),
+            "d.sql": results("/b/d.sql"),
+        }
+
+    def store(self, words=("users",), excludes=(), pattern="pattern"):
+        """store of search words, excludes and pattern"""
+        return SearchStateStore(mock.Mock(), pattern, list(words), list(excludes))
+
+    def test_reuse(self) -> None:
+        """stored results are reused, files without any implied empty"""
+        self.store().save("repo", "main", "c1", self.files)
+        state = self.store().load("repo", "main")
+        assert state is not None
+        self.assertEqual(state[Constants.COMMIT_KEY], "c1")
+        self.assertEqual(set(state[Constants.FILES_KEY]), {"a.sql", "b.sql", "c.dll"})
+        for rel_path, stored in self.files.items():
+            cached = SearchStateStore.cached_results(state, rel_path, stored.path)
+            self.assertEqual(
+                (cached.path, cached.error, cached.rejected, cached.matches),
+                (stored.path, stored.error, stored.rejected, stored.matches),
+            )
+
+    def test_other_search(self) -> None:
+        """states of other words, excludes or pattern aren't reused"""
+        self.store().save("repo", "main", "c1", self.files)
+        self.assertIsNone(self.store(words=("orders",)).load("repo", "main"))
+        self.assertIsNone(self.store(words=("users", "x")).load("repo", "main"))
+        self.assertIsNone(self.store(excludes=("bin",)).load("repo", "main"))
+        self.assertIsNone(self.store(pattern="other").load("repo", "main"))
+        self.assertIsNone(self.store().load("repo", "dev"))
+
+    def test_other_version(self) -> None:
+        """states of older versions aren't reused"""
+        self.store().save("repo", "main", "c1", self.files)
+        with mock.patch.object(Constants, "STATE_VERSION", Constants.STATE_VERSION + 1):
+            self.assertIsNone(self.store().load("repo", "main"))
+
+    def test_corrupt(self) -> None:
+        """unreadable states are logged and ignored"""
+        path = os.path.join(Constants.STATE_FOLDER, "repo", "main.json")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w", encoding=Constants.ENCODING) as file:
+            file.write("{")
+        logger = mock.Mock()
+        store = SearchStateStore(logger, "pattern", ["users"], [])
+        self.assertIsNone(store.load("repo", "main"))
+        logger.error.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""tests for BranchWalker class"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from constants import BranchSearchResults, Constants
+from pathfilter import PathFilter
+from walker import BranchWalker
+
+
+class BranchWalkerTest(unittest.TestCase):
+    """tracked files from the git index are listed like walked folders"""
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.walker = BranchWalker(PathFilter(["bin"], [".dll"]))
+
+    def write(self, rel_path: str) -> None:
+        """writes empty file at path relative to temporary folder"""
+        path = os.path.join(self.folder, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb"):
+            pass
+
+    def test_symlinks(self) -> None:
+        """linked folders are listed, not searched, linked files are searched"""
+        self.write("src/query.sql")
+        self.write("bin/app.sql")
+        os.symlink("src", os.path.join(self.folder, "linked"))
+        os.symlink("query.sql", os.path.join(self.folder, "src", "linked.sql"))
+        entries = [
+            (Constants.SYMLINK_MODE, "linked"),
+            ("100644", "src/query.sql"),
+            (Constants.SYMLINK_MODE, "src/linked.sql"),
+            ("100644", "bin/app.sql"),
+        ]
+
+        tracked = BranchSearchResults()
+        files = list(self.walker.tracked(self.folder, entries, tracked))
+        walked = BranchSearchResults()
+        self.assertEqual(sorted(files), sorted(self.walker.walk(self.folder, walked)))
+        self.assertNotIn(os.path.join(self.folder, "linked"), files)
+        for attr in ("folders", "skipped_folders", "skipped_files"):
+            self.assertEqual(
+                sorted(getattr(tracked, attr)), sorted(getattr(walked, attr))
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""contains BranchWalker class"""
+
+import os
+import posixpath
+from typing import Iterator
+from constants import BranchSearchResults, Constants
+from pathfilter import PathFilter
+
+
+class BranchWalker:
+    """used to list checkout files to search, from the git index or by walking
+    folders, recording searched and skipped folders in the same pass
+
+    git metadata is never searched, files are optionally ordered by inode so
+    cold disks read them in layout order
+    """
+
+    def __init__(self, path_filter: PathFilter, inode_order: bool = False) -> None:
+        self.__path_filter = path_filter
+        self.__inode_order = inode_order
+
+    def walk(self, path: str, results: BranchSearchResults) -> Iterator[str]:
+        """paths of files to search in folder, top down in listing order like
+        os.walk, entry types from the listing instead of a stat per entry
+        """
+        files = self.__walk(path, results)
+        if self.__inode_order:
+            return (file_path for _, file_path in sorted(files))
+        return (file_path for _, file_path in files)
+
+    def tracked(
+        self, path: str, entries: list[tuple[str, str]], results: BranchSearchResults
+    ) -> Iterator[str]:
+        """paths of tracked files to search, from modes and paths relative to
+        branch in index order, folders derived from the paths
+        """
+        files = self.__tracked(path, entries, results)
+        if self.__inode_order:
+            return iter(sorted(files, key=_inode))
+        return files
+
+    def __walk(
+        self, path: str, results: BranchSearchResults
+    ) -> Iterator[tuple[int, str]]:
+        """inode and path of files to search"""
+        path_filter = self.__path_filter
+        # folders to list, later ones first, with their path relative to branch
+        stack = [(path, "")]
+        while stack:
+            root, prefix = stack.pop()
+            try:
+                with os.scandir(root) as listing:
+                    entries = list(listing)
+            except OSError:
+                continue
+
+            folders = []
+            files = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                (folders if is_dir else files).append(entry)
+
+            walked = []
+            for entry in folders:
+                if entry.name == Constants.GIT_FOLDER or path_filter.skip_folder(
+                    prefix + entry.name
+                ):
+                    results.skipped_folders.append(entry.path + os.sep)
+                    continue
+                results.folders.append(entry.path)
+                # linked folders are listed, not walked
+                if not entry.is_symlink():
+                    walked.append((entry.path, prefix + entry.name + "/"))
+            stack.extend(reversed(walked))
+
+            for entry in files:
+                if entry.name == Constants.GIT_FOLDER or path_filter.skip_file(
+                    prefix + entry.name
+                ):
+                    results.skipped_files.append(entry.path)
+                else:
+                    yield (entry.inode() if self.__inode_order else 0, entry.path)
+
+    def __tracked(
+        self, path: str, entries: list[tuple[str, str]], results: BranchSearchResults
+    ) -> Iterator[str]:
+        path_filter = self.__path_filter
+        # listed folders, whether skipped
+        folders: dict[str, bool] = {"": False}
+        for mode, rel_path in entries:
+            folder = posixpath.dirname(rel_path)
+            if self.__skipped_folder(path, folder, folders, results):
+                continue
+            full_path = os.path.join(path, *rel_path.split("/"))
+            if mode == Constants.SUBMODULE_MODE or (
+                mode == Constants.SYMLINK_MODE and os.path.isdir(full_path)
+            ):
+                # checkouts leave submodules as folders, linked folders are
+                # listed, not walked
+                self.__skipped_folder(path, rel_path, folders, results)
+                continue
+            if path_filter.skip_file(rel_path):
+                results.skipped_files.append(full_path)
+            else:
+                yield full_path
+
+    def __skipped_folder(
+        self,
+        path: str,
+        folder: str,
+        folders: dict[str, bool],
+        results: BranchSearchResults,
+    ) -> bool:
+        """whether folder or one above it is skipped, recording folders not
+        seen before, parents first
+        """
+        if folder in folders:
+            return folders[folder]
+        parent = posixpath.dirname(folder)
+        if self.__skipped_folder(path, parent, folders, results):
+            # only the topmost skipped folder is recorded, like a walk
+            folders[folder] = True
+            return True
+        full_path = os.path.join(path, *folder.split("/"))
+        skipped = self.__path_filter.skip_folder(folder)
+        if skipped:
+            results.skipped_folders.append(full_path + os.sep)
+        else:
+            results.folders.append(full_path)
+        folders[folder] = skipped
+        return skipped
+
+
+def _inode(file_path: str) -> int:
+    try:
+        return os.stat(file_path, follow_symlinks=False).st_ino
+    except OSError:
+        return 0
@@ -1,15 +1,33 @@
 """contains ResultsWriter class"""
 
 import os
-from typing import Union
-from constants import BranchSearchResults, Constants, Messages
+import queue
+import threading
+from typing import IO, Callable, Iterable, Iterator, Optional, Union
+from constants import (
+    BranchSearchResults,
+    Constants,
+    FileSearchResults,
+    MatchTable,
+    Messages,
+    PathList,
+)
 from config import ConfigurationManager
+from sinks import JsonLinesSink, SqliteSink, create_sink
 
 
+# pylint: disable=too-many-instance-attributes
 class ResultsWriter:
-    """used for writing results files (details, matches, words)"""
+    """used for writing results files (details, matches, words)
 
-    def __init__(self, date: str) -> None:
+    files stay open for the whole run and are flushed after each branch,
+    writes optionally run in order on a background thread, branch results
+    are also written to chosen sinks (JSON lines, SQLite)
+    """
+
+    def __init__(
+        self, date: str, background: bool = False, sinks: Optional[list[str]] = None
+    ) -> None:
         config_folder = Constants.RESULTS_FOLDER
         path = os.path.join(config_folder, date)
         if not os.path.exists(path):
@@ -21,123 +39,225 @@ class ResultsWriter:
         self.__words_file = os.path.join(path, Constants.FOUND_FILE)
 
         self.__found_words = set()
+        self.__files: dict[str, IO[str]] = {}
+        self.__sinks: list[Union[JsonLinesSink, SqliteSink]] = [
+            create_sink(sink, path) for sink in sinks or []
+        ]
+        self.__streaming = any(isinstance(sink, JsonLinesSink) for sink in self.__sinks)
+        # repo and branch being written, for sink records
+        self.__repo = ""
+        self.__branch = ""
+
+        # writes queued for the writer thread, None once closed
+        self.__queue: Optional[queue.Queue] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__error: Optional[Exception] = None
+        if background:
+            self.__queue = queue.Queue(maxsize=Constants.WRITER_QUEUE_SIZE)
+            self.__thread = threading.Thread(target=self.__run, daemon=True)
+            self.__thread.start()
 
     def write_repo_start(self, name: str) -> None:
         """writes repo start section"""
-        self.__write_to_details_file(name)
+        self.__submit(self.__write_repo_start, name)
 
     def write_branch_start(self, name: str) -> None:
         """writes branch start section"""
-        line = Constants.TAB + name
-        self.__write_to_details_file(line)
+        self.__submit(self.__write_branch_start, name)
 
-    def write_branch_skip(self, reason: str) -> None:
+    def write_branch_skip(self, name: str, reason: str) -> None:
         """writes branch skip section"""
-        line = Constants.TAB + f"skipped - {reason}"
-        self.__write_to_details_file(line)
+        self.__submit(self.__write_branch_skip, name, reason)
+        self.__submit(self.__flush)
+
+    def write_file_results(self, results: FileSearchResults, listed: bool) -> None:
+        """writes results of a file of the branch being searched to sinks that
+        stream them, with its status unless paths are only counted
+        """
+        if self.__streaming:
+            self.__submit(self.__write_file_results, results, listed)
 
     def write_branch_results(
         self, repo: str, branch: str, results: BranchSearchResults
     ) -> None:
         """writes all branch search results sections"""
+        self.__submit(self.__write_branch_results, repo, branch, results)
+        self.__submit(self.__flush)
+
+    def close(self) -> None:
+        """finishes queued writes, closes files"""
+        if self.__thread is not None:
+            assert self.__queue is not None
+            self.__queue.put(None)
+            self.__thread.join()
+            self.__thread = None
+        for file in self.__files.values():
+            file.close()
+        self.__files = {}
+        for sink in self.__sinks:
+            sink.close()
+        self.__sinks = []
+        if self.__error is not None:
+            raise self.__error
+
+    def __submit(self, write: Callable, *args) -> None:
+        if self.__thread is None:
+            write(*args)
+            return
+        assert self.__queue is not None
+        # bounded, so a slow disk holds back the search instead of memory
+        self.__queue.put((write, args))
+
+    def __run(self) -> None:
+        assert self.__queue is not None
+        while (item := self.__queue.get()) is not None:
+            write, args = item
+            # later writes are dropped, error raised when closed
+            if self.__error is not None:
+                continue
+            try:
+                write(*args)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                self.__error = err
 
-        lines, count = self.__format_matches(results.matches)
-        if lines:
+    def __flush(self) -> None:
+        for file in self.__files.values():
+            file.flush()
+        for sink in self.__sinks:
+            sink.flush()
+
+    def __write_repo_start(self, name: str) -> None:
+        self.__repo = name
+        self.__write_to_details_file(name)
+
+    def __write_branch_start(self, name: str) -> None:
+        self.__branch = name
+        self.__write_to_details_file(Constants.TAB + name)
+
+    def __write_branch_skip(self, name: str, reason: str) -> None:
+        # skips come before the branch start section, so only sinks name it
+        self.__write_to_details_file(Constants.TAB + f"skipped - {reason}")
+        for sink in self.__sinks:
+            sink.write_branch_skip(self.__repo, name, reason)
+
+    def __write_file_results(self, results: FileSearchResults, listed: bool) -> None:
+        for sink in self.__sinks:
+            if isinstance(sink, JsonLinesSink):
+                sink.write_file_results(self.__repo, self.__branch, results, listed)
+
+    def __write_branch_results(
+        self, repo: str, branch: str, results: BranchSearchResults
+    ) -> None:
+        # lines are formatted as they're written, once per file
+        count = results.matches.count
+        if count:
             self.__write_to_matches_file(repo)
             self.__write_to_matches_file(f"{Constants.TAB}{branch} ({count})")
-            self.__write_to_matches_file(lines, Constants.TAB * 2)
+            self.__write_to_matches_file(
+                self.__format_matches(results.matches), Constants.TAB * 2
+            )
 
             self.__write_to_details_file(
                 f"{Constants.TAB * 2}{Messages.MATCHES} ({count})"
             )
-            self.__write_to_details_file(lines, Constants.TAB * 3)
+            self.__write_to_details_file(
+                self.__format_matches(results.matches), Constants.TAB * 3
+            )
 
         sections = {
             Messages.ERRORS: results.errors,
             Messages.SKIPPED_FOLDERS: results.skipped_folders,
             Messages.SKIPPED_FILES: results.skipped_files,
+            Messages.REJECTED_FILES: results.rejected_files,
             Messages.SEARCHED_FOLDERS: results.folders,
             Messages.SEARCHED_FILES: results.files,
         }
 
         for name, section in sections.items():
-            lines = self.__format_results_section(name, section)
-            if lines:
-                self.__write_to_details_file(lines)
-
-    def __format_matches(self, matches: dict) -> tuple:
-        if len(matches) == 0:
-            return [], -1
-
-        count = 0
-        lines = []
-        for path in matches:
-            lines.append(path)
-            for word in matches[path].keys():
-                self.__found_words.add(word)
-                lines.append(Constants.TAB + word)
-                for match in matches[path][word]:
-                    lines.append(Constants.TAB * 2 + match)
-                    count += 1
-
-        if not count:
-            return [], -1
-        return lines, count
+            if section:
+                self.__write_to_details_file(
+                    self.__format_results_section(name, section)
+                )
 
-    def __format_results_section(self, name: str, section: list) -> list[str]:
-        """formats branch search results section (other than matches) for output"""
+        for sink in self.__sinks:
+            sink.write_branch_results(repo, branch, results)
 
-        if len(section) == 0:
-            return []
+    def __format_matches(self, matches: MatchTable) -> Iterator[str]:
+        for path, words in matches.items():
+            yield path
+            for word, lines in words.items():
+                self.__found_words.add(word)
+                yield Constants.TAB + word
+                for number, preview in lines:
+                    yield Constants.TAB * 2 + Messages.LINE.format(
+                        idx=number, line=preview
+                    )
 
+    def __format_results_section(self, name: str, section: PathList) -> Iterator[str]:
+        """formats branch search results section (other than matches) for output"""
         spacer = Constants.TAB * 2
-        lines = [f"{spacer}{name} ({len(section)})"]
+        yield f"{spacer}{name} ({len(section)})"
 
         spacer += Constants.TAB
         for i in section:
-            lines.append(spacer + i)
-        return lines
+            yield spacer + i
 
     def write_config(self, config: ConfigurationManager) -> None:
         """writes config info"""
-        self.__write_to_config_file(config.config_str())
+        self.__submit(self.__write_to_config_file, config.config_str())
 
     def write_found_words(self) -> None:
         """writes list of words found in search"""
+        # found words are only known once queued results are formatted
+        self.__submit(self.__write_found_words)
+
+    def __write_found_words(self) -> None:
         if self.__found_words:
             self.__write_to_words_file(list(self.__found_words))
 
     def __write_to_config_file(
-        self, output: Union[str, list[str]], prefix: str = ""
+        self, output: Union[str, Iterable[str]], prefix: str = ""
     ) -> None:
         self.__write(self.__config_file, output, prefix)
 
     def __write_to_words_file(
-        self, output: Union[str, list[str]], prefix: str = ""
+        self, output: Union[str, Iterable[str]], prefix: str = ""
     ) -> None:
         self.__write(self.__words_file, output, prefix)
 
     def __write_to_details_file(
-        self, output: Union[str, list[str]], prefix: str = ""
+        self, output: Union[str, Iterable[str]], prefix: str = ""
     ) -> None:
         self.__write(self.__details_file, output, prefix)
 
     def __write_to_matches_file(
-        self, output: Union[str, list[str]], prefix: str = ""
+        self, output: Union[str, Iterable[str]], prefix: str = ""
     ) -> None:
         self.__write(self.__matches_file, output, prefix)
 
-    def __write(self, file: str, output: Union[str, list[str]], prefix: str) -> None:
+    def __write(
+        self, file: str, output: Union[str, Iterable[str]], prefix: str
+    ) -> None:
         if isinstance(output, str):
             self.__write_line(file, output, prefix)
         else:
             self.__write_lines(file, output, prefix)
 
     def __write_line(self, filename, line, prefix) -> None:
-        with open(filename, "a", encoding=Constants.ENCODING) as file:
-            file.write(prefix + line + Constants.NEWLINE)
+        self.__file(filename).write(prefix + line + Constants.NEWLINE)
 
     def __write_lines(self, filename, lines, prefix) -> None:
-        with open(filename, "a", encoding=Constants.ENCODING) as file:
-            for line in lines:
-                file.write(prefix + line + Constants.NEWLINE)
+        file = self.__file(filename)
+        for line in lines:
+            file.write(prefix + line + Constants.NEWLINE)
+
+    def __file(self, filename: str) -> IO[str]:
+        if filename not in self.__files:
+            # pylint: disable=consider-using-with
+            self.__files[filename] = open(
+                filename,
+                "a",
+                encoding=Constants.ENCODING,
+                buffering=Constants.WRITE_BUFFER_SIZE,
+            )
+        return self.__files[filename]